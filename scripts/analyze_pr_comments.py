@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+出力済みのコメント（CSV・JSON Lines）の本文を分析するスクリプト
+
+export_pr_comments_csv.py などが出力したファイルを読み込み、頻出語・長さの分布・定型句（nit、LGTMなど）・
+レビューコメントの多いファイルを集計して comment_analysis.json に保存する。APIは呼び出さない。
+クロールと同時に分析する場合は PR_COMMENTS_OUTPUTS に analysis を指定する。
+
+使い方:
+    python scripts/analyze_pr_comments.py                                  # pr_comments_export.csv を分析
+    python scripts/analyze_pr_comments.py pr_comments_export_ts.csv
+    python scripts/analyze_pr_comments.py comments_list.jsonl.gz --workers 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from comment_analysis import ANALYSIS_BATCH_SIZE, ANALYSIS_FILE, CommentAnalyzer, print_report
+from comment_sinks import TS_CSV_HEADERS, open_input
+from metrics import default_metrics
+
+# 入力ファイルの既定値（export_pr_comments_csv.py の出力）
+DEFAULT_INPUT = 'pr_comments_export.csv'
+
+# TypeScript版と同じ形式のCSVの見出し → 列名
+_TS_CSV_COLUMNS = {header: column for column, header in TS_CSV_HEADERS.items()}
+
+
+def iter_input_rows(input_file):
+    """
+    出力済みのファイルからコメント行を読み込む
+
+    Args:
+        input_file (str): CSV（見出しは列名またはTypeScript版の日本語）またはJSON Lines（.gz / .zst も可）
+
+    Yields:
+        dict: コメント行
+    """
+    name = input_file.removesuffix('.gz').removesuffix('.zst')
+    if name.endswith('.jsonl'):
+        with open_input(input_file) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    with open_input(input_file, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_TS_CSV_COLUMNS.get(title, title) for title in header]
+        for values in reader:
+            yield dict(zip(columns, values))
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='出力済みのコメントの本文を分析する')
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help=f'入力ファイル（既定値: {DEFAULT_INPUT}）')
+    parser.add_argument('--output', default=ANALYSIS_FILE, help=f'出力ファイル（既定値: {ANALYSIS_FILE}）')
+    parser.add_argument('--workers', type=int,
+                        help='分析に使うプロセス数（省略時は PR_COMMENTS_ANALYSIS_WORKERS 環境変数、なければCPU数）')
+    parser.add_argument('--batch-size', type=int, default=ANALYSIS_BATCH_SIZE, help='1つのワーカーに渡す行数')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"エラー: 入力ファイルがありません: {args.input}")
+        sys.exit(1)
+
+    print(f"入力ファイル: {args.input}")
+    analyzer = CommentAnalyzer(args.workers, args.batch_size)
+    # 読み込みの時間は read、分析（ワーカーの結果の待ち時間を含む）の時間は analysis として計測する
+    analysis_seconds = 0.0
+    rows = 0
+    try:
+        for row in default_metrics.timed(iter_input_rows(args.input), 'read'):
+            start = time.perf_counter()
+            analyzer.add(row)
+            analysis_seconds += time.perf_counter() - start
+            rows += 1
+        with default_metrics.phase('analysis'):
+            report = analyzer.report()
+    finally:
+        analyzer.close()
+    default_metrics.add_phase_time('analysis', analysis_seconds, rows)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"コメントの分析結果が保存されました: {args.output}")
+    print_report(report)
+    default_metrics.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+クロールのベンチマーク（代替サーバーを使うためネットワーク不要）
+
+fake_github_server.py の合成リポジトリに対して各スクリプトを別プロセスで実行し、
+実行時間・リクエスト数・転送量・最大メモリ使用量（RSS）・1秒あたりの出力行数を計測する。
+RESTで取得する場合は、一覧のページとPRごとのレビュー以外のリクエスト
+（PRやコメントごとの追加のリクエスト）が発生していないことも確認する。
+count はコメント数（GraphQLの totalCount）から集計するため、PR 100件ごとに1回のリクエストで済むことを確認する。
+--baseline に以前の結果を指定すると、悪化した項目があった場合に終了コード1で終了する。
+
+使い方:
+    python scripts/benchmarks/bench_crawl.py --sizes 1000 10000 100000
+    python scripts/benchmarks/bench_crawl.py --sizes 1000 --scripts count csv --output results.json
+    python scripts/benchmarks/bench_crawl.py --sizes 1000 --baseline results.json
+    python scripts/benchmarks/bench_crawl.py --sizes 1000 --repos 20 --scripts crawl   # 組織全体のクロール
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unicodedata
+
+from fake_github_server import SyntheticRepo, start_server
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# 計測するスクリプト
+SCRIPTS = {
+    'count': 'count_pr_comments.py',
+    'list': 'list_pr_comments.py',
+    'csv': 'export_pr_comments_csv.py',
+    'crawl': 'crawl_pr_comments.py',
+}
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+# --baseline との比較で悪化とみなす割合（実行時間・メモリ）
+DEFAULT_TOLERANCE = 0.2
+
+# ベンチマークの結果に影響する環境変数（実行環境から引き継がない）
+ISOLATED_ENV = [
+    'PR_COMMENTS_STORE', 'PR_COMMENTS_HTTP_CACHE', 'PR_COMMENTS_OUTPUTS',
+    'PR_COMMENTS_MAX_RUNTIME', 'PR_COMMENTS_METRICS', 'GITHUB_GRAPHQL_URL',
+    'PR_COMMENTS_REPOSITORIES', 'PR_COMMENTS_ORG', 'PR_COMMENTS_COMPRESS', 'PR_COMMENTS_FILTER',
+    'PR_COMMENTS_PARTITION', 'PR_COMMENTS_PARTITION_FORMAT', 'PR_COMMENTS_PARTITION_WORKERS',
+]
+
+
+def _peak_rss_mb(rusage):
+    """wait4 の rusage から最大RSS（MB）を求める（macOSはバイト、Linuxはキロバイト単位）"""
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(rusage.ru_maxrss / divisor, 1)
+
+
+def _count_output_rows(work_dir):
+    """
+    スクリプトが出力したコメント数を成果物から数える
+
+    Returns:
+        int: コメント数（成果物がない場合はNone）
+    """
+    counts_file = os.path.join(work_dir, 'comment_counts.json')
+    if os.path.exists(counts_file):
+        with open(counts_file, encoding='utf-8') as f:
+            return json.load(f)['total_comments']
+    csv_file = os.path.join(work_dir, 'pr_comments_export.csv')
+    if os.path.exists(csv_file):
+        with open(csv_file, encoding='utf-8-sig', newline='') as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+    list_file = os.path.join(work_dir, 'comments_list.json')
+    if os.path.exists(list_file):
+        with open(list_file, encoding='utf-8') as f:
+            return json.load(f)['summary']['total_comments']
+    return None
+
+
+def run_script(server, script_name, env_overrides):
+    """
+    スクリプトを別プロセスで実行して計測する
+
+    Args:
+        server (FakeGitHubServer): 代替サーバー（複数リポジトリの場合は組織全体をクロールする）
+        script_name (str): SCRIPTS のキー
+        env_overrides (dict): 追加する環境変数
+
+    Returns:
+        dict: 計測結果
+    """
+    repo = server.repo
+    repo_count = len(server.repo_names)
+    env = {name: value for name, value in os.environ.items() if name not in ISOLATED_ENV}
+    env.update({
+        'GITHUB_TOKEN': 'dummy',
+        'GITHUB_REPOSITORY': repo.full_name,
+        'GITHUB_API_URL': server.api_url,
+    })
+    if repo_count > 1:
+        env['PR_COMMENTS_ORG'] = repo.owner
+    env.update(env_overrides)
+
+    server.reset_stats()
+    with tempfile.TemporaryDirectory() as work_dir:
+        log_path = os.path.join(work_dir, 'output.log')
+        with open(log_path, 'w') as log:
+            start = time.perf_counter()
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(SCRIPTS_DIR, SCRIPTS[script_name])],
+                cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT
+            )
+            _, status, rusage = os.wait4(process.pid, 0)
+            wall_time = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+
+        rows = _count_output_rows(work_dir)
+        phases = {}
+        metrics_file = os.path.join(work_dir, 'pr_comments_metrics.json')
+        if os.path.exists(metrics_file):
+            with open(metrics_file, encoding='utf-8') as f:
+                phases = {name: entry['seconds'] for name, entry in json.load(f)['phases'].items()}
+        expected_rows = repo.expected_rows() * repo_count
+        error = None
+        if process.returncode != 0:
+            error = f"終了コード {process.returncode}"
+        elif rows != expected_rows:
+            error = f"出力行数 {rows}（期待値 {expected_rows}）"
+        stats = server.stats()
+        expected_requests = None
+        if script_name == 'count' and not env.get('PR_COMMENTS_STORE') and not stats['rate_limited']:
+            # コメント数はGraphQLの totalCount から求める（PR 100件ごとに1回）
+            expected_requests = repo.expected_count_requests()
+        elif env.get('PR_COMMENTS_BACKEND', 'rest') == 'rest' and not stats['rate_limited']:
+            expected_requests = server.expected_rest_requests()
+        if not error and expected_requests is not None and stats['requests'] > expected_requests:
+            error = f"リクエスト数 {stats['requests']}（想定 {expected_requests}、余分なリクエストがあります）"
+        if error:
+            with open(log_path, encoding='utf-8', errors='replace') as f:
+                print(''.join(f.readlines()[-20:]), file=sys.stderr)
+
+    return {
+        'script': script_name,
+        'prs': repo.pr_count * repo_count,
+        'rows': expected_rows,
+        'wall_time': round(wall_time, 3),
+        'requests': stats['requests'],
+        'expected_requests': expected_requests,
+        'not_modified': stats['not_modified'],
+        'bytes_received': stats['bytes_sent'],
+        'peak_rss_mb': _peak_rss_mb(rusage),
+        'rows_per_second': round(expected_rows / wall_time) if wall_time else 0,
+        'by_endpoint': stats['by_endpoint'],
+        'phases': phases,
+        'error': error,
+    }
+
+
+def _pad(value, width):
+    """全角文字を2桁として右寄せする"""
+    text = str(value)
+    text_width = sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+    return ' ' * max(0, width - text_width) + text
+
+
+# 表の列（見出し, 幅）
+RESULT_COLUMNS = [
+    ('スクリプト', 10), ('PR数', 8), ('行数', 9), ('時間(秒)', 10), ('リクエスト', 11),
+    ('受信(MB)', 10), ('RSS(MB)', 9), ('行/秒', 9),
+]
+
+
+def print_results(results):
+    """計測結果を表形式で表示する"""
+    print()
+    print(''.join(_pad(title, width) for title, width in RESULT_COLUMNS))
+    for result in results:
+        values = [
+            result['script'], result['prs'], result['rows'], result['wall_time'], result['requests'],
+            round(result['bytes_received'] / 1024 / 1024, 1), result['peak_rss_mb'], result['rows_per_second'],
+        ]
+        line = ''.join(_pad(value, width) for value, (_, width) in zip(values, RESULT_COLUMNS))
+        if result['error']:
+            line += f"  エラー: {result['error']}"
+        print(line)
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    以前の結果と比較して悪化した項目を返す
+
+    Args:
+        results (list): 今回の計測結果
+        baseline (list): 以前の計測結果
+        tolerance (float): 実行時間・メモリの許容する悪化の割合
+
+    Returns:
+        list: 悪化した項目の説明
+    """
+    baseline_by_key = {(result['script'], result['prs']): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get((result['script'], result['prs']))
+        if previous is None:
+            continue
+        label = f"{result['script']}（{result['prs']}件）"
+        if result['requests'] > previous['requests']:
+            regressions.append(f"{label} リクエスト数: {previous['requests']} → {result['requests']}")
+        for key, name in (('wall_time', '実行時間'), ('peak_rss_mb', '最大RSS')):
+            if result[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{label} {name}: {previous[key]} → {result[key]}")
+    return regressions
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='代替サーバーに対するクロールのベンチマーク')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='PR数')
+    parser.add_argument('--scripts', nargs='+', choices=list(SCRIPTS), default=['count', 'csv'],
+                        help='計測するスクリプト')
+    parser.add_argument('--comments-per-pr', type=int, default=3,
+                        help='PRごとのレビューコメント・レビュー・Issueコメントの件数（それぞれ）')
+    parser.add_argument('--repos', type=int, default=1,
+                        help='リポジトリ数（2以上の場合は PR_COMMENTS_ORG で組織全体をクロールする、PR数はリポジトリごと）')
+    parser.add_argument('--latency-ms', type=float, default=0, help='1リクエストごとの応答遅延（ミリ秒）')
+    parser.add_argument('--rate-limit', type=int, default=1000000, help='レート制限の上限')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='スクリプトに渡す環境変数（例: PR_COMMENTS_BACKEND=graphql）')
+    parser.add_argument('--output', help='計測結果を保存するJSONファイル')
+    parser.add_argument('--baseline', help='比較する以前の計測結果（JSONファイル）')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='実行時間・メモリの許容する悪化の割合')
+    args = parser.parse_args()
+
+    env_overrides = dict(item.split('=', 1) for item in args.env)
+
+    results = []
+    for size in args.sizes:
+        server = start_server(SyntheticRepo(size, args.comments_per_pr),
+                              latency=args.latency_ms / 1000, rate_limit=args.rate_limit, repo_count=args.repos)
+        try:
+            for script_name in args.scripts:
+                print(f"計測中: {script_name}（PR {size}件）...")
+                results.append(run_script(server, script_name, env_overrides))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n計測結果が保存されました: {args.output}")
+
+    failed = any(result['error'] for result in results)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n=== 悪化した項目 ===")
+            for regression in regressions:
+                print(f"  - {regression}")
+            failed = True
+        else:
+            print("\n以前の計測結果からの悪化はありません。")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
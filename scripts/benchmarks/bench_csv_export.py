@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+CSV出力のベンチマーク（標準ライブラリの csv と 従来の pandas の比較）
+
+起動時間（モジュールのインポート）と、合成したコメント行のCSV出力時間を計測する。
+pandas がインストールされていない場合は csv のみ計測する。
+
+使い方:
+    python scripts/benchmarks/bench_csv_export.py [行数...]
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from comment_sinks import CsvSink  # noqa: E402
+
+# 行数を省略した場合に計測する行数
+DEFAULT_ROW_COUNTS = [1000, 10000, 100000]
+
+# 起動時間の計測回数（中央値を表示する）
+STARTUP_REPEAT = 5
+
+
+def synthetic_rows(count):
+    """
+    計測用のコメント行を作成する
+
+    Args:
+        count (int): 行数
+
+    Returns:
+        list: コメント行のリスト（レビューコメント・レビュー・Issueコメントを含む）
+    """
+    rows = []
+    for i in range(count):
+        comment_type = ('review_comment', 'review', 'issue_comment')[i % 3]
+        is_review_comment = comment_type == 'review_comment'
+        rows.append({
+            'pr_number': i // 10 + 1,
+            'pr_title': f"PR {i // 10 + 1}: 機能の追加",
+            'pr_state': 'closed',
+            'pr_created_at': '2024-01-01T00:00:00+00:00',
+            'pr_merged_at': '2024-01-02T00:00:00+00:00',
+            'pr_author': f"author{i % 7}",
+            'comment_type': comment_type,
+            'comment_id': 1000000 + i,
+            'comment_body': f"コメント {i}\n修正をお願いします, \"nit\"",
+            'comment_created_at': '2024-01-01T12:00:00+00:00',
+            'comment_updated_at': '2024-01-01T12:00:00+00:00',
+            'comment_user': f"user{i % 23}",
+            'comment_path': 'src/main.py' if is_review_comment else '',
+            'comment_line': i % 500 + 1 if is_review_comment else '',
+            'comment_side': 'RIGHT' if is_review_comment else '',
+            'comment_start_line': None if is_review_comment else '',
+            'comment_start_side': None if is_review_comment else '',
+        })
+    return rows
+
+
+def measure_startup(module):
+    """
+    新しいプロセスでモジュールをインポートするまでの時間を計測する
+
+    Returns:
+        float: 秒数の中央値
+    """
+    timings = []
+    for _ in range(STARTUP_REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f"import {module}"], check=True)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def export_with_csv(rows, output_file):
+    """CsvSink でCSVを出力する（統計情報の表示を含む）"""
+    sink = CsvSink(output_file)
+    for row in rows:
+        sink.add(row)
+    sink.close([])
+
+
+def export_with_pandas(rows, output_file):
+    """従来の実装（DataFrame → to_csv → value_counts）でCSVを出力する"""
+    import pandas as pd
+    df = pd.DataFrame(rows)
+    df.to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(df['pr_number'].nunique())
+    print(df['comment_type'].value_counts())
+    print(df['comment_user'].value_counts().head(10))
+
+
+def measure_export(export, rows):
+    """
+    CSV出力にかかる時間を計測する（表示は破棄する）
+
+    Returns:
+        tuple: (秒数, 出力ファイルのバイト数)
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = os.path.join(tmp_dir, 'pr_comments_export.csv')
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            export(rows, output_file)
+            elapsed = time.perf_counter() - start
+        return elapsed, os.path.getsize(output_file)
+
+
+def main():
+    """メイン関数"""
+    row_counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROW_COUNTS
+
+    try:
+        import pandas  # noqa: F401
+        has_pandas = True
+    except ImportError:
+        has_pandas = False
+        print("pandas がインストールされていないため、csv のみ計測します。")
+
+    print("=== 起動時間（インポート、中央値） ===")
+    print(f"python（インポートなし）: {measure_startup('sys'):.3f}秒")
+    print(f"csv: {measure_startup('csv'):.3f}秒")
+    if has_pandas:
+        print(f"pandas: {measure_startup('pandas'):.3f}秒")
+
+    print("\n=== CSV出力時間 ===")
+    for count in row_counts:
+        rows = synthetic_rows(count)
+        elapsed, size = measure_export(export_with_csv, rows)
+        print(f"{count}行 csv: {elapsed:.3f}秒（{size}バイト、{count / elapsed:.0f}行/秒）")
+        if has_pandas:
+            elapsed, size = measure_export(export_with_pandas, rows)
+            print(f"{count}行 pandas: {elapsed:.3f}秒（{size}バイト、{count / elapsed:.0f}行/秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク用のGitHub APIの代替サーバー（オフライン）
+
+合成したリポジトリのPR・レビューコメント・レビュー・Issueコメントを、
+GitHub REST API / GraphQL API と同じ形式・ページング（Linkヘッダー）・
+レート制限ヘッダー・ETag（304 Not Modified）で返す。
+データはPR番号とコメントの通し番号から計算して作るため、PR数によらずメモリ使用量は一定
+（状態・検索で絞り込む場合のみ、一致するPR番号を保持する）。
+--repos を指定すると、同じ内容のリポジトリを複数（組織のリポジトリ一覧 /orgs/{owner}/repos を含む）返す。
+
+使い方:
+    python scripts/benchmarks/fake_github_server.py --prs 10000 --port 8000
+    GITHUB_API_URL=http://127.0.0.1:8000 GITHUB_TOKEN=dummy GITHUB_REPOSITORY=bench/repo \\
+        python scripts/count_pr_comments.py
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 1ページの件数の既定値と上限（GitHubと同じ）
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+
+# 検索APIのレート制限（1分あたりのリクエスト数）
+SEARCH_RATE_LIMIT = 30
+
+# 最初のPRの作成日時
+BASE_TIME = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+# PRを作成する間隔（コメントはPRの作成後、次のPRまでの間に1分間隔で作成する）
+PR_INTERVAL = timedelta(hours=1)
+
+# レビューコメントの差分（レスポンスの大きさを実際に近づけるため）
+DIFF_HUNK = "@@ -10,6 +10,8 @@ def main():\n     client = Client()\n-    run(client)\n+    result = run(client)\n+    report(result)"
+
+
+def _isoformat(value):
+    """APIと同じ形式（2024-01-01T00:00:00Z）の日時文字列"""
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _parse_time(value):
+    """since= などの日時文字列を datetime にする"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class SyntheticRepo:
+    """PR数・PRごとのコメント数から計算で作る合成リポジトリ"""
+
+    def __init__(self, pr_count, comments_per_pr=3, owner='bench', name='repo'):
+        """
+        Args:
+            pr_count (int): PR数
+            comments_per_pr (int): PRごとのレビューコメント・レビュー・Issueコメントの件数（それぞれ）
+            owner (str): リポジトリのオーナー
+            name (str): リポジトリ名
+        """
+        if comments_per_pr >= PR_INTERVAL / timedelta(minutes=1):
+            raise ValueError("comments_per_pr が大きすぎます")
+        self.pr_count = pr_count
+        self.comments_per_pr = comments_per_pr
+        self.owner = owner
+        self.name = name
+        self.api_url = ''  # サーバー起動時に設定する
+
+    @property
+    def full_name(self):
+        return f"{self.owner}/{self.name}"
+
+    def expected_rows(self):
+        """
+        スクリプトが出力するはずのコメント数
+
+        Returns:
+            int: レビューコメント + 本文のあるレビュー（1件おき）+ Issueコメント
+        """
+        reviews_with_body = (self.comments_per_pr + 1) // 2
+        return self.pr_count * (self.comments_per_pr * 2 + reviews_with_body)
+
+    def pr_created_at(self, number):
+        return BASE_TIME + PR_INTERVAL * number
+
+    def pr_updated_at(self, number):
+        # 最後のコメントの後に更新された扱いにする（更新順 = 作成順 = PR番号順）
+        return self.pr_created_at(number) + PR_INTERVAL / 2
+
+    def comment_created_at(self, index):
+        """リポジトリ全体のコメントの通し番号から作成日時を求める（通し番号の順に単調増加）"""
+        number, position = divmod(index, self.comments_per_pr)
+        return self.pr_created_at(number + 1) + timedelta(minutes=position + 1)
+
+    def first_comment_since(self, since):
+        """since= 以降に更新されたコメントの最初の通し番号（二分探索）"""
+        low, high = 0, self.pr_count * self.comments_per_pr
+        while low < high:
+            middle = (low + high) // 2
+            if self.comment_created_at(middle) < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def expected_rest_requests(self, per_page=MAX_PER_PAGE):
+        """
+        REST APIで全件取得する場合に必要なリクエスト数（PRやコメントごとの追加のリクエストを含まない）
+
+        Returns:
+            int: /pulls・/pulls/comments・/issues/comments の全ページ + PRごとのレビューのページ
+        """
+        def pages(count):
+            return max(1, -(-count // per_page))
+
+        comment_total = self.pr_count * self.comments_per_pr
+        return (pages(self.pr_count) + pages(comment_total) * 2
+                + self.pr_count * pages(self.comments_per_pr))
+
+    def expected_count_requests(self, batch_size=100, nested_size=50, page_size=100):
+        """
+        コメント数のみを取得する場合（GraphQLの totalCount）に必要なリクエスト数
+
+        Returns:
+            int: PR一覧のクエリ + レビューが1ページに収まらないPRの続きのクエリ
+        """
+        continuation = max(0, -(-(self.comments_per_pr - nested_size) // page_size))
+        return max(1, -(-self.pr_count // batch_size)) + self.pr_count * continuation
+
+    def _user(self, seed):
+        login = f"user{seed % 50}"
+        return {'login': login, 'id': seed % 50 + 1, 'type': 'User',
+                'url': f"{self.api_url}/users/{login}"}
+
+    def pull_request_state(self, number):
+        """GraphQLのPRの状態（OPEN / CLOSED / MERGED）"""
+        if number % 5 == 0:
+            return 'OPEN'
+        return 'CLOSED' if number % 3 == 0 else 'MERGED'
+
+    def pull_request_numbers(self, states=None):
+        """
+        PR番号の降順（作成順・更新順の降順と同じ）
+
+        Args:
+            states (set): 含める状態（pull_request_state の値、Noneの場合は全件）
+        """
+        if states is None:
+            return range(self.pr_count, 0, -1)
+        return [number for number in range(self.pr_count, 0, -1) if self.pull_request_state(number) in states]
+
+    def participants(self, number, qualifier):
+        """
+        検索の commenter:（Issueコメントの投稿者）・reviewed-by:（レビュー・レビューコメントの投稿者）に一致するユーザー
+        """
+        start = (number - 1) * self.comments_per_pr
+        indexes = range(start, start + self.comments_per_pr)
+        if qualifier == 'commenter':
+            return {self._user(index + 7)['login'] for index in indexes}
+        return {self._user(index + 3)['login'] for index in indexes} | {self._user(index + 1)['login'] for index in indexes}
+
+    def search(self, query):
+        """
+        /search/issues のクエリに一致するPR番号（作成日時の降順）
+
+        repo:・is:・author:・commenter:・reviewed-by:・created:・updated: に対応する。
+        """
+        conditions = []
+        for term in query.split():
+            kind, _, value = term.partition(':')
+            if kind == 'is' and value in ('open', 'closed', 'merged'):
+                states = {'open': {'OPEN'}, 'closed': {'CLOSED', 'MERGED'}, 'merged': {'MERGED'}}[value]
+                conditions.append(lambda number, states=states: self.pull_request_state(number) in states)
+            elif kind == 'author':
+                conditions.append(lambda number, value=value: self._user(number)['login'] == value)
+            elif kind in ('commenter', 'reviewed-by'):
+                conditions.append(lambda number, kind=kind, value=value: value in self.participants(number, kind))
+            elif kind in ('created', 'updated'):
+                low, high = value.split('..')
+                at = self.pr_created_at if kind == 'created' else self.pr_updated_at
+                conditions.append(lambda number, at=at, low=low, high=high: (
+                    (low == '*' or at(number).date().isoformat() >= low)
+                    and (high == '*' or at(number).date().isoformat() <= high)
+                ))
+        return [number for number in range(self.pr_count, 0, -1)
+                if all(condition(number) for condition in conditions)]
+
+    def pull_request(self, number):
+        """/pulls の要素"""
+        state = 'open' if self.pull_request_state(number) == 'OPEN' else 'closed'
+        merged = self.pull_request_state(number) == 'MERGED'
+        return {
+            'url': f"{self.api_url}/repos/{self.full_name}/pulls/{number}",
+            'id': 100000 + number,
+            'node_id': f"PR_{number}",
+            'html_url': f"https://github.com/{self.full_name}/pull/{number}",
+            'number': number,
+            'state': state,
+            'title': f"PR {number}: 機能の追加",
+            'user': self._user(number),
+            'body': f"PR {number} の説明です。\n\n- 変更点1\n- 変更点2",
+            'created_at': _isoformat(self.pr_created_at(number)),
+            'updated_at': _isoformat(self.pr_updated_at(number)),
+            'closed_at': _isoformat(self.pr_updated_at(number)) if state == 'closed' else None,
+            'merged_at': _isoformat(self.pr_updated_at(number)) if merged else None,
+            'draft': False,
+            'head': {'ref': f"feature/{number}", 'sha': f"{number:040x}"},
+            'base': {'ref': 'main', 'sha': f"{0:040x}"},
+        }
+
+    def review_comment(self, index):
+        """/pulls/comments の要素（通し番号 index）"""
+        number, position = divmod(index, self.comments_per_pr)
+        number += 1
+        created_at = _isoformat(self.comment_created_at(index))
+        line = position * 3 + 10
+        return {
+            'url': f"{self.api_url}/repos/{self.full_name}/pulls/comments/{1000000 + index}",
+            'pull_request_review_id': 2000000 + index,
+            'id': 1000000 + index,
+            'node_id': f"PRRC_{index}",
+            'diff_hunk': DIFF_HUNK,
+            'path': f"src/module{number % 20}/file{position}.py",
+            'commit_id': f"{number:040x}",
+            'user': self._user(index + 1),
+            'body': f"レビューコメント {index}: ここは修正が必要です。",
+            'created_at': created_at,
+            'updated_at': created_at,
+            'html_url': f"https://github.com/{self.full_name}/pull/{number}#discussion_r{1000000 + index}",
+            'pull_request_url': f"{self.api_url}/repos/{self.full_name}/pulls/{number}",
+            'author_association': 'MEMBER',
+            'start_line': line - 2 if position % 2 else None,
+            'start_side': 'RIGHT' if position % 2 else None,
+            'line': line,
+            'side': 'RIGHT',
+        }
+
+    def issue_comment(self, index):
+        """/issues/comments の要素（通し番号 index、すべてPRへのコメント）"""
+        number = index // self.comments_per_pr + 1
+        created_at = _isoformat(self.comment_created_at(index))
+        return {
+            'url': f"{self.api_url}/repos/{self.full_name}/issues/comments/{3000000 + index}",
+            'html_url': f"https://github.com/{self.full_name}/pull/{number}#issuecomment-{3000000 + index}",
+            'issue_url': f"{self.api_url}/repos/{self.full_name}/issues/{number}",
+            'id': 3000000 + index,
+            'node_id': f"IC_{index}",
+            'user': self._user(index + 7),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'author_association': 'MEMBER',
+            'body': f"Issueコメント {index}: LGTM",
+        }
+
+    def review(self, number, position):
+        """/pulls/{number}/reviews の要素（本文は1件おき）"""
+        index = (number - 1) * self.comments_per_pr + position
+        return {
+            'id': 2000000 + index,
+            'node_id': f"PRR_{index}",
+            'user': self._user(index + 3),
+            'body': f"レビュー {index}: 全体的に良さそうです。" if position % 2 == 0 else '',
+            'state': 'APPROVED' if position % 2 == 0 else 'COMMENTED',
+            'html_url': f"https://github.com/{self.full_name}/pull/{number}#pullrequestreview-{2000000 + index}",
+            'pull_request_url': f"{self.api_url}/repos/{self.full_name}/pulls/{number}",
+            'submitted_at': _isoformat(self.comment_created_at(index)),
+            'commit_id': f"{number:040x}",
+        }
+
+
+class _Connection:
+    """GraphQLの接続（nodes と pageInfo）を作る"""
+
+    @staticmethod
+    def page(items, offset, size):
+        end = offset + size
+        return {
+            'totalCount': len(items),
+            'pageInfo': {'hasNextPage': end < len(items), 'endCursor': str(end) if end < len(items) else None},
+            'nodes': items[offset:end],
+        }
+
+
+class GraphQLResolver:
+    """クライアントのGraphQLクエリ（PR一覧と接続の続き）に合成データで応答する"""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    def _author(self, user):
+        return {'login': user['login']}
+
+    def _reviews(self, number):
+        reviews = [self.repo.review(number, position) for position in range(self.repo.comments_per_pr)]
+        # 各レビューには同じ通し番号のレビューコメントが1件含まれる
+        return [{
+            'databaseId': review['id'], 'body': review['body'],
+            'submittedAt': review['submitted_at'], 'author': self._author(review['user']),
+            'comments': {'totalCount': 1},
+        } for review in reviews]
+
+    def _threads(self, number, comment_page_size):
+        threads = []
+        for position in range(self.repo.comments_per_pr):
+            comment = self.repo.review_comment((number - 1) * self.repo.comments_per_pr + position)
+            # 1スレッド1コメントとする
+            threads.append({
+                'id': f"PRRT_{comment['id']}",
+                'path': comment['path'],
+                'diffSide': comment['side'],
+                'startDiffSide': comment['start_side'],
+                'comments': _Connection.page([{
+                    'databaseId': comment['id'], 'body': comment['body'],
+                    'createdAt': comment['created_at'], 'updatedAt': comment['updated_at'],
+                    'author': self._author(comment['user']),
+                    'line': comment['line'], 'startLine': comment['start_line'],
+                }], 0, comment_page_size),
+            })
+        return threads
+
+    def _comments(self, number):
+        start = (number - 1) * self.repo.comments_per_pr
+        comments = [self.repo.issue_comment(start + position) for position in range(self.repo.comments_per_pr)]
+        return [{
+            'databaseId': comment['id'], 'body': comment['body'],
+            'createdAt': comment['created_at'], 'updatedAt': comment['updated_at'],
+            'author': self._author(comment['user'])
+        } for comment in comments]
+
+    def _pull_request(self, number, nested_size, comment_page_size):
+        pr = self.repo.pull_request(number)
+        return {
+            'id': pr['node_id'], 'number': number, 'title': pr['title'],
+            'state': self.repo.pull_request_state(number),
+            'createdAt': pr['created_at'], 'mergedAt': pr['merged_at'], 'updatedAt': pr['updated_at'],
+            'author': self._author(pr['user']),
+            'reviews': _Connection.page(self._reviews(number), 0, nested_size),
+            'reviewThreads': _Connection.page(self._threads(number, comment_page_size), 0, nested_size),
+            'comments': _Connection.page(self._comments(number), 0, nested_size),
+        }
+
+    def _pull_request_counts(self, number, nested_size):
+        """コメント数のみを取得するクエリのPRノード"""
+        reviews = [{'body': review['body'], 'comments': review['comments']} for review in self._reviews(number)]
+        pr = self.repo.pull_request(number)
+        return {
+            'id': pr['node_id'], 'number': number, 'title': pr['title'],
+            'state': self.repo.pull_request_state(number),
+            'createdAt': pr['created_at'], 'mergedAt': pr['merged_at'], 'updatedAt': pr['updated_at'],
+            'author': self._author(pr['user']),
+            'comments': {'totalCount': self.repo.comments_per_pr},
+            'reviews': _Connection.page(reviews, 0, nested_size),
+        }
+
+    def resolve(self, query, variables):
+        """
+        クエリに応答する
+
+        Returns:
+            dict: レスポンス（data または errors）
+        """
+        continuation = re.search(r'on (\w+) \{\s*(\w+)\(first: (\d+)', query)
+        if 'node(id:' in query and continuation:
+            type_name, connection, size = continuation.group(1), continuation.group(2), int(continuation.group(3))
+            node_id = variables['id']
+            offset = int(variables.get('cursor') or 0)
+            if type_name == 'PullRequest':
+                number = int(node_id.split('_')[1])
+                items = {
+                    'reviews': lambda: self._reviews(number),
+                    'reviewThreads': lambda: self._threads(number, size),
+                    'comments': lambda: self._comments(number),
+                }[connection]()
+            else:
+                items = []  # スレッドのコメントは最初のページで全件返している
+            return {'data': {'node': {connection: _Connection.page(items, offset, size)}}}
+
+        page_size = int(re.search(r'pullRequests\(first: (\d+)', query).group(1))
+        nested_size = int(re.search(r'reviews\(first: (\d+)', query).group(1))
+        offset = int(variables.get('cursor') or 0)
+        # 作成順・更新順ともにPR番号の順になる（DESC は番号の降順）
+        states = variables.get('states')
+        all_numbers = self.repo.pull_request_numbers(set(states) if states else None)
+        if variables.get('direction') == 'ASC':
+            all_numbers = all_numbers[::-1]
+        numbers = all_numbers[offset:offset + page_size]
+        end = offset + len(numbers)
+        if 'reviewThreads' not in query:
+            # コメント数のみを取得するクエリ（Issueコメントは totalCount のみ）
+            nodes = [self._pull_request_counts(number, nested_size) for number in numbers]
+        else:
+            comment_page_size = int(re.search(r'comments\(first: (\d+)', query).group(1))
+            nodes = [self._pull_request(number, nested_size, comment_page_size) for number in numbers]
+        return {'data': {'repository': {'pullRequests': {
+            'pageInfo': {'hasNextPage': end < len(all_numbers), 'endCursor': str(end)},
+            'nodes': nodes,
+        }}}}
+
+
+class FakeGitHubServer(ThreadingHTTPServer):
+    """合成リポジトリを返すHTTPサーバー（リクエスト数・転送量を記録する）"""
+
+    daemon_threads = True
+
+    def __init__(self, repo, port=0, latency=0.0, rate_limit=1000000, rate_limit_window=3600, repo_count=1):
+        """
+        Args:
+            repo (SyntheticRepo): 合成リポジトリ
+            port (int): 待ち受けるポート（0の場合は空いているポート）
+            latency (float): 1リクエストごとの応答遅延（秒）
+            rate_limit (int): レート制限の上限（ウィンドウあたりのリクエスト数）
+            rate_limit_window (int): レート制限がリセットされるまでの秒数
+            repo_count (int): 同じ内容で返すリポジトリ数（2つ目以降は repo2, repo3, ...）
+        """
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.repo = repo
+        self.repo_names = [repo.name] + [f"{repo.name}{index}" for index in range(2, repo_count + 1)]
+        repo.api_url = f"http://127.0.0.1:{self.server_port}"
+        self.graphql = GraphQLResolver(repo)
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def api_url(self):
+        return self.repo.api_url
+
+    def expected_rest_requests(self):
+        """REST APIで全リポジトリを全件取得する場合に必要なリクエスト数（組織のリポジトリ一覧を含む）"""
+        org_pages = -(-len(self.repo_names) // MAX_PER_PAGE) if len(self.repo_names) > 1 else 0
+        return self.repo.expected_rest_requests() * len(self.repo_names) + org_pages
+
+    def reset_stats(self):
+        """リクエスト数・転送量・レート制限をリセットする"""
+        with self._lock:
+            self.requests = 0
+            self.rate_limited = 0
+            self.not_modified = 0
+            self.bytes_sent = 0
+            self.by_endpoint = {}
+            # レート制限のリソース → [上限, ウィンドウの秒数, 残り, リセット時刻]
+            now = int(time.time())
+            self.buckets = {
+                resource: [limit, window, limit, now + window]
+                for resource, (limit, window) in self.rate_limit_resources().items()
+            }
+
+    def stats(self):
+        """記録したリクエスト数・転送量"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'rate_limited': self.rate_limited,
+                'bytes_sent': self.bytes_sent,
+                'by_endpoint': dict(self.by_endpoint),
+            }
+
+    def rate_limit_resources(self):
+        """レート制限のリソースごとの (上限, ウィンドウの秒数)（検索APIはGitHubと同じく1分あたり30件）"""
+        return {
+            'core': (self.rate_limit, self.rate_limit_window),
+            'search': (SEARCH_RATE_LIMIT, 60),
+            'graphql': (self.rate_limit, self.rate_limit_window),
+        }
+
+    def consume(self, endpoint, not_modified=False):
+        """
+        リクエストを記録してエンドポイントのリソースのレート制限を1つ消費する（304は消費しない）
+
+        Returns:
+            tuple: (リソース, 上限, 残り, リセット時刻, 制限を超えたかどうか)
+        """
+        resource = endpoint if endpoint in ('search', 'graphql') else 'core'
+        with self._lock:
+            bucket = self.buckets[resource]
+            limit, window = bucket[0], bucket[1]
+            now = time.time()
+            if now >= bucket[3]:
+                bucket[2] = limit
+                bucket[3] = int(now) + window
+            self.requests += 1
+            self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+            if not_modified:
+                self.not_modified += 1
+                return resource, limit, bucket[2], bucket[3], False
+            if bucket[2] <= 0:
+                self.rate_limited += 1
+                return resource, limit, 0, bucket[3], True
+            bucket[2] -= 1
+            return resource, limit, bucket[2], bucket[3], False
+
+    def add_bytes(self, size):
+        with self._lock:
+            self.bytes_sent += size
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None, endpoint=''):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        not_modified = status == 200 and self.headers.get('If-None-Match') == etag
+        resource, limit, remaining, reset_at, limited = self.server.consume(endpoint, not_modified)
+        if limited:
+            status, not_modified = 403, False
+            body = json.dumps({'message': 'API rate limit exceeded'}).encode('utf-8')
+            headers = {}
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.send_response(304 if not_modified else status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('X-RateLimit-Limit', str(limit))
+        self.send_header('X-RateLimit-Remaining', str(remaining))
+        self.send_header('X-RateLimit-Reset', str(reset_at))
+        self.send_header('X-RateLimit-Resource', resource)
+        self.send_header('ETag', etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if not_modified:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.add_bytes(len(body))
+
+    def _paginate(self, path, query, total, item_at, first_index=0, endpoint='', envelope=None):
+        """
+        通し番号 first_index 以降の total 件をページングして返す
+
+        envelope を指定した場合は、ページの要素と件数から作った値（検索結果の形式など）を返す。
+        """
+        per_page = min(int(query.get('per_page', DEFAULT_PER_PAGE)), MAX_PER_PAGE)
+        page = max(1, int(query.get('page', 1)))
+        count = max(0, total - first_index)
+        start = first_index + (page - 1) * per_page
+        items = [item_at(index) for index in range(start, min(start + per_page, total))]
+
+        headers = {}
+        last_page = max(1, (count + per_page - 1) // per_page)
+        if page < last_page:
+            base = f"{self.server.api_url}{path}"
+            links = [
+                f'<{base}?{urllib.parse.urlencode(dict(query, page=page + 1))}>; rel="next"',
+                f'<{base}?{urllib.parse.urlencode(dict(query, page=last_page))}>; rel="last"',
+            ]
+            headers['Link'] = ', '.join(links)
+        self._send_json(200, envelope(items, count) if envelope else items, headers, endpoint)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        repo = self.server.repo
+        path = url.path
+
+        if path == f"/orgs/{repo.owner}/repos":
+            names = self.server.repo_names
+            self._paginate(path, query, len(names), lambda index: {
+                'name': names[index], 'full_name': f"{repo.owner}/{names[index]}", 'archived': False,
+            }, endpoint='orgs/repos')
+            return
+        if path == '/search/issues':
+            self._search(path, query)
+            return
+        match = re.match(r'/repos/([^/]+)/([^/]+)', path)
+        if not match or match.group(1) != repo.owner or match.group(2) not in self.server.repo_names:
+            self._send_json(404, {'message': 'Not Found'}, endpoint='other')
+            return
+        resource = path[match.end():]
+        comment_total = repo.pr_count * repo.comments_per_pr
+        first_comment = repo.first_comment_since(_parse_time(query['since'])) if 'since' in query else 0
+
+        if resource == '/pulls':
+            # 作成順・更新順ともにPR番号順（desc は番号の降順）
+            states = {'open': {'OPEN'}, 'closed': {'CLOSED', 'MERGED'}}.get(query.get('state', 'all'))
+            numbers = repo.pull_request_numbers(states)
+            if query.get('direction', 'desc') != 'desc':
+                numbers = numbers[::-1]
+            self._paginate(path, query, len(numbers), lambda index: repo.pull_request(numbers[index]),
+                           endpoint='pulls')
+        elif resource == '/pulls/comments':
+            self._paginate(path, query, comment_total, repo.review_comment, first_comment, 'pulls/comments')
+        elif resource == '/issues/comments':
+            self._paginate(path, query, comment_total, repo.issue_comment, first_comment, 'issues/comments')
+        elif re.fullmatch(r'/pulls/\d+/reviews', resource):
+            number = int(resource.split('/')[2])
+            if not 1 <= number <= repo.pr_count:
+                self._send_json(404, {'message': 'Not Found'}, endpoint='pulls/reviews')
+                return
+            self._paginate(path, query, repo.comments_per_pr,
+                           lambda position: repo.review(number, position), endpoint='pulls/reviews')
+        elif re.fullmatch(r'/(pulls|issues)/\d+/comments', resource):
+            # PR単位のレビューコメント・Issueコメント（イベント駆動の差分更新で使う）
+            kind, number = resource.split('/')[1], int(resource.split('/')[2])
+            if not 1 <= number <= repo.pr_count:
+                self._send_json(404, {'message': 'Not Found'}, endpoint=f"{kind}/{{number}}/comments")
+                return
+            item = repo.review_comment if kind == 'pulls' else repo.issue_comment
+            start = (number - 1) * repo.comments_per_pr
+            self._paginate(path, query, repo.comments_per_pr, lambda position: item(start + position),
+                           endpoint=f"{kind}/{{number}}/comments")
+        elif re.fullmatch(r'/pulls/\d+', resource):
+            self._send_json(200, repo.pull_request(int(resource.split('/')[2])), endpoint='pulls/{number}')
+        else:
+            self._send_json(404, {'message': 'Not Found'}, endpoint='other')
+
+    def _search(self, path, query):
+        """/search/issues（対象のリポジトリのPRのみ）"""
+        repo = self.server.repo
+        terms = query.get('q', '').split()
+        if 'is:pr' not in terms or not any(term.startswith(f"repo:{repo.owner}/") for term in terms):
+            self._send_json(422, {'message': 'Validation Failed'}, endpoint='search')
+            return
+        numbers = repo.search(query['q'])
+
+        def item_at(index):
+            pr = repo.pull_request(numbers[index])
+            return {
+                'number': pr['number'], 'title': pr['title'], 'state': pr['state'], 'user': pr['user'],
+                'created_at': pr['created_at'], 'updated_at': pr['updated_at'], 'closed_at': pr['closed_at'],
+                'html_url': pr['html_url'],
+                'pull_request': {'url': pr['url'], 'merged_at': pr['merged_at']},
+            }
+
+        # 検索APIは1000件までしか返さない
+        self._paginate(path, query, min(len(numbers), 1000), item_at, endpoint='search', envelope=lambda items, _: {
+            'total_count': len(numbers), 'incomplete_results': False, 'items': items,
+        })
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urllib.parse.urlparse(self.path).path != '/graphql':
+            self._send_json(404, {'message': 'Not Found'}, endpoint='other')
+            return
+        request = json.loads(body)
+        self._send_json(200, self.server.graphql.resolve(request['query'], request.get('variables') or {}),
+                        endpoint='graphql')
+
+
+def start_server(repo, port=0, latency=0.0, rate_limit=1000000, rate_limit_window=3600, repo_count=1):
+    """
+    バックグラウンドのスレッドでサーバーを起動する
+
+    Returns:
+        FakeGitHubServer: 起動したサーバー（終了時は shutdown() を呼ぶ）
+    """
+    server = FakeGitHubServer(repo, port, latency, rate_limit, rate_limit_window, repo_count)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='ベンチマーク用のGitHub APIの代替サーバー')
+    parser.add_argument('--prs', type=int, default=1000, help='PR数')
+    parser.add_argument('--comments-per-pr', type=int, default=3,
+                        help='PRごとのレビューコメント・レビュー・Issueコメントの件数（それぞれ）')
+    parser.add_argument('--port', type=int, default=8000, help='待ち受けるポート')
+    parser.add_argument('--latency-ms', type=float, default=0, help='1リクエストごとの応答遅延（ミリ秒）')
+    parser.add_argument('--rate-limit', type=int, default=1000000, help='レート制限の上限')
+    parser.add_argument('--rate-limit-window', type=int, default=3600, help='レート制限のリセットまでの秒数')
+    parser.add_argument('--repos', type=int, default=1, help='同じ内容で返すリポジトリ数')
+    args = parser.parse_args()
+
+    repo = SyntheticRepo(args.prs, args.comments_per_pr)
+    server = FakeGitHubServer(repo, args.port, args.latency_ms / 1000, args.rate_limit, args.rate_limit_window,
+                              args.repos)
+    print(f"GITHUB_API_URL={server.api_url} GITHUB_REPOSITORY={repo.full_name}")
+    if args.repos > 1:
+        print(f"PR_COMMENTS_ORG={repo.owner}（リポジトリ数: {args.repos}件）")
+    print(f"PR数: {repo.pr_count}件 / 出力されるコメント数: {repo.expected_rows()}件")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
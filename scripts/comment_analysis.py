@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+コメント本文の分析（頻出語・長さの分布・定型句・レビューの集中するファイル）
+
+コメント行を ANALYSIS_BATCH_SIZE 件ずつまとめ、バッチ単位でプロセスプールのワーカーに渡して分析する。
+ワーカーはバッチの本文を1つの文字列に連結し、正規表現をバッチ全体に1回ずつ適用して語と定型句を取り出す。
+ワーカーの結果（件数の辞書）は書き込み側で合算するため、分析する行をすべてメモリに保持しない。
+"""
+
+import bisect
+import multiprocessing
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# ワーカーに渡す1バッチの行数
+ANALYSIS_BATCH_SIZE = 5000
+
+# コメントの長さ（文字数）の分布の区切り
+LENGTH_BUCKETS = [0, 20, 50, 100, 200, 500, 1000, 2000]
+
+# 検出する定型句（名前 → 小文字にした本文に適用する正規表現）
+# 先頭を固定の文字列にすると検索が速いため、語の先頭の境界（\b）は書かずに一致した位置の直前の文字で判定する
+PHRASES = {
+    'nit': r'nit(?:pick)?s?\b',
+    'lgtm': r'lgtm\b',
+    'suggestion': r'```suggestion',
+    'typo': r'typo\b|誤字|タイポ',
+    'question': r'[?？]',
+    'thanks': r'thanks?\b|thank you\b|ありがとう',
+    'plus_one': r'\+1\b|👍',
+}
+
+# 頻出語から除く英単語
+STOP_WORDS = frozenset('''
+a an and are as at be but by can do does for from has have i if in is it its me my no not of on or so
+that the this to was we were what when which will with would you your should could there here then than
+just also been into only out up all any more some other like it's i'm don't
+'''.split())
+
+# 頻出語・ファイル・ディレクトリの上位の件数
+TOP_TOKENS = 100
+TOP_HOTSPOTS = 20
+
+# 分析結果の出力ファイル
+ANALYSIS_FILE = 'comment_analysis.json'
+
+# バッチ内のコメントの区切り（本文に含まれない文字、コードブロックの検出がコメントをまたがないようにする）
+_SEPARATOR = '\x00'
+
+# 英単語（2文字以上）・カタカナ語・漢字語（2文字以上）
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9_'-]*[a-z0-9]|[ァ-ヺー]{2,}|[一-鿿]{2,}")
+_CODE_BLOCK_PATTERN = re.compile(r'```[^\x00]*?```|`[^`\x00\n]+`')
+_URL_PATTERN = re.compile(r'https?://\S+')
+_PHRASE_PATTERNS = {name: re.compile(pattern) for name, pattern in PHRASES.items()}
+
+
+def _is_word_char(char):
+    """英数字またはアンダースコアかどうか"""
+    return char == '_' or (char.isascii() and char.isalnum())
+
+
+def get_analysis_workers():
+    """分析に使うプロセス数（PR_COMMENTS_ANALYSIS_WORKERS 環境変数、省略時はCPU数）"""
+    return max(1, int(os.environ.get('PR_COMMENTS_ANALYSIS_WORKERS') or os.cpu_count() or 1))
+
+
+def analyze_batch(batch):
+    """
+    コメントのバッチを分析する（ワーカープロセスで実行する）
+
+    Args:
+        batch (list): (本文, コメントタイプ, ファイルパス, PRのキー, 投稿者) のリスト
+
+    Returns:
+        dict: バッチの集計結果（merge_results で合算する）
+    """
+    # 小文字にした本文を1つの文字列に連結し、各パターンをバッチ全体に1回ずつ適用する
+    lowered = [(body or '').lower() for body, _, _, _, _ in batch]
+    text = _SEPARATOR.join(lowered)
+
+    # 定型句はコメントごとに1回だけ数える（一致した位置から何件目のコメントかを求める）
+    offsets = []
+    position = 0
+    for body in lowered:
+        offsets.append(position)
+        position += len(body) + 1
+    phrases = Counter()
+    for name, pattern in _PHRASE_PATTERNS.items():
+        hits = set()
+        for match in pattern.finditer(text):
+            start = match.start()
+            # 英数字で始まる定型句は、語の途中（直前が英数字）に現れたものを数えない
+            if start and text[start].isascii() and text[start].isalnum() and _is_word_char(text[start - 1]):
+                continue
+            hits.add(bisect.bisect_right(offsets, start) - 1)
+        if hits:
+            phrases[name] = len(hits)
+
+    # 語はコードとURLを除いた本文から取り出す
+    prose = _URL_PATTERN.sub(' ', _CODE_BLOCK_PATTERN.sub(' ', text))
+    tokens = Counter(_TOKEN_PATTERN.findall(prose))
+    for word in STOP_WORDS.intersection(tokens):
+        del tokens[word]
+
+    lengths = Counter(len(body or '') for body, _, _, _, _ in batch)
+    type_lengths = {}
+    files = {}
+    for body, comment_type, path, pr_key, user in batch:
+        entry = type_lengths.setdefault(comment_type, [0, 0])
+        entry[0] += 1
+        entry[1] += len(body or '')
+        if path:
+            file_entry = files.setdefault(path, [0, set(), set()])
+            file_entry[0] += 1
+            file_entry[1].add(pr_key)
+            if user:
+                file_entry[2].add(user)
+
+    return {
+        'comments': len(batch),
+        'tokens': tokens,
+        'lengths': lengths,
+        'type_lengths': type_lengths,
+        'phrases': phrases,
+        'files': files,
+    }
+
+
+def merge_results(total, result):
+    """バッチの集計結果を合算する（total を更新する）"""
+    total['comments'] += result['comments']
+    total['tokens'].update(result['tokens'])
+    total['lengths'].update(result['lengths'])
+    total['phrases'].update(result['phrases'])
+    for comment_type, (count, characters) in result['type_lengths'].items():
+        entry = total['type_lengths'].setdefault(comment_type, [0, 0])
+        entry[0] += count
+        entry[1] += characters
+    for path, (count, pr_keys, users) in result['files'].items():
+        entry = total['files'].setdefault(path, [0, set(), set()])
+        entry[0] += count
+        entry[1] |= pr_keys
+        entry[2] |= users
+
+
+def _percentile(lengths, total, ratio):
+    """長さごとの件数から百分位の長さを求める"""
+    if not total:
+        return 0
+    target = ratio * total
+    seen = 0
+    for length in sorted(lengths):
+        seen += lengths[length]
+        if seen >= target:
+            return length
+    return 0
+
+
+def _length_histogram(lengths):
+    """長さの分布を LENGTH_BUCKETS の区切りで数える"""
+    histogram = [0] * len(LENGTH_BUCKETS)
+    for length, count in lengths.items():
+        histogram[bisect.bisect_right(LENGTH_BUCKETS, length) - 1] += count
+    labels = [
+        f"{start}-{end - 1}" for start, end in zip(LENGTH_BUCKETS, LENGTH_BUCKETS[1:])
+    ] + [f"{LENGTH_BUCKETS[-1]}+"]
+    return [{'range': label, 'comments': count} for label, count in zip(labels, histogram)]
+
+
+def _hotspots(files):
+    """ファイル・ディレクトリごとのレビューコメント数の上位"""
+    directories = {}
+    for path, (count, pr_keys, users) in files.items():
+        directory = path.rsplit('/', 1)[0] if '/' in path else '.'
+        entry = directories.setdefault(directory, [0, set(), set()])
+        entry[0] += count
+        entry[1] |= pr_keys
+        entry[2] |= users
+
+    def top(entries, key_name):
+        ranked = sorted(entries.items(), key=lambda x: (-x[1][0], x[0]))[:TOP_HOTSPOTS]
+        return [
+            {key_name: key, 'comments': count, 'prs': len(pr_keys), 'users': len(users)}
+            for key, (count, pr_keys, users) in ranked
+        ]
+
+    return {'files': top(files, 'path'), 'directories': top(directories, 'directory')}
+
+
+def build_report(total):
+    """
+    合算した集計結果から分析結果を作成する
+
+    Returns:
+        dict: 分析結果（comment_analysis.json の形式）
+    """
+    comments = total['comments']
+    lengths = total['lengths']
+    characters = sum(length * count for length, count in lengths.items())
+    return {
+        'total_comments': comments,
+        'length': {
+            'mean': round(characters / comments, 1) if comments else 0,
+            'median': _percentile(lengths, comments, 0.5),
+            'p90': _percentile(lengths, comments, 0.9),
+            'p99': _percentile(lengths, comments, 0.99),
+            'max': max(lengths, default=0),
+            'histogram': _length_histogram(lengths),
+        },
+        'length_by_type': {
+            comment_type: {'comments': count, 'mean': round(chars / count, 1) if count else 0}
+            for comment_type, (count, chars) in sorted(total['type_lengths'].items())
+        },
+        'phrases': {
+            name: {
+                'comments': total['phrases'].get(name, 0),
+                'ratio': round(total['phrases'].get(name, 0) / comments, 4) if comments else 0,
+            }
+            for name in PHRASES
+        },
+        'top_tokens': [
+            {'token': token, 'count': count}
+            for token, count in sorted(total['tokens'].items(), key=lambda x: (-x[1], x[0]))[:TOP_TOKENS]
+        ],
+        'hotspots': _hotspots(total['files']),
+        'generated_at': datetime.now().isoformat(),
+    }
+
+
+def _empty_result():
+    return {
+        'comments': 0, 'tokens': Counter(), 'lengths': Counter(), 'type_lengths': {},
+        'phrases': Counter(), 'files': {},
+    }
+
+
+class CommentAnalyzer:
+    """
+    コメント行を受け取りながらバッチ単位で分析する
+
+    ワーカーに渡して結果を待っているバッチはワーカー数の2倍までとし、
+    それを超える場合は最も古いバッチの結果を合算してから次のバッチを渡す。
+    1バッチに満たない件数しかない場合は、プロセスを起動せずにこのプロセスで分析する。
+    """
+
+    def __init__(self, workers=None, batch_size=ANALYSIS_BATCH_SIZE):
+        self.workers = workers or get_analysis_workers()
+        self.batch_size = batch_size
+        self.total = _empty_result()
+        self.batch = []
+        self.pending = []
+        self.executor = None
+
+    def add(self, row):
+        """コメント行を分析に加える"""
+        # ワーカーには分析に使う値だけを渡す（複数リポジトリではファイルとPRをリポジトリ名と組にする）
+        repo = row.get('repo')
+        path = row.get('comment_path')
+        if repo and path:
+            path = f"{repo}:{path}"
+        self.batch.append((
+            row.get('comment_body'), row.get('comment_type'), path,
+            (repo, row.get('pr_number')), row.get('comment_user'),
+        ))
+        if len(self.batch) >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        batch, self.batch = self.batch, []
+        if self.workers == 1:
+            merge_results(self.total, analyze_batch(batch))
+            return
+        if self.executor is None:
+            # クロール中のスレッドを複製しないように、ワーカーは spawn で起動する
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        self.pending.append(self.executor.submit(analyze_batch, batch))
+        if len(self.pending) >= self.workers * 2:
+            merge_results(self.total, self.pending.pop(0).result())
+
+    def report(self):
+        """
+        残りのバッチを分析し、分析結果を返す
+
+        Returns:
+            dict: 分析結果（build_report の形式）
+        """
+        if self.batch:
+            if self.executor is None:
+                merge_results(self.total, analyze_batch(self.batch))
+                self.batch = []
+            else:
+                self._submit()
+        for future in self.pending:
+            merge_results(self.total, future.result())
+        self.pending = []
+        self.close()
+        return build_report(self.total)
+
+    def close(self):
+        """ワーカーを終了する"""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+def print_report(report):
+    """分析結果の概要を表示する"""
+    length = report['length']
+    print(f"分析したコメント数: {report['total_comments']}件")
+    print(f"コメントの長さ: 平均 {length['mean']}文字、中央値 {length['median']}文字、"
+          f"90パーセンタイル {length['p90']}文字、最大 {length['max']}文字")
+    print("定型句を含むコメント:")
+    for name, entry in report['phrases'].items():
+        print(f"  - {name}: {entry['comments']}件（{round(entry['ratio'] * 100, 1)}%）")
+    print("頻出語（上位10件）:")
+    for entry in report['top_tokens'][:10]:
+        print(f"  - {entry['token']}: {entry['count']}回")
+    print("レビューコメントの多いファイル（上位10件）:")
+    for entry in report['hotspots']['files'][:10]:
+        print(f"  - {entry['path']}: {entry['comments']}件（PR {entry['prs']}件、{entry['users']}人）")
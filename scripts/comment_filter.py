@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+エクスポートするPR・コメントの絞り込み条件
+
+PR_COMMENTS_FILTER にGitHubの検索と同じ形式の条件（空白区切り）を指定する。
+
+    created:2024-01-01..2024-03-31   PRの作成日（YYYY-MM-DD、>=・>・<=・< と * も使える）
+    updated:>=2024-06-01             PRの更新日
+    state:merged                     PRの状態（open / closed / merged、closed はマージ済みを含む）
+    author:alice                     PRの作成者
+    commenter:bob                    コメントの投稿者（そのユーザーがコメントしたPRのみ）
+    number:100..200                  PR番号
+    type:review_comment              コメントタイプ（review_comment / review / issue_comment）
+
+同じ種類の条件を複数指定した場合、state・author・commenter・type はいずれかに一致するもの、
+created・updated・number はすべての範囲に含まれるものとする。
+
+取得側はこの条件をできるだけAPIに渡し（state=、sort= と打ち切り、since=、検索の条件）、
+渡せない条件はPRごとのリクエストを送る前にPRレコードに適用する。
+"""
+
+import os
+from datetime import date, timedelta
+
+# 指定できるPRの状態
+FILTER_STATES = ['open', 'closed', 'merged']
+
+# 指定できるコメントタイプ（pr_comment_fetcher.COMMENT_TYPE_ORDER と同じ、取得側がこのモジュールを参照するため再掲する）
+FILTER_TYPES = ['review_comment', 'review', 'issue_comment']
+
+# 範囲で指定する条件と、値の変換・前後の値
+_RANGE_KINDS = {
+    'created': (date.fromisoformat, lambda value, step: value + timedelta(days=step)),
+    'updated': (date.fromisoformat, lambda value, step: value + timedelta(days=step)),
+    'number': (int, lambda value, step: value + step),
+}
+
+# 値を列挙する条件
+_VALUE_KINDS = ['state', 'author', 'commenter', 'type']
+
+# GraphQLの pullRequests(states:) に渡す値
+_GRAPHQL_STATES = {
+    'open': ['OPEN'],
+    'closed': ['CLOSED', 'MERGED'],
+    'merged': ['MERGED'],
+}
+
+
+def _parse_range(kind, value):
+    """
+    範囲の条件（A..B・>=A・>A・<=B・<B・A）を両端を含む (下限, 上限) にする
+
+    Returns:
+        tuple: (下限, 上限)（指定のない側はNone）
+    """
+    convert, step = _RANGE_KINDS[kind]
+    try:
+        if '..' in value:
+            low, high = value.split('..', 1)
+            return (None if low in ('', '*') else convert(low), None if high in ('', '*') else convert(high))
+        for operator, bounds in (
+            ('>=', lambda v: (v, None)),
+            ('<=', lambda v: (None, v)),
+            ('>', lambda v: (step(v, 1), None)),
+            ('<', lambda v: (None, step(v, -1))),
+        ):
+            if value.startswith(operator):
+                return bounds(convert(value[len(operator):]))
+        exact = convert(value)
+        return exact, exact
+    except ValueError:
+        raise ValueError(f"PR_COMMENTS_FILTER の {kind}: の値が正しくありません: {value}") from None
+
+
+def _narrow(current, bounds):
+    """範囲を別の範囲との共通部分に狭める"""
+    low = max((value for value in (current[0], bounds[0]) if value is not None), default=None)
+    high = min((value for value in (current[1], bounds[1]) if value is not None), default=None)
+    return low, high
+
+
+def _in_range(value, bounds):
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _search_range(bounds):
+    """範囲を検索の条件の値（A..B、指定のない側は *）にする"""
+    low, high = bounds
+    if low is None and high is None:
+        return None
+    return f"{'*' if low is None else low}..{'*' if high is None else high}"
+
+
+class CommentFilter:
+    """PR・コメントの絞り込み条件（条件のない項目は絞り込まない）"""
+
+    def __init__(self, created=(None, None), updated=(None, None), numbers=(None, None),
+                 states=(), authors=(), commenters=(), comment_types=()):
+        """
+        Args:
+            created (tuple): PRの作成日の (下限, 上限)（date、両端を含む）
+            updated (tuple): PRの更新日の (下限, 上限)（date、両端を含む）
+            numbers (tuple): PR番号の (下限, 上限)（両端を含む）
+            states (iterable): PRの状態（FILTER_STATES）
+            authors (iterable): PRの作成者のログイン名
+            commenters (iterable): コメントの投稿者のログイン名
+            comment_types (iterable): コメントタイプ（FILTER_TYPES）
+        """
+        self.created = tuple(created)
+        self.updated = tuple(updated)
+        self.numbers = tuple(numbers)
+        self.states = frozenset(states)
+        # ログイン名は大文字と小文字を区別しない
+        self.authors = frozenset(author.lower() for author in authors)
+        self.commenters = frozenset(commenter.lower() for commenter in commenters)
+        self.comment_types = frozenset(comment_types)
+
+    @classmethod
+    def parse(cls, text):
+        """
+        条件の文字列（PR_COMMENTS_FILTER の形式）を読み込む
+
+        Args:
+            text (str): 空白区切りの条件（例: "state:merged created:>=2024-01-01"）
+
+        Returns:
+            CommentFilter: 絞り込み条件
+
+        Raises:
+            ValueError: 不明な条件・正しくない値が含まれる場合
+        """
+        ranges = {kind: (None, None) for kind in _RANGE_KINDS}
+        values = {kind: set() for kind in _VALUE_KINDS}
+        for term in (text or '').split():
+            kind, separator, value = term.partition(':')
+            kind = kind.lower()
+            if not separator or not value or (kind not in ranges and kind not in values):
+                raise ValueError(
+                    f"PR_COMMENTS_FILTER に不明な条件があります: {term}"
+                    f"（指定可能: {', '.join(list(_RANGE_KINDS) + _VALUE_KINDS)}）"
+                )
+            if kind in ranges:
+                ranges[kind] = _narrow(ranges[kind], _parse_range(kind, value))
+            else:
+                values[kind].add(value.lower() if kind in ('state', 'type') else value)
+
+        unknown_states = values['state'] - set(FILTER_STATES)
+        if unknown_states:
+            raise ValueError(f"state: は {' / '.join(FILTER_STATES)} のいずれかを指定してください: "
+                             f"{', '.join(sorted(unknown_states))}")
+        unknown_types = values['type'] - set(FILTER_TYPES)
+        if unknown_types:
+            raise ValueError(f"type: は {' / '.join(FILTER_TYPES)} のいずれかを指定してください: "
+                             f"{', '.join(sorted(unknown_types))}")
+        return cls(ranges['created'], ranges['updated'], ranges['number'],
+                   values['state'], values['author'], values['commenter'], values['type'])
+
+    def __bool__(self):
+        return self.has_pull_request_conditions() or bool(self.commenters or self.comment_types)
+
+    def has_pull_request_conditions(self):
+        """PRを絞り込む条件があるかどうか（commenter はコメントした PR に絞り込む）"""
+        return bool(
+            any(self.created) or any(self.updated) or any(value is not None for value in self.numbers)
+            or self.states or self.authors or self.commenters
+        )
+
+    def describe(self):
+        """条件を表示用の文字列にする"""
+        terms = []
+        for kind, bounds in (('created', self.created), ('updated', self.updated), ('number', self.numbers)):
+            value = _search_range(bounds)
+            if value:
+                terms.append(f"{kind}:{value}")
+        for kind, values in (('state', self.states), ('author', self.authors),
+                             ('commenter', self.commenters), ('type', self.comment_types)):
+            terms.extend(f"{kind}:{value}" for value in sorted(values))
+        return ' '.join(terms)
+
+    def includes_type(self, comment_type):
+        """コメントタイプを取得する必要があるかどうか"""
+        return not self.comment_types or comment_type in self.comment_types
+
+    def matches_pull_request(self, pr_record):
+        """
+        PRレコードが条件に一致するかどうか（commenter はコメントの取得前には判定できないため含まない）
+
+        Args:
+            pr_record (PullRequestRecord): PRレコード
+
+        Returns:
+            bool: 一致する場合はTrue
+        """
+        if not _in_range(pr_record.pr_number, self.numbers):
+            return False
+        if any(self.created) and not _in_range(date.fromisoformat(pr_record.pr_created_at[:10]), self.created):
+            return False
+        if any(self.updated) and not _in_range(date.fromisoformat(pr_record.pr_updated_at[:10]), self.updated):
+            return False
+        if self.states and not any(
+            pr_record.pr_state == 'open' if state == 'open'
+            else pr_record.pr_state == 'closed' if state == 'closed'
+            else bool(pr_record.pr_merged_at)
+            for state in self.states
+        ):
+            return False
+        return not self.authors or pr_record.pr_author.lower() in self.authors
+
+    def matches_comment(self, record):
+        """コメントレコード（またはコメント行）が条件に一致するかどうか"""
+        if not self.includes_type(record['comment_type']):
+            return False
+        return not self.commenters or (record['comment_user'] or '').lower() in self.commenters
+
+    def pull_request_order(self, updated_since=None):
+        """
+        PR一覧を取得する順序（打ち切りに使える条件の側から取得する）
+
+        下限のある条件があればその日時の降順、上限のみの条件があればその日時の昇順にする。
+        PR番号は作成順に振られるため、PR番号の範囲は作成日時の順で打ち切る。
+
+        Args:
+            updated_since (str): 差分の同期でこの日時以降に更新されたPRのみ取得する場合
+
+        Returns:
+            tuple: (並び順 'updated' / 'created', 方向 'desc' / 'asc')
+        """
+        if updated_since or self.updated[0]:
+            return 'updated', 'desc'
+        if self.created[0] or self.numbers[0] is not None:
+            return 'created', 'desc'
+        if self.updated[1]:
+            return 'updated', 'asc'
+        if self.created[1] or self.numbers[1] is not None:
+            return 'created', 'asc'
+        return 'created', 'desc'
+
+    def is_past_end(self, pr_record, order, updated_since=None):
+        """
+        PR一覧で、このPR以降に条件に一致するPRがないかどうか（打ち切りの判定）
+
+        Args:
+            pr_record (PullRequestRecord): PRレコード
+            order (tuple): pull_request_order の戻り値
+            updated_since (str): 差分の同期でこの日時以降に更新されたPRのみ取得する場合
+
+        Returns:
+            bool: 打ち切る場合はTrue
+        """
+        sort, direction = order
+        if direction == 'desc':
+            if sort == 'updated':
+                if updated_since and pr_record.pr_updated_at < updated_since:
+                    return True
+                return bool(self.updated[0]) and pr_record.pr_updated_at[:10] < self.updated[0].isoformat()
+            if self.created[0] and pr_record.pr_created_at[:10] < self.created[0].isoformat():
+                return True
+            return self.numbers[0] is not None and pr_record.pr_number < self.numbers[0]
+        if sort == 'updated':
+            return pr_record.pr_updated_at[:10] > self.updated[1].isoformat()
+        if self.created[1] and pr_record.pr_created_at[:10] > self.created[1].isoformat():
+            return True
+        return self.numbers[1] is not None and pr_record.pr_number > self.numbers[1]
+
+    def api_state(self):
+        """
+        PR一覧（/pulls の state=）に渡す状態
+
+        Returns:
+            str: 'open'・'closed'・'all' のいずれか（merged は closed で取得してからマージ済みに絞り込む）
+        """
+        if not self.states or 'open' in self.states and len(self.states) > 1:
+            return 'all'
+        return 'open' if self.states == {'open'} else 'closed'
+
+    def graphql_states(self):
+        """
+        GraphQLの pullRequests(states:) に渡す状態
+
+        Returns:
+            list: PullRequestState のリスト（絞り込まない場合はNone）
+        """
+        if not self.states:
+            return None
+        return sorted({value for state in self.states for value in _GRAPHQL_STATES[state]})
+
+    def comments_since(self):
+        """
+        リポジトリ全体のコメント一覧に渡す since=（コメントの更新日時の下限）
+
+        コメントの更新日時はPRの作成日時以降になるため、作成日の下限はそのまま since= に使える。
+
+        Returns:
+            str: ISO形式の日時（使えない場合はNone）
+        """
+        if not self.created[0]:
+            return None
+        return f"{self.created[0].isoformat()}T00:00:00Z"
+
+    def uses_search(self):
+        """PR一覧ではなく検索APIでPRを探すかどうか（PR一覧に渡せない作成者・投稿者の条件がある場合）"""
+        return bool(self.authors or self.commenters)
+
+    def search_queries(self, repo_name):
+        """
+        検索API（/search/issues）のクエリ
+
+        作成者・投稿者を複数指定した場合は、その組み合わせごとに検索する。
+        commenter: はIssueコメントのみを対象とするため、投稿者はレビューした人（reviewed-by:）でも検索する。
+        PR番号と、複数の状態の組み合わせは検索の条件にできないため、結果のPRレコードに適用する。
+
+        Args:
+            repo_name (str): リポジトリ名 (owner/repo形式)
+
+        Returns:
+            list: 検索のクエリのリスト
+        """
+        terms = [f"repo:{repo_name}", 'is:pr']
+        if len(self.states) == 1:
+            terms.append(f"is:{next(iter(self.states))}")
+        for kind, bounds in (('created', self.created), ('updated', self.updated)):
+            value = _search_range(bounds)
+            if value:
+                terms.append(f"{kind}:{value}")
+        authors = [f"author:{author}" for author in sorted(self.authors)] or ['']
+        commenters = [
+            f"{qualifier}:{commenter}"
+            for commenter in sorted(self.commenters) for qualifier in ('commenter', 'reviewed-by')
+        ] or ['']
+        return [
+            ' '.join(term for term in terms + [author, commenter] if term)
+            for author in authors for commenter in commenters
+        ]
+
+def get_comment_filter():
+    """
+    PR_COMMENTS_FILTER 環境変数から絞り込み条件を読み込む
+
+    Returns:
+        CommentFilter: 絞り込み条件（未指定の場合は条件のないもの）
+
+    Raises:
+        ValueError: 条件が正しくない場合
+    """
+    return CommentFilter.parse(os.environ.get('PR_COMMENTS_FILTER'))
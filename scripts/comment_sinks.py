@@ -0,0 +1,856 @@
+#!/usr/bin/env python3
+"""
+コメント行を受け取りながら各種の成果物を出力するシンク
+
+各シンクはコメント行を1行ずつ受け取ってファイルに書き込み（add）、
+最後に集計情報を書き込んで閉じる（close）。全件をメモリに保持しないため、
+コメント数によらずメモリ使用量は一定になる。
+出力する列は columns で指定する（複数リポジトリのクロールでは先頭に repo 列を加える）。
+テキストの成果物は compression を指定すると gzip / zstd で圧縮して書き込む。
+"""
+
+import csv
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from comment_analysis import ANALYSIS_FILE, CommentAnalyzer, print_report
+from metrics import default_metrics
+from pr_comment_fetcher import COMMENT_COLUMNS, COMMENT_TYPE_ORDER
+
+# Parquet出力は pyarrow がインストールされている場合のみ使用できる
+# （インポートに時間とメモリがかかるため、Parquetを出力する場合のみインポートする）
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def _find_zstd_module():
+    """zstd圧縮に使うモジュール名（Python 3.14以降は標準ライブラリ、それ以前は zstandard）"""
+    for name in ('compression.zstd', 'zstandard'):
+        try:
+            if importlib.util.find_spec(name) is not None:
+                return name
+        except ModuleNotFoundError:
+            pass
+    return None
+
+
+ZSTD_MODULE = _find_zstd_module()
+
+# PR_COMMENTS_COMPRESS で指定する圧縮形式と、圧縮したテキストの成果物のファイル名に付ける拡張子
+COMPRESSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def get_compression():
+    """
+    PR_COMMENTS_COMPRESS 環境変数から成果物の圧縮形式を決める
+
+    Returns:
+        str: COMPRESSIONS のキー（圧縮しない場合はNone）
+    """
+    compression = (os.environ.get('PR_COMMENTS_COMPRESS') or 'none').strip().lower()
+    if compression == 'none':
+        return None
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"不明な圧縮形式です: {compression}（指定可能: none, {', '.join(COMPRESSIONS)}）")
+    if compression == 'zstd' and ZSTD_MODULE is None:
+        raise ValueError("zstd圧縮には Python 3.14 以降か zstandard が必要です（pip install zstandard）")
+    return compression
+
+
+def open_output(output_file, compression=None, encoding='utf-8', newline=None):
+    """
+    テキストの成果物を書き込み用に開く
+
+    Args:
+        output_file (str): 出力ファイル名（圧縮する場合は拡張子を含めて指定する）
+        compression (str): 圧縮形式（COMPRESSIONS のキー、Noneの場合は圧縮しない）
+        encoding (str): 文字コード
+        newline (str): open() の newline
+
+    Returns:
+        テキストファイルオブジェクト
+    """
+    if compression == 'gzip':
+        return gzip.open(output_file, 'wt', encoding=encoding, newline=newline)
+    if compression == 'zstd':
+        if ZSTD_MODULE == 'compression.zstd':
+            from compression import zstd
+            return zstd.open(output_file, 'wt', encoding=encoding, newline=newline)
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(output_file, 'wb')),
+                                encoding=encoding, newline=newline)
+    return open(output_file, 'w', encoding=encoding, newline=newline)
+
+
+def open_input(input_file, encoding='utf-8', newline=None):
+    """
+    テキストの成果物を読み込み用に開く（拡張子 .gz / .zst の場合は展開しながら読み込む）
+
+    Args:
+        input_file (str): 入力ファイル名
+        encoding (str): 文字コード
+        newline (str): open() の newline
+
+    Returns:
+        テキストファイルオブジェクト
+    """
+    if input_file.endswith(COMPRESSIONS['gzip']):
+        return gzip.open(input_file, 'rt', encoding=encoding, newline=newline)
+    if input_file.endswith(COMPRESSIONS['zstd']):
+        if ZSTD_MODULE is None:
+            raise ValueError("zstd圧縮のファイルの読み込みには Python 3.14 以降か zstandard が必要です")
+        if ZSTD_MODULE == 'compression.zstd':
+            from compression import zstd
+            return zstd.open(input_file, 'rt', encoding=encoding, newline=newline)
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(input_file, 'rb')),
+                                encoding=encoding, newline=newline)
+    return open(input_file, encoding=encoding, newline=newline)
+
+
+def _output_name(output_file, compression):
+    """圧縮する場合は拡張子を付けた出力ファイル名"""
+    return output_file + COMPRESSIONS.get(compression, '')
+
+# 一覧（comments_list.json）にはPR作成者の列を含めない
+LIST_EXCLUDED_COLUMNS = ['pr_author']
+LIST_COLUMNS = [column for column in COMMENT_COLUMNS if column not in LIST_EXCLUDED_COLUMNS]
+
+# 複数リポジトリのクロールで出力する列（先頭にリポジトリ名を加える）
+MULTI_REPO_COLUMNS = ['repo'] + COMMENT_COLUMNS
+
+# TypeScript版（scripts/ts/src/csv-exporter.ts）と同じ列見出し
+TS_CSV_HEADERS = {
+    'repo': 'リポジトリ',
+    'pr_number': 'PR番号',
+    'pr_title': 'PRタイトル',
+    'pr_state': 'PR状態',
+    'pr_created_at': 'PR作成日時',
+    'pr_merged_at': 'PRマージ日時',
+    'pr_author': 'PR作成者',
+    'comment_type': 'コメントタイプ',
+    'comment_id': 'コメントID',
+    'comment_body': 'コメント内容',
+    'comment_created_at': 'コメント作成日時',
+    'comment_updated_at': 'コメント更新日時',
+    'comment_user': 'コメント投稿者',
+    'comment_path': 'コメント対象ファイルパス',
+    'comment_line': 'コメント対象行番号',
+    'comment_side': 'コメント対象サイド',
+    'comment_start_line': 'コメント開始行番号',
+    'comment_start_side': 'コメント開始サイド',
+}
+
+
+class CommentStats:
+    """コメント行を受け取りながら集計する統計情報"""
+
+    def __init__(self):
+        self.total_comments = 0
+        # 複数リポジトリでは同じPR番号が重複するため、リポジトリ名と組にする
+        self.pr_numbers = set()
+        self.comment_types = {}
+        self.users = {}
+
+    def add(self, row):
+        """コメント行を集計に加える"""
+        self.total_comments += 1
+        self.pr_numbers.add((row.get('repo'), row['pr_number']))
+        comment_type = row['comment_type']
+        self.comment_types[comment_type] = self.comment_types.get(comment_type, 0) + 1
+        user = row.get('comment_user')
+        if user:
+            self.users[user] = self.users.get(user, 0) + 1
+
+    def top_users(self, limit):
+        """コメント数の多いユーザーを返す"""
+        return sorted(self.users.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    def summary(self):
+        """comments_list.json の summary を作成する"""
+        return {
+            'total_comments': self.total_comments,
+            'total_prs': len(self.pr_numbers),
+            'comment_types': self.comment_types,
+            'users': self.users,
+            'generated_at': datetime.now().isoformat()
+        }
+
+    def counts(self, total_prs):
+        """
+        comment_counts.json の集計結果を作成する
+
+        Args:
+            total_prs (int): コメントのないPRも含めた総PR数
+        """
+        total_comments = self.total_comments
+        prs_with_comments = len(self.pr_numbers)
+        avg_comments_per_pr = round(total_comments / total_prs, 2) if total_prs > 0 else 0
+        return {
+            'total_prs': total_prs,
+            'total_comments': total_comments,
+            'review_comments': self.comment_types.get('review_comment', 0),
+            'reviews': self.comment_types.get('review', 0),
+            'issue_comments': self.comment_types.get('issue_comment', 0),
+            'avg_comments_per_pr': avg_comments_per_pr,
+            'prs_with_comments': prs_with_comments,
+            'prs_without_comments': total_prs - prs_with_comments
+        }
+
+
+def save_counts(counts_data, output_file='comment_counts.json', compression=None):
+    """
+    コメント数の集計結果を保存して表示する
+
+    Args:
+        counts_data (dict): 集計結果（CommentStats.counts と同じ形式）
+        output_file (str): 出力ファイル名（圧縮する場合は拡張子を含めて指定する）
+        compression (str): 圧縮形式
+    """
+    with open_output(output_file, compression) as f:
+        json.dump(counts_data, f, ensure_ascii=False, indent=2)
+
+    print(f"集計結果が保存されました: {output_file}")
+    print(f"総PR数: {counts_data['total_prs']}件")
+    print(f"総コメント数: {counts_data['total_comments']}件")
+    print(f"レビューコメント: {counts_data['review_comments']}件")
+    print(f"レビュー: {counts_data['reviews']}件")
+    print(f"Issueコメント: {counts_data['issue_comments']}件")
+    print(f"平均コメント数/PR: {counts_data['avg_comments_per_pr']}件")
+
+
+class CountsSink:
+    """コメント数の集計結果（comment_counts.json）"""
+
+    def __init__(self, output_file='comment_counts.json', columns=COMMENT_COLUMNS, compression=None):
+        self.output_file = _output_name(output_file, compression)
+        self.compression = compression
+        self.stats = CommentStats()
+
+    def add(self, row):
+        self.stats.add(row)
+
+    def close(self, total_prs):
+        save_counts(self.stats.counts(total_prs), self.output_file, self.compression)
+
+    def discard(self):
+        pass
+
+
+def _indent(text, spaces):
+    """2行目以降をインデントする（json.dump の indent と同じ出力にするため）"""
+    return text.replace('\n', '\n' + ' ' * spaces)
+
+
+class ListSink:
+    """コメント一覧（comments_list.json）"""
+
+    def __init__(self, output_file='comments_list.json', columns=COMMENT_COLUMNS, compression=None):
+        self.output_file = _output_name(output_file, compression)
+        self.compression = compression
+        self.columns = [column for column in columns if column not in LIST_EXCLUDED_COLUMNS]
+        self.stats = CommentStats()
+        # summary はコメントの後にしか決まらないため、コメント部分は一時ファイルに書いておく
+        self.comments_file = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def add(self, row):
+        self.stats.add(row)
+        comment = {column: row[column] for column in self.columns}
+        separator = ',\n' if self.stats.total_comments > 1 else ''
+        self.comments_file.write(
+            separator + '    ' + _indent(json.dumps(comment, ensure_ascii=False, indent=2), 4)
+        )
+
+    def close(self, total_prs):
+        summary = self.stats.summary()
+        with open_output(self.output_file, self.compression) as f:
+            f.write('{\n  "summary": ')
+            f.write(_indent(json.dumps(summary, ensure_ascii=False, indent=2), 2))
+            if self.stats.total_comments:
+                f.write(',\n  "comments": [\n')
+                self.comments_file.seek(0)
+                shutil.copyfileobj(self.comments_file, f)
+                f.write('\n  ]\n}')
+            else:
+                f.write(',\n  "comments": []\n}')
+        self.comments_file.close()
+
+        print(f"コメント一覧が保存されました: {self.output_file}")
+        print(f"総コメント数: {summary['total_comments']}")
+        print(f"総PR数: {summary['total_prs']}")
+        print(f"コメントタイプ別:")
+        for comment_type, count in summary['comment_types'].items():
+            print(f"  - {comment_type}: {count}件")
+        print(f"ユーザー別（上位5名）:")
+        for user, count in self.stats.top_users(5):
+            print(f"  - {user}: {count}件")
+
+    def discard(self):
+        self.comments_file.close()
+
+
+class JsonLinesSink:
+    """コメント一覧のJSON Lines（comments_list.jsonl、1行1コメント）"""
+
+    def __init__(self, output_file='comments_list.jsonl', columns=COMMENT_COLUMNS, compression=None):
+        self.output_file = _output_name(output_file, compression)
+        self.count = 0
+        self.file = open_output(self.output_file, compression)
+
+    def add(self, row):
+        self.count += 1
+        self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def close(self, total_prs):
+        self.file.close()
+        print(f"JSON Linesファイルが生成されました: {self.output_file}（{self.count}件）")
+
+    def discard(self):
+        self.file.close()
+
+
+class CsvSink:
+    """コメントのCSV（pr_comments_export.csv、UTF-8 BOM付き）"""
+
+    def __init__(self, output_file='pr_comments_export.csv', columns=COMMENT_COLUMNS, compression=None):
+        self.output_file = _output_name(output_file, compression)
+        self.stats = CommentStats()
+        self.file = open_output(self.output_file, compression, encoding='utf-8-sig', newline='')
+        # pandas の to_csv と同じく改行は LF にする
+        self.writer = csv.DictWriter(self.file, fieldnames=columns, lineterminator='\n')
+        self.writer.writeheader()
+
+    def add(self, row):
+        self.stats.add(row)
+        self.writer.writerow(row)
+
+    def close(self, total_prs):
+        self.file.close()
+
+        if not self.stats.total_comments:
+            print("コメントデータが見つかりませんでした。空のCSVファイルを生成しました。")
+        print(f"CSVファイルが生成されました: {self.output_file}")
+        print(f"総コメント数: {self.stats.total_comments}")
+        print(f"PR数: {len(self.stats.pr_numbers)}")
+
+        # 統計情報を表示
+        if self.stats.total_comments:
+            print("\n=== 統計情報 ===")
+            print(f"コメントタイプ別件数:")
+            for comment_type, count in sorted(self.stats.comment_types.items(), key=lambda x: x[1], reverse=True):
+                print(f"  - {comment_type}: {count}件")
+            print(f"\nユーザー別コメント数（上位10名）:")
+            for user, count in self.stats.top_users(10):
+                print(f"  - {user}: {count}件")
+
+    def discard(self):
+        self.file.close()
+
+
+class TsCsvSink:
+    """TypeScript版と同じ形式のCSV（日本語の列見出し・BOMなし）"""
+
+    def __init__(self, output_file='pr_comments_export_ts.csv', columns=COMMENT_COLUMNS, compression=None):
+        self.output_file = _output_name(output_file, compression)
+        self.columns = columns
+        self.count = 0
+        self.file = open_output(self.output_file, compression, newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([TS_CSV_HEADERS[column] for column in columns])
+
+    def add(self, row):
+        self.count += 1
+        # csv-writer と同じく null は空欄にする
+        self.writer.writerow(['' if row[column] is None else row[column] for column in self.columns])
+
+    def close(self, total_prs):
+        self.file.close()
+        print(f"CSVファイルが生成されました: {self.output_file}（{self.count}件のコメント）")
+
+    def discard(self):
+        self.file.close()
+
+
+class AnalysisSink:
+    """コメント本文の分析結果（comment_analysis.json、分析はプロセスプールで並行して行う）"""
+
+    def __init__(self, output_file=ANALYSIS_FILE, columns=COMMENT_COLUMNS, compression=None):
+        self.output_file = _output_name(output_file, compression)
+        self.compression = compression
+        self.analyzer = CommentAnalyzer()
+
+    def add(self, row):
+        self.analyzer.add(row)
+
+    def close(self, total_prs):
+        with default_metrics.phase('analysis'):
+            report = self.analyzer.report()
+        with open_output(self.output_file, self.compression) as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"コメントの分析結果が保存されました: {self.output_file}")
+        print_report(report)
+
+    def discard(self):
+        self.analyzer.close()
+
+
+# Parquetの列の型（指定のない列は文字列）
+PARQUET_INT_COLUMNS = ['pr_number', 'comment_id', 'comment_line', 'comment_start_line']
+
+# Parquetに書き込む行数（この行数ずつメモリに保持する）
+PARQUET_BATCH_SIZE = 10000
+
+
+class ParquetSink:
+    """分析用のParquet（pr_comments_export.parquet、pyarrowが必要）"""
+
+    def __init__(self, output_file='pr_comments_export.parquet', columns=COMMENT_COLUMNS, compression=None):
+        if not HAS_PYARROW:
+            raise ValueError("Parquet出力には pyarrow が必要です（pip install pyarrow）")
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.output_file = output_file
+        self.count = 0
+        self.column_names = columns
+        self.schema = pyarrow.schema([
+            (column, pyarrow.int64() if column in PARQUET_INT_COLUMNS else pyarrow.string())
+            for column in columns
+        ])
+        # 圧縮形式の指定がない場合は pyarrow の既定（snappy）で圧縮する
+        self.writer = pyarrow.parquet.ParquetWriter(output_file, self.schema, compression=compression or 'snappy')
+        self.columns = {column: [] for column in columns}
+
+    def add(self, row):
+        self.count += 1
+        for column in self.column_names:
+            value = row[column]
+            # CSVでは空欄の行番号を空文字にしているため、Parquetでは null にする
+            if column in PARQUET_INT_COLUMNS and value == '':
+                value = None
+            self.columns[column].append(value)
+        if len(self.columns['pr_number']) >= PARQUET_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        """溜めた行を1つの行グループとして書き込む"""
+        if self.columns['pr_number']:
+            self.writer.write_table(self.pyarrow.table(self.columns, schema=self.schema))
+            self.columns = {column: [] for column in self.column_names}
+
+    def close(self, total_prs):
+        self._flush()
+        self.writer.close()
+        print(f"Parquetファイルが生成されました: {self.output_file}（{self.count}件）")
+
+    def discard(self):
+        self.writer.close()
+
+
+# Arrow IPCで辞書エンコードする列（値の種類が少なく、同じ値が繰り返し現れる列）
+ARROW_DICTIONARY_COLUMNS = [
+    'repo', 'pr_state', 'pr_author', 'comment_type', 'comment_user',
+    'comment_path', 'comment_side', 'comment_start_side',
+]
+
+# Arrow IPCファイルのメタデータに記録するPR数のキー
+ARROW_TOTAL_PRS_KEY = b'total_prs'
+
+
+class ArrowSink:
+    """
+    中間成果物のArrow IPCファイル（pr_comments.arrow、pyarrowが必要）
+
+    列指向のバイナリ形式で、繰り返し現れる文字列の列は辞書エンコードする（辞書はバッチごとに差分で追記する）。
+    convert_pr_comments.py でメモリマップして読み込み、JSON・CSVなどの成果物に変換できる。
+    """
+
+    def __init__(self, output_file='pr_comments.arrow', columns=COMMENT_COLUMNS, compression=None):
+        if not HAS_PYARROW:
+            raise ValueError("Arrow出力には pyarrow が必要です（pip install pyarrow）")
+        import pyarrow
+        self.pyarrow = pyarrow
+        self.output_file = output_file
+        self.count = 0
+        self.column_names = columns
+        self.schema = pyarrow.schema([
+            (column, pyarrow.dictionary(pyarrow.int32(), pyarrow.string()) if column in ARROW_DICTIONARY_COLUMNS
+             else pyarrow.int64() if column in PARQUET_INT_COLUMNS else pyarrow.string())
+            for column in columns
+        ])
+        # 辞書エンコードする列の値 → 辞書の位置（全バッチで共有し、新しい値だけを差分として書き込む）
+        self.dictionaries = {column: {} for column in columns if column in ARROW_DICTIONARY_COLUMNS}
+        # IPCのバッファ圧縮は lz4 と zstd のみ対応しているため、gzip を指定した場合は圧縮しない
+        if compression == 'gzip':
+            print(f"Arrow IPCは gzip に対応していないため、{output_file} は圧縮せずに出力します（zstd は指定できます）")
+        options = pyarrow.ipc.IpcWriteOptions(
+            compression='zstd' if compression == 'zstd' else None,
+            emit_dictionary_deltas=True,
+        )
+        self.writer = pyarrow.ipc.new_file(output_file, self.schema, options=options)
+        self.columns = {column: [] for column in columns}
+
+    def add(self, row):
+        self.count += 1
+        for column in self.column_names:
+            value = row[column]
+            if column in self.dictionaries:
+                if value is not None:
+                    value = self.dictionaries[column].setdefault(value, len(self.dictionaries[column]))
+            elif column in PARQUET_INT_COLUMNS and value == '':
+                value = None
+            self.columns[column].append(value)
+        if len(self.columns['pr_number']) >= PARQUET_BATCH_SIZE:
+            self._flush()
+
+    def _batch(self, columns):
+        """列ごとの値のリストからレコードバッチを作る"""
+        pyarrow = self.pyarrow
+        arrays = []
+        for field in self.schema:
+            values = columns[field.name]
+            if field.name in self.dictionaries:
+                dictionary = pyarrow.array(list(self.dictionaries[field.name]), pyarrow.string())
+                arrays.append(pyarrow.DictionaryArray.from_arrays(pyarrow.array(values, pyarrow.int32()), dictionary))
+            else:
+                arrays.append(pyarrow.array(values, field.type))
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _flush(self):
+        """溜めた行を1つのレコードバッチとして書き込む"""
+        if self.columns['pr_number']:
+            self.writer.write_batch(self._batch(self.columns))
+            self.columns = {column: [] for column in self.column_names}
+
+    def close(self, total_prs):
+        self._flush()
+        # PR数は行からは求められないため、最後の空のバッチのメタデータに記録する
+        empty = self._batch({column: [] for column in self.column_names})
+        self.writer.write_batch(empty, custom_metadata={ARROW_TOTAL_PRS_KEY: str(total_prs).encode()})
+        self.writer.close()
+        print(f"Arrowファイルが生成されました: {self.output_file}（{self.count}件）")
+
+    def discard(self):
+        self.writer.close()
+
+
+# PR_COMMENTS_PARTITION で指定する分割の単位（pr は pr:N で1つのパーティションのPR番号の幅を指定できる）
+PARTITION_KEYS = ['month', 'pr']
+
+# PR番号で分割する場合の1つのパーティションのPR番号の幅の既定値
+PARTITION_PR_RANGE = 1000
+
+# PR_COMMENTS_PARTITION_FORMAT で指定するパーティションのファイル形式と拡張子
+PARTITION_FORMATS = {
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+}
+
+# パーティションの一覧・行数・チェックサムを記録するファイル
+PARTITION_MANIFEST = 'manifest.json'
+
+# パーティションごとの一時ファイルに書き出すまでメモリに保持する行数（全パーティションの合計）
+PARTITION_BUFFER_ROWS = 10000
+
+
+def get_partitioning():
+    """
+    PR_COMMENTS_PARTITION 環境変数からパーティションの分割の単位を決める
+
+    Returns:
+        tuple: (分割の単位, PR番号の幅)（月で分割する場合、PR番号の幅はNone）
+    """
+    value = (os.environ.get('PR_COMMENTS_PARTITION') or 'month').strip().lower()
+    partition_by, _, width = value.partition(':')
+    if partition_by not in PARTITION_KEYS or (width and partition_by != 'pr'):
+        raise ValueError(f"不明なパーティションの単位です: {value}（指定可能: month, pr, pr:N）")
+    if partition_by == 'month':
+        return partition_by, None
+    if not width:
+        return partition_by, PARTITION_PR_RANGE
+    if not width.isdigit() or int(width) < 1:
+        raise ValueError(f"PR番号の幅は1以上の整数で指定してください: {value}")
+    return partition_by, int(width)
+
+
+def get_partition_format():
+    """PR_COMMENTS_PARTITION_FORMAT 環境変数からパーティションのファイル形式を決める（既定値は csv）"""
+    file_format = (os.environ.get('PR_COMMENTS_PARTITION_FORMAT') or 'csv').strip().lower()
+    if file_format not in PARTITION_FORMATS:
+        raise ValueError(
+            f"不明なパーティションの形式です: {file_format}（指定可能: {', '.join(PARTITION_FORMATS)}）"
+        )
+    return file_format
+
+
+def get_partition_workers():
+    """パーティションの書き込みに使うスレッド数（PR_COMMENTS_PARTITION_WORKERS 環境変数、省略時はCPU数）"""
+    return max(1, int(os.environ.get('PR_COMMENTS_PARTITION_WORKERS') or os.cpu_count() or 1))
+
+
+def _file_sha256(path):
+    """ファイルのSHA-256（ファイルがない場合はNone）"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PartitionedSink:
+    """
+    月またはPR番号の範囲で分割したコメント（pr_comments_partitions/、パーティションごとに圧縮したファイル）
+
+    行はパーティションごとの一時ファイルに振り分けておき、close でパーティションごとに並べ替えて
+    スレッドプールのワーカーが並行して圧縮・書き込みする。
+    各パーティションの行数とチェックサムは manifest.json に記録し、次回の出力では内容（圧縮前）の
+    チェックサムが前回と同じパーティションは書き込まない。前回あって今回ないパーティションは削除する。
+    """
+
+    def __init__(self, output_file='pr_comments_partitions', columns=COMMENT_COLUMNS, compression=None):
+        self.output_dir = output_file
+        self.columns = columns
+        # パーティションは常に圧縮する（圧縮形式の指定がない場合は gzip）
+        self.compression = compression if compression in COMPRESSIONS else 'gzip'
+        self.partition_by, self.pr_range = get_partitioning()
+        self.file_format = get_partition_format()
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.buffers = {}
+        self.buffered = 0
+        self.count = 0
+
+    def _partition_key(self, row):
+        """行のパーティションのキー（月は YYYY-MM、PR番号は 範囲の先頭-末尾）"""
+        if self.partition_by == 'month':
+            return (row.get('comment_created_at') or '')[:7] or 'unknown'
+        start = int(row['pr_number']) // self.pr_range * self.pr_range
+        return f"{start:06d}-{start + self.pr_range - 1:06d}"
+
+    def add(self, row):
+        self.count += 1
+        values = [row[column] for column in self.columns]
+        self.buffers.setdefault(self._partition_key(row), []).append(json.dumps(values, ensure_ascii=False))
+        self.buffered += 1
+        if self.buffered >= PARTITION_BUFFER_ROWS:
+            self._flush()
+
+    def _flush(self):
+        """溜めた行をパーティションごとの一時ファイルに追記する"""
+        for key, lines in self.buffers.items():
+            with open(os.path.join(self.spool_dir.name, key), 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        self.buffers = {}
+        self.buffered = 0
+
+    def _sort_key(self):
+        """パーティション内の行の並び（リポジトリ、PR番号の降順、コメントタイプ、コメントID）"""
+        index = {column: position for position, column in enumerate(self.columns)}
+        type_order = {comment_type: position for position, comment_type in enumerate(COMMENT_TYPE_ORDER)}
+
+        def key(values):
+            return (
+                values[index['repo']] if 'repo' in index else '',
+                -int(values[index['pr_number']]),
+                type_order.get(values[index['comment_type']], len(type_order)),
+                int(values[index['comment_id']]),
+            )
+        return key
+
+    def _serialize(self, rows):
+        """パーティションの行をファイルの内容（圧縮前の文字列）にする"""
+        if self.file_format == 'jsonl':
+            return ''.join(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False) + '\n' for values in rows)
+        buffer = io.StringIO()
+        # CsvSink と同じく見出しを付け、改行は LF にする（BOMは書き込み時に付ける）
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(self.columns)
+        writer.writerows(['' if value is None else value for value in values] for values in rows)
+        return buffer.getvalue()
+
+    def _write_partition(self, key, previous, sort_key):
+        """
+        1つのパーティションを書き込む（スレッドプールのワーカーで実行する）
+
+        Args:
+            key (str): パーティションのキー
+            previous (dict): 前回の manifest.json の同じファイルの項目（ない場合はNone）
+            sort_key: 行の並べ替えのキー
+
+        Returns:
+            tuple: (manifest.json の項目, 書き込んだかどうか)
+        """
+        with open(os.path.join(self.spool_dir.name, key), encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        rows.sort(key=sort_key)
+        content = self._serialize(rows)
+        content_sha256 = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        file_name = (
+            f"{self.partition_by}={key}{PARTITION_FORMATS[self.file_format]}{COMPRESSIONS[self.compression]}"
+        )
+        path = os.path.join(self.output_dir, file_name)
+
+        # 内容が前回と同じで、ファイルも前回書き込んだままであれば書き込まない
+        if (previous and previous.get('content_sha256') == content_sha256
+                and _file_sha256(path) == previous.get('sha256')):
+            return previous, False
+
+        # 書きかけのファイルを読まれないように、一時ファイルに書き込んでから置き換える
+        temp_path = os.path.join(self.output_dir, f".{file_name}.tmp")
+        encoding = 'utf-8-sig' if self.file_format == 'csv' else 'utf-8'
+        with open_output(temp_path, self.compression, encoding=encoding, newline='') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        entry = {
+            'key': key,
+            'file': file_name,
+            'rows': len(rows),
+            'bytes': os.path.getsize(path),
+            'sha256': _file_sha256(path),
+            'content_sha256': content_sha256,
+        }
+        return entry, True
+
+    def _load_manifest(self):
+        """前回の manifest.json（ない場合や読み込めない場合は空の辞書）"""
+        try:
+            with open(os.path.join(self.output_dir, PARTITION_MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def close(self, total_prs):
+        self._flush()
+        os.makedirs(self.output_dir, exist_ok=True)
+        previous = {entry['file']: entry for entry in self._load_manifest().get('partitions', [])}
+        file_suffix = PARTITION_FORMATS[self.file_format] + COMPRESSIONS[self.compression]
+        sort_key = self._sort_key()
+
+        def write(key):
+            file_name = f"{self.partition_by}={key}{file_suffix}"
+            return self._write_partition(key, previous.get(file_name), sort_key)
+
+        keys = sorted(os.listdir(self.spool_dir.name))
+        try:
+            with ThreadPoolExecutor(max_workers=get_partition_workers()) as executor:
+                results = list(executor.map(write, keys))
+        finally:
+            self.spool_dir.cleanup()
+
+        entries = [entry for entry, _ in results]
+        written = sum(1 for _, changed in results if changed)
+        # 前回あって今回ないパーティションは削除する（残すと読み込む側で古い行が混ざる）
+        current_files = {entry['file'] for entry in entries}
+        removed = 0
+        for file_name in previous:
+            path = os.path.join(self.output_dir, file_name)
+            if file_name not in current_files and os.path.exists(path):
+                os.remove(path)
+                removed += 1
+
+        manifest = {
+            'partition_by': self.partition_by,
+            'pr_range': self.pr_range,
+            'format': self.file_format,
+            'compression': self.compression,
+            'columns': self.columns,
+            'total_rows': self.count,
+            'total_prs': total_prs,
+            'generated_at': datetime.now().isoformat(),
+            'partitions': entries,
+        }
+        manifest_path = os.path.join(self.output_dir, PARTITION_MANIFEST)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        print(f"パーティションが生成されました: {self.output_dir}/（{len(entries)}件、{self.count}行）")
+        print(f"  - 書き込み: {written}件、変更なし: {len(entries) - written}件、削除: {removed}件")
+
+    def discard(self):
+        self.spool_dir.cleanup()
+
+
+# PR_COMMENTS_OUTPUTS で指定する名前とシンク
+SINKS = {
+    'counts': CountsSink,
+    'list': ListSink,
+    'jsonl': JsonLinesSink,
+    'csv': CsvSink,
+    'ts_csv': TsCsvSink,
+    'parquet': ParquetSink,
+    'arrow': ArrowSink,
+    'analysis': AnalysisSink,
+    'partitions': PartitionedSink,
+}
+
+# PR_COMMENTS_OUTPUTS を省略した場合に出力する形式
+DEFAULT_OUTPUTS = ['counts', 'list', 'csv', 'ts_csv']
+
+
+def validate_sink_names(names):
+    """
+    シンク名を検証する
+
+    Args:
+        names (list): シンク名のリスト（SINKS のキー）
+    """
+    unknown = [name for name in names if name not in SINKS]
+    if unknown:
+        raise ValueError(f"不明な出力形式です: {', '.join(unknown)}（指定可能: {', '.join(SINKS)}）")
+    if 'parquet' in names and not HAS_PYARROW:
+        raise ValueError("Parquet出力には pyarrow が必要です（pip install pyarrow）")
+    if 'arrow' in names and not HAS_PYARROW:
+        raise ValueError("Arrow出力には pyarrow が必要です（pip install pyarrow）")
+    if 'partitions' in names:
+        get_partitioning()
+        get_partition_format()
+
+
+def write_to_sinks(sink_names, pr_records, comment_rows, columns=COMMENT_COLUMNS, compression=None, total_prs=None):
+    """
+    コメント行を1回だけ反復し、すべてのシンクに書き込む
+
+    途中で失敗した場合は書きかけのファイルを閉じて例外を送出する。
+
+    Args:
+        sink_names (list): シンク名のリスト
+        pr_records (list): PRレコードのリスト（反復が終わった時点で揃っていればよい）
+        comment_rows: コメント行のイテラブル
+        columns (list): 出力する列
+        compression (str): 圧縮形式（省略時は PR_COMMENTS_COMPRESS 環境変数、'none' の場合は圧縮しない）
+        total_prs (int): PR数（省略時は pr_records の件数）
+    """
+    compression = get_compression() if compression is None else compression
+    sinks = [SINKS[name](columns=columns, compression=compression) for name in sink_names]
+    # 行の取得にかかる時間は取得側のフェーズで計測し、ここでは書き込みの時間のみ計測する
+    output_seconds = 0.0
+    rows = 0
+    try:
+        for row in comment_rows:
+            start = time.perf_counter()
+            for sink in sinks:
+                sink.add(row)
+            output_seconds += time.perf_counter() - start
+            rows += 1
+    except BaseException:
+        for sink in sinks:
+            sink.discard()
+        raise
+
+    with default_metrics.phase('output'):
+        for sink in sinks:
+            sink.close(len(pr_records) if total_prs is None else total_prs)
+    default_metrics.add_phase_time('output', output_seconds, rows)
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+"""
+PRとコメントをローカルに保持するSQLiteストア
+
+前回同期時点（ハイウォーターマーク）以降に更新されたPRのみを取得してマージすることで、
+ワークフロー実行ごとの全件クロールを不要にする。
+同期の進捗はチェックポイントとして保存し、中断した同期は次回の実行で続きから再開する。
+コメントの件数はユーザー・PR・ファイルパスごとの集計インデックスとしてトリガーで更新し、
+繰り返しの集計クエリで全コメントを走査しない。
+"""
+
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from metrics import default_metrics
+from pr_comment_fetcher import (
+    COMMENT_COLUMNS, COMMENT_TYPE_ORDER, CrawlProgress, PullRequestRecord, fetch_records, get_backend
+)
+
+PR_FIELDS = list(PullRequestRecord._fields)
+
+COMMENT_FIELDS = [
+    'pr_number', 'comment_type', 'comment_id', 'comment_body', 'comment_created_at',
+    'comment_updated_at', 'comment_user', 'comment_path', 'comment_line',
+    'comment_side', 'comment_start_line', 'comment_start_side'
+]
+
+# ストアに書き込むコメントレコードの件数（この件数ずつメモリに保持する）
+SAVE_BATCH_SIZE = 1000
+
+# 他の接続が書き込み中の場合に待つ秒数
+BUSY_TIMEOUT = 60
+
+# 前回の保存からこの秒数が経過したら、件数に達していなくても保存してチェックポイントを記録する
+CHECKPOINT_INTERVAL = 30
+
+# 集計インデックスの軸（comment_index.dimension）と、キーにするコメントの列
+INDEX_DIMENSIONS = {
+    'user': 'comment_user',
+    'pr': 'pr_number',
+    'path': 'comment_path',
+    'type': 'comment_type',
+}
+
+# 集計インデックスの形式のバージョン（軸を変えたら上げる、PRAGMA user_version に保存）
+INDEX_VERSION = 1
+
+# query_index で指定できる集計の単位（INDEX_DIMENSIONS に加えて期間）
+INDEX_GROUPS = list(INDEX_DIMENSIONS) + ['day', 'week', 'month']
+
+# 同期の結果（PR数と、最後まで同期したかどうか。PR_COMMENTS_MAX_RUNTIME で中断した場合は complete が False）
+SyncResult = namedtuple('SyncResult', ['pr_count', 'complete'])
+
+# 再開した同期のハイウォーターマークを中断前の開始時刻までに抑える際の余裕（時計のずれ対策）
+CLOCK_SKEW_MARGIN = timedelta(minutes=5)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pull_requests (
+    repo TEXT NOT NULL,
+    pr_number INTEGER NOT NULL,
+    pr_title TEXT,
+    pr_state TEXT,
+    pr_created_at TEXT,
+    pr_merged_at TEXT,
+    pr_author TEXT,
+    pr_updated_at TEXT,
+    PRIMARY KEY (repo, pr_number)
+);
+CREATE TABLE IF NOT EXISTS comments (
+    repo TEXT NOT NULL,
+    pr_number INTEGER NOT NULL,
+    comment_type TEXT NOT NULL,
+    comment_id INTEGER NOT NULL,
+    comment_body TEXT,
+    comment_created_at TEXT,
+    comment_updated_at TEXT,
+    comment_user TEXT,
+    comment_path TEXT,
+    comment_line,
+    comment_side TEXT,
+    comment_start_line,
+    comment_start_side TEXT,
+    PRIMARY KEY (repo, comment_type, comment_id)
+);
+CREATE INDEX IF NOT EXISTS idx_comments_pr ON comments (repo, pr_number);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    last_synced_at TEXT
+);
+CREATE TABLE IF NOT EXISTS sync_checkpoint (
+    repo TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    updated_since TEXT,
+    started_at TEXT NOT NULL,
+    high_water_mark TEXT,
+    progress TEXT NOT NULL
+);
+"""
+
+# 集計インデックス: コメントが追加・削除されるたびに、軸ごと・タイプごと・日ごとの件数を加減する
+# （INSERT OR REPLACE で置き換えられたコメントも、recursive_triggers により削除として数える）
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS comment_index (
+    repo TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    comment_type TEXT NOT NULL,
+    comment_count INTEGER NOT NULL,
+    PRIMARY KEY (repo, dimension, bucket, key, comment_type)
+) WITHOUT ROWID;
+""" + ''.join(f"""
+CREATE TRIGGER IF NOT EXISTS comment_index_{dimension}_insert AFTER INSERT ON comments
+WHEN COALESCE(NEW.{column}, '') <> ''
+BEGIN
+    INSERT INTO comment_index (repo, dimension, bucket, key, comment_type, comment_count)
+    VALUES (NEW.repo, '{dimension}', substr(COALESCE(NEW.comment_created_at, ''), 1, 10),
+            CAST(NEW.{column} AS TEXT), NEW.comment_type, 1)
+    ON CONFLICT (repo, dimension, bucket, key, comment_type)
+    DO UPDATE SET comment_count = comment_count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS comment_index_{dimension}_delete AFTER DELETE ON comments
+WHEN COALESCE(OLD.{column}, '') <> ''
+BEGIN
+    UPDATE comment_index SET comment_count = comment_count - 1
+    WHERE repo = OLD.repo AND dimension = '{dimension}'
+      AND bucket = substr(COALESCE(OLD.comment_created_at, ''), 1, 10)
+      AND key = CAST(OLD.{column} AS TEXT) AND comment_type = OLD.comment_type;
+    DELETE FROM comment_index
+    WHERE repo = OLD.repo AND dimension = '{dimension}'
+      AND bucket = substr(COALESCE(OLD.comment_created_at, ''), 1, 10)
+      AND key = CAST(OLD.{column} AS TEXT) AND comment_type = OLD.comment_type
+      AND comment_count <= 0;
+END;
+""" for dimension, column in INDEX_DIMENSIONS.items())
+
+# query_index の期間ごとの集計に使う式（bucket は YYYY-MM-DD、週は月曜始まり）
+_PERIOD_EXPRESSIONS = {
+    'day': 'bucket',
+    'week': "date(bucket, '-6 days', 'weekday 1')",
+    'month': 'substr(bucket, 1, 7)',
+}
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+def _filter_conditions(comment_filter, repo_name, comments=False):
+    """
+    絞り込み条件をSQLの条件にする（PRの列は p.、コメントの列は c. で参照する）
+
+    Args:
+        comment_filter (CommentFilter): 絞り込み条件
+        repo_name (str): リポジトリ名
+        comments (bool): コメント行の条件か（False の場合、投稿者は「その人の出力するコメントがあるPR」の条件にする）
+
+    Returns:
+        tuple: (条件のリスト, パラメータのリスト)
+    """
+    conditions = []
+    params = []
+    if comment_filter is None:
+        return conditions, params
+
+    for column, (low, high) in (('p.pr_number', comment_filter.numbers),
+                                ('substr(p.pr_created_at, 1, 10)', comment_filter.created),
+                                ('substr(p.pr_updated_at, 1, 10)', comment_filter.updated)):
+        for operator, value in (('>=', low), ('<=', high)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value if isinstance(value, int) else value.isoformat())
+    if comment_filter.states:
+        state_conditions = {
+            'open': "p.pr_state = 'open'",
+            'closed': "p.pr_state = 'closed'",
+            'merged': "COALESCE(p.pr_merged_at, '') <> ''",
+        }
+        conditions.append(f"({' OR '.join(state_conditions[state] for state in sorted(comment_filter.states))})")
+    if comment_filter.authors:
+        conditions.append(f"lower(p.pr_author) IN ({_placeholders(comment_filter.authors)})")
+        params.extend(sorted(comment_filter.authors))
+    if comment_filter.commenters:
+        commenters = sorted(comment_filter.commenters)
+        if comments:
+            conditions.append(f"lower(c.comment_user) IN ({_placeholders(commenters)})")
+            params.extend(commenters)
+        else:
+            # 出力するコメント（タイプの条件にも一致するもの）がある PR のみ
+            types = sorted(comment_filter.comment_types)
+            type_condition = f" AND comment_type IN ({_placeholders(types)})" if types else ''
+            conditions.append(
+                f"p.pr_number IN (SELECT pr_number FROM comments WHERE repo = ? "
+                f"AND lower(comment_user) IN ({_placeholders(commenters)}){type_condition})"
+            )
+            params.extend([repo_name] + commenters + types)
+    if comments and comment_filter.comment_types:
+        conditions.append(f"c.comment_type IN ({_placeholders(comment_filter.comment_types)})")
+        params.extend(sorted(comment_filter.comment_types))
+    return conditions, params
+
+
+class CommentStore:
+    """PRとコメントを保持するSQLiteストア"""
+
+    def __init__(self, db_path, repo_name):
+        """
+        Args:
+            db_path (str): SQLiteファイルのパス
+            repo_name (str): リポジトリ名 (owner/repo形式)
+        """
+        self.repo_name = repo_name
+        # 複数リポジトリを並行して同期する場合は、他の接続の書き込みが終わるまで待つ
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+        # 読み込み中の接続（出力待ちでカーソルを開いたままのワーカー）が他の接続の書き込みを妨げないように、
+        # ロールバックジャーナルではなくWALを使う（設定はファイルに保存され、次回以降も有効）
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        # INSERT OR REPLACE による置き換えでも削除のトリガーを実行する（集計インデックスの減算）
+        self.conn.execute('PRAGMA recursive_triggers = ON')
+        self.conn.executescript(SCHEMA)
+        self.conn.executescript(INDEX_SCHEMA)
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] < INDEX_VERSION:
+            # 集計インデックス（または現在の軸）より前に作成したストアは、保存済みのコメントから作成する
+            self.rebuild_index()
+
+    def close(self):
+        """コミットして接続を閉じる"""
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_last_synced_at(self):
+        """
+        前回同期時のハイウォーターマークを取得する
+
+        Returns:
+            str: 同期済みPRの最大updated_at（未同期の場合はNone）
+        """
+        row = self.conn.execute(
+            'SELECT last_synced_at FROM sync_state WHERE repo = ?', (self.repo_name,)
+        ).fetchone()
+        return row[0] if row and row[0] else None
+
+    def set_last_synced_at(self, synced_at):
+        """
+        ハイウォーターマークを更新する
+
+        Args:
+            synced_at (str): 同期済みPRの最大updated_at（ISO形式）
+        """
+        self.conn.execute(
+            'INSERT OR REPLACE INTO sync_state (repo, last_synced_at) VALUES (?, ?)',
+            (self.repo_name, synced_at)
+        )
+        self.conn.commit()
+
+    def get_checkpoint(self):
+        """
+        中断した同期のチェックポイントを取得する
+
+        Returns:
+            dict: backend, updated_since, started_at, high_water_mark, progress（CrawlProgress）
+                  （中断した同期がない場合はNone）
+        """
+        row = self.conn.execute(
+            'SELECT backend, updated_since, started_at, high_water_mark, progress '
+            'FROM sync_checkpoint WHERE repo = ?', (self.repo_name,)
+        ).fetchone()
+        if row is None:
+            return None
+        backend, updated_since, started_at, high_water_mark, progress = row
+        progress = json.loads(progress)
+        return {
+            'backend': backend,
+            'updated_since': updated_since,
+            'started_at': started_at,
+            'high_water_mark': high_water_mark,
+            'progress': CrawlProgress(
+                progress['phase'], progress['page'], progress['cursor'], progress['reviewed_pr_numbers']
+            )
+        }
+
+    def save_checkpoint(self, checkpoint):
+        """
+        同期の進捗をチェックポイントとして保存する
+
+        Args:
+            checkpoint (dict): get_checkpoint と同じ形式
+        """
+        progress = checkpoint['progress']
+        self.conn.execute(
+            'INSERT OR REPLACE INTO sync_checkpoint '
+            '(repo, backend, updated_since, started_at, high_water_mark, progress) VALUES (?, ?, ?, ?, ?, ?)',
+            (self.repo_name, checkpoint['backend'], checkpoint['updated_since'], checkpoint['started_at'],
+             checkpoint['high_water_mark'], json.dumps({
+                 'phase': progress.phase,
+                 'page': progress.page,
+                 'cursor': progress.cursor,
+                 'reviewed_pr_numbers': sorted(progress.reviewed_pr_numbers)
+             }))
+        )
+        self.conn.commit()
+
+    def clear_checkpoint(self):
+        """同期が完了したらチェックポイントを削除する"""
+        self.conn.execute('DELETE FROM sync_checkpoint WHERE repo = ?', (self.repo_name,))
+        self.conn.commit()
+
+    def save_pull_requests(self, pr_records):
+        """
+        PRレコードを保存する（既存のPRは上書きする）
+
+        Args:
+            pr_records (list): PRレコード（PullRequestRecord）のリスト
+        """
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO pull_requests (repo, {', '.join(PR_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(PR_FIELDS) + 1))})",
+                [(self.repo_name, *record) for record in pr_records]
+            )
+
+    def save_comments(self, comment_records, replace_pr_numbers=(), replace_types=()):
+        """
+        コメントレコードを保存する（既存のコメントは上書きする）
+
+        保存されていないPR（PRの一覧を取得した後に作成されたPRなど）のコメントは保存しない。
+        コメント行はPRと結合して出力するため、保存すると集計インデックスの件数とずれる。
+
+        Args:
+            comment_records (list): コメントレコードのリスト
+            replace_pr_numbers (list): コメントを全件取得し直したPR番号
+            replace_types (list): 全件取得し直したコメントタイプ（既存のコメントを入れ替える）
+        """
+        known = self._saved_pull_request_numbers({record['pr_number'] for record in comment_records})
+        comment_records = [record for record in comment_records if record['pr_number'] in known]
+        with self.conn:
+            # 削除されたコメントを反映するため、全件取得し直したPRのコメントは入れ替える
+            self.conn.executemany(
+                'DELETE FROM comments WHERE repo = ? AND pr_number = ? AND comment_type = ?',
+                [(self.repo_name, pr_number, comment_type)
+                 for pr_number in replace_pr_numbers for comment_type in replace_types]
+            )
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO comments (repo, {', '.join(COMMENT_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(COMMENT_FIELDS) + 1))})",
+                [[self.repo_name] + [record[field] for field in COMMENT_FIELDS]
+                 for record in comment_records]
+            )
+
+    def _saved_pull_request_numbers(self, pr_numbers):
+        """pr_numbers のうち保存されているPRの番号"""
+        pr_numbers = sorted(pr_numbers)
+        saved = set()
+        # SQLiteの変数の数の上限（古いバージョンでは999）を超えないように分けて問い合わせる
+        for start in range(0, len(pr_numbers), 500):
+            chunk = pr_numbers[start:start + 500]
+            saved.update(row[0] for row in self.conn.execute(
+                f"SELECT pr_number FROM pull_requests WHERE repo = ? AND pr_number IN ({_placeholders(chunk)})",
+                [self.repo_name] + chunk
+            ))
+        return saved
+
+    def count_pull_request_comments(self, pr_number):
+        """
+        1つのPRの保存されているコメント数をタイプごとに数える
+
+        Args:
+            pr_number (int): PR番号
+
+        Returns:
+            dict: コメントタイプごとのコメント数
+        """
+        return dict(self.conn.execute(
+            'SELECT comment_type, COUNT(*) FROM comments WHERE repo = ? AND pr_number = ? GROUP BY comment_type',
+            (self.repo_name, pr_number)
+        ).fetchall())
+
+    def get_pull_request_records(self, comment_filter=None):
+        """
+        保存されている全PRのレコードを取得する
+
+        Args:
+            comment_filter (CommentFilter): 指定時は条件に一致するPRのみ
+
+        Returns:
+            list: PRレコード（PullRequestRecord）のリスト（PR番号の降順）
+        """
+        conditions, params = _filter_conditions(comment_filter, self.repo_name)
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(PR_FIELDS)} FROM pull_requests p "
+            f"WHERE {' AND '.join(['p.repo = ?'] + conditions)} ORDER BY p.pr_number DESC",
+            [self.repo_name] + params
+        )
+        return [PullRequestRecord._make(row) for row in cursor]
+
+    def iter_comment_rows(self, columns=COMMENT_COLUMNS, comment_filter=None):
+        """
+        PR情報を結合したコメント行を順に返す
+
+        Args:
+            columns (list): 出力する列
+            comment_filter (CommentFilter): 指定時は条件に一致するPR・コメントのみ
+
+        Yields:
+            dict: コメント行
+        """
+        order_case = ' '.join(
+            f"WHEN '{comment_type}' THEN {index}"
+            for index, comment_type in enumerate(COMMENT_TYPE_ORDER)
+        )
+        select_list = ', '.join(
+            f"p.{column}" if column in PR_FIELDS else f"c.{column}" for column in columns
+        )
+        conditions, params = _filter_conditions(comment_filter, self.repo_name, comments=True)
+        cursor = self.conn.execute(
+            f"SELECT {select_list} FROM comments c "
+            f"JOIN pull_requests p ON p.repo = c.repo AND p.pr_number = c.pr_number "
+            f"WHERE {' AND '.join(['c.repo = ?'] + conditions)} "
+            f"ORDER BY c.pr_number DESC, CASE c.comment_type {order_case} END, c.comment_id",
+            [self.repo_name] + params
+        )
+        for row in default_metrics.timed(cursor, 'store_read'):
+            yield dict(zip(columns, row))
+
+    def rebuild_index(self):
+        """保存されているコメント（全リポジトリ分）から集計インデックスを作成し直す"""
+        with self.conn:
+            self.conn.execute('DELETE FROM comment_index')
+            for dimension, column in INDEX_DIMENSIONS.items():
+                self.conn.execute(
+                    f"INSERT INTO comment_index (repo, dimension, bucket, key, comment_type, comment_count) "
+                    f"SELECT repo, ?, substr(COALESCE(comment_created_at, ''), 1, 10), "
+                    f"CAST({column} AS TEXT), comment_type, COUNT(*) FROM comments "
+                    f"WHERE COALESCE({column}, '') <> '' "
+                    f"GROUP BY repo, 3, 4, comment_type",
+                    (dimension,)
+                )
+            self.conn.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+
+    def query_index(self, group_by, since=None, until=None, comment_type=None, limit=None):
+        """
+        集計インデックスからコメント数を集計する（コメントを走査しない）
+
+        Args:
+            group_by (str): 集計の単位（INDEX_GROUPS のいずれか）
+            since (str): この日付（YYYY-MM-DD）以降に作成されたコメントのみ
+            until (str): この日付（YYYY-MM-DD）より前に作成されたコメントのみ
+            comment_type (str): このタイプのコメントのみ
+            limit (int): 返す件数の上限
+
+        Returns:
+            list: (キー, コメント数) のリスト（期間の場合は古い順、それ以外はコメント数の降順）
+        """
+        if group_by not in INDEX_GROUPS:
+            raise ValueError(f"不明な集計の単位です: {group_by}（指定可能: {', '.join(INDEX_GROUPS)}）")
+        # 期間ごとの件数は行数が最も少ないタイプの軸から数える
+        dimension = group_by if group_by in INDEX_DIMENSIONS else 'type'
+        if group_by in _PERIOD_EXPRESSIONS:
+            key_expression, order = _PERIOD_EXPRESSIONS[group_by], '1'
+        else:
+            key_expression, order = 'key', 'total DESC, 1'
+
+        conditions = ['repo = ?', 'dimension = ?']
+        params = [self.repo_name, dimension]
+        if since:
+            conditions.append('bucket >= ?')
+            params.append(since)
+        if until:
+            conditions.append('bucket < ?')
+            params.append(until)
+        if comment_type:
+            conditions.append('comment_type = ?')
+            params.append(comment_type)
+        query = (
+            f"SELECT {key_expression}, SUM(comment_count) AS total FROM comment_index "
+            f"WHERE {' AND '.join(conditions)} GROUP BY 1 ORDER BY {order}"
+        )
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        rows = self.conn.execute(query, params).fetchall()
+        if group_by == 'pr':
+            return [(int(key), count) for key, count in rows]
+        return rows
+
+    def count_summary(self, comment_filter=None):
+        """
+        ストアの内容からコメント数の集計結果を作成する（コメント数は集計インデックスから求める）
+
+        Args:
+            comment_filter (CommentFilter): 指定時は条件に一致するPR・コメントのみ（インデックスを使わずに数える）
+
+        Returns:
+            dict: 集計結果（count_pr_comments.pyと同じ形式）
+        """
+        if comment_filter:
+            total_prs = len(self.get_pull_request_records(comment_filter))
+            conditions, params = _filter_conditions(comment_filter, self.repo_name, comments=True)
+            matched = (
+                f"FROM comments c JOIN pull_requests p ON p.repo = c.repo AND p.pr_number = c.pr_number "
+                f"WHERE {' AND '.join(['c.repo = ?'] + conditions)}"
+            )
+            params = [self.repo_name] + params
+            type_counts = dict(self.conn.execute(
+                f"SELECT c.comment_type, COUNT(*) {matched} GROUP BY c.comment_type", params
+            ).fetchall())
+            prs_with_comments = self.conn.execute(
+                f"SELECT COUNT(DISTINCT c.pr_number) {matched}", params
+            ).fetchone()[0]
+        else:
+            total_prs = self.conn.execute(
+                'SELECT COUNT(*) FROM pull_requests WHERE repo = ?', (self.repo_name,)
+            ).fetchone()[0]
+            type_counts = dict(self.query_index('type'))
+            prs_with_comments = self.conn.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT key FROM comment_index WHERE repo = ? AND dimension = 'pr')",
+                (self.repo_name,)
+            ).fetchone()[0]
+
+        total_comments = sum(type_counts.values())
+        avg_comments_per_pr = round(total_comments / total_prs, 2) if total_prs > 0 else 0
+
+        return {
+            'total_prs': total_prs,
+            'total_comments': total_comments,
+            'review_comments': type_counts.get('review_comment', 0),
+            'reviews': type_counts.get('review', 0),
+            'issue_comments': type_counts.get('issue_comment', 0),
+            'avg_comments_per_pr': avg_comments_per_pr,
+            'prs_with_comments': prs_with_comments,
+            'prs_without_comments': total_prs - prs_with_comments
+        }
+
+
+def _utc_now():
+    """現在時刻（UTC、APIの日時に合わせて秒単位）"""
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _max_runtime_deadline():
+    """
+    PR_COMMENTS_MAX_RUNTIME 環境変数（分）から同期を打ち切る時刻を決める
+
+    Returns:
+        float: time.monotonic() の打ち切り時刻（指定がない場合はNone）
+    """
+    max_runtime = os.environ.get('PR_COMMENTS_MAX_RUNTIME')
+    if not max_runtime:
+        return None
+    return time.monotonic() + float(max_runtime) * 60
+
+
+def _next_batch(comment_records):
+    """
+    SAVE_BATCH_SIZE 件、または CHECKPOINT_INTERVAL 秒分のコメントレコードを受け取る
+
+    Returns:
+        tuple: (コメントレコードのリスト, 最後まで受け取ったかどうか)
+    """
+    batch = []
+    flush_at = time.monotonic() + CHECKPOINT_INTERVAL
+    for record in comment_records:
+        batch.append(record)
+        if len(batch) >= SAVE_BATCH_SIZE or time.monotonic() >= flush_at:
+            return batch, False
+    return batch, True
+
+
+def sync_store(client, store):
+    """
+    前回同期以降に更新されたPRとコメントだけを取得してストアにマージする
+
+    PRは更新日時の降順で取得し、ハイウォーターマークより古いPRに達した時点で打ち切る。
+    RESTではレビューコメントとIssueコメントをリポジトリ全体から since= で差分のみ取得する。
+    一覧エンドポイントには削除されたコメントが現れないため、レビュー以外の削除は反映されない
+    （必要な場合はストアを削除して全件同期し直す）。
+
+    取得したコメントは一定件数・一定時間ごとに保存し、同時に進捗をチェックポイントとして記録する。
+    同期がエラーで中断した場合や PR_COMMENTS_MAX_RUNTIME（分）を超えた場合は、
+    次回の実行でチェックポイントの続きから再開する。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        store (CommentStore): 同期先のストア
+
+    Returns:
+        SyncResult: 取得したPR数と、最後まで同期したかどうか（中断した場合、ストアの内容は途中までの状態）
+    """
+    last_synced_at = store.get_last_synced_at()
+    backend = get_backend()
+    deadline = _max_runtime_deadline()
+
+    checkpoint = store.get_checkpoint()
+    if checkpoint and checkpoint['backend'] != backend:
+        print(f"取得方法が変わったため、中断した同期（{checkpoint['backend']}）を破棄します")
+        checkpoint = None
+
+    resumed = checkpoint is not None
+    if resumed:
+        print(f"{checkpoint['started_at']} に開始して中断した同期を再開します")
+    else:
+        if last_synced_at:
+            print(f"前回同期: {last_synced_at} 以降に更新されたPRを取得します")
+        checkpoint = {
+            'backend': backend,
+            'updated_since': last_synced_at,
+            'started_at': _utc_now().isoformat(),
+            'high_water_mark': last_synced_at,
+            'progress': CrawlProgress()
+        }
+        store.save_checkpoint(checkpoint)
+
+    progress = checkpoint['progress']
+    start_position = progress.position()
+    pr_records, comment_records, complete_types = fetch_records(
+        client, updated_since=checkpoint['updated_since'], progress=progress
+    )
+    if resumed and backend == 'rest':
+        # RESTでは最初の保存で全PRのコメントを入れ替え済みのため、再開時に取得済みの分を消さない
+        complete_types = []
+
+    # コメントを SAVE_BATCH_SIZE 件ずつ保存し、保存するたびにチェックポイントを記録する
+    saved_prs = 0
+    while True:
+        batch, finished = _next_batch(comment_records)
+
+        # GraphQLでは反復中にPRが増えるため、新しく取得したPRを先に保存する
+        new_pr_records = pr_records[saved_prs:]
+        with default_metrics.phase('store_write', len(batch)):
+            store.save_pull_requests(new_pr_records)
+            store.save_comments(
+                batch,
+                replace_pr_numbers=[pr_record.pr_number for pr_record in new_pr_records],
+                replace_types=complete_types
+            )
+            saved_prs += len(new_pr_records)
+
+            checkpoint['high_water_mark'] = max(
+                [pr_record.pr_updated_at for pr_record in new_pr_records]
+                + [checkpoint['high_water_mark'] or '']
+            )
+            store.save_checkpoint(checkpoint)
+
+        if finished:
+            break
+        # 再開した位置より進んでから打ち切る（進まないまま中断を繰り返さないため）
+        if deadline and time.monotonic() >= deadline and progress.position() != start_position:
+            print("PR_COMMENTS_MAX_RUNTIME に達したため同期を中断しました（次回の実行で再開します）")
+            print(f"同期したPR数: {len(pr_records)}件（途中まで）")
+            return SyncResult(len(pr_records), False)
+
+    # 全PRの処理が終わってからハイウォーターマークを進める
+    high_water_mark = checkpoint['high_water_mark']
+    if resumed and high_water_mark:
+        # 中断中に更新されたPRは取得済みの範囲から漏れている可能性があるため、
+        # 中断前の開始時刻以降に更新されたPRは次回の同期で取得し直す
+        started_at = datetime.fromisoformat(checkpoint['started_at']) - CLOCK_SKEW_MARGIN
+        high_water_mark = max(min(high_water_mark, started_at.isoformat()), checkpoint['updated_since'] or '')
+    if high_water_mark:
+        store.set_last_synced_at(high_water_mark)
+    store.clear_checkpoint()
+
+    print(f"同期したPR数: {len(pr_records)}件")
+    return SyncResult(len(pr_records), True)
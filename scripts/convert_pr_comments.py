@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+中間成果物のArrow IPCファイル（pr_comments.arrow）をJSON・CSVなどの成果物に変換するスクリプト
+
+クロール時に PR_COMMENTS_OUTPUTS=arrow で保存したファイルをメモリマップで読み込み、
+レコードバッチごとに各シンクへ書き込む。APIは呼び出さないため、出力形式を変えて何度でも変換できる。
+
+使い方:
+    PR_COMMENTS_OUTPUTS=arrow python scripts/crawl_pr_comments.py
+    python scripts/convert_pr_comments.py                        # 既定の形式（集計結果・一覧・CSV）
+    python scripts/convert_pr_comments.py --outputs csv,parquet
+    PR_COMMENTS_COMPRESS=gzip python scripts/convert_pr_comments.py --outputs jsonl
+"""
+
+import argparse
+import os
+import sys
+
+from comment_sinks import (
+    ARROW_TOTAL_PRS_KEY, DEFAULT_OUTPUTS, HAS_PYARROW, PARQUET_INT_COLUMNS,
+    get_compression, validate_sink_names, write_to_sinks,
+)
+
+# 入力ファイルの既定値（ArrowSink の出力ファイル）
+DEFAULT_INPUT = 'pr_comments.arrow'
+
+
+def read_total_prs(reader):
+    """
+    Arrow IPCファイルの最後のバッチのメタデータからPR数を読み込む
+
+    Args:
+        reader (pyarrow.ipc.RecordBatchFileReader): Arrow IPCファイル
+
+    Returns:
+        int: PR数（記録がない場合は0）
+    """
+    if reader.num_record_batches == 0:
+        return 0
+    _, metadata = reader.get_batch_with_custom_metadata(reader.num_record_batches - 1)
+    if metadata is None or ARROW_TOTAL_PRS_KEY not in metadata:
+        return 0
+    return int(metadata[ARROW_TOTAL_PRS_KEY])
+
+
+def iter_arrow_rows(reader):
+    """
+    Arrow IPCファイルのコメント行をレコードバッチごとに読み込んで返す
+
+    バッチ全体を行の辞書のリストに変換せず、列ごとに値を取り出して1行ずつ組み立てる。
+    辞書エンコードした列は辞書をバッチごとに1回だけデコードし、各行は辞書の位置から値を引く
+    （同じ値の文字列を行ごとに作り直さない）。
+    REST・GraphQLで取得した行と同じく、レビューコメント以外の行番号は空文字に戻す。
+
+    Args:
+        reader (pyarrow.ipc.RecordBatchFileReader): Arrow IPCファイル
+
+    Yields:
+        dict: コメント行
+    """
+    names = reader.schema.names
+    int_columns = [column for column in names if column in PARQUET_INT_COLUMNS]
+    for index in range(reader.num_record_batches):
+        batch = reader.get_batch(index)
+        if batch.num_rows == 0:
+            continue
+        columns = [_column_values(batch.column(position)) for position in range(len(names))]
+        for values in zip(*columns):
+            row = dict(zip(names, values))
+            if row['comment_type'] != 'review_comment':
+                for column in int_columns:
+                    if row[column] is None:
+                        row[column] = ''
+            yield row
+
+
+def _column_values(array):
+    """
+    レコードバッチの列をPythonの値の列にする
+
+    辞書エンコードした列は辞書と位置を別々に変換し、位置から辞書の値を引く。
+
+    Args:
+        array (pyarrow.Array): レコードバッチの列
+
+    Returns:
+        list: 各行の値
+    """
+    if not hasattr(array, 'dictionary'):
+        return array.to_pylist()
+    dictionary = array.dictionary.to_pylist()
+    return [None if position is None else dictionary[position] for position in array.indices.to_pylist()]
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='Arrow IPCファイルをJSON・CSVなどの成果物に変換する')
+    parser.add_argument('input', nargs='?', default=DEFAULT_INPUT, help=f'入力ファイル（既定値: {DEFAULT_INPUT}）')
+    parser.add_argument('--outputs', help='出力する形式（カンマ区切り、省略時は PR_COMMENTS_OUTPUTS 環境変数）')
+    args = parser.parse_args()
+
+    if not HAS_PYARROW:
+        print("エラー: Arrow IPCファイルの読み込みには pyarrow が必要です（pip install pyarrow）")
+        sys.exit(1)
+    if not os.path.exists(args.input):
+        print(f"エラー: 入力ファイルがありません: {args.input}")
+        sys.exit(1)
+
+    output_names = args.outputs or os.environ.get('PR_COMMENTS_OUTPUTS') or ','.join(DEFAULT_OUTPUTS)
+    sink_names = [name.strip() for name in output_names.split(',') if name.strip()]
+    try:
+        validate_sink_names(sink_names)
+        compression = get_compression()
+    except ValueError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+    if 'arrow' in sink_names:
+        print("エラー: Arrow IPCファイルをArrow形式に変換することはできません。")
+        sys.exit(1)
+
+    import pyarrow
+
+    with pyarrow.memory_map(args.input) as source:
+        reader = pyarrow.ipc.open_file(source)
+        total_prs = read_total_prs(reader)
+        print(f"入力ファイル: {args.input}（{reader.num_record_batches}バッチ、PR {total_prs}件）")
+        write_to_sinks(sink_names, [], iter_arrow_rows(reader), reader.schema.names,
+                       compression=compression or 'none', total_prs=total_prs)
+
+    print("変換が完了しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,91 @@
 #!/usr/bin/env python3
 """
 GitHubリポジトリのPRコメント数を集計するスクリプト
+
+ローカルストアを使わない場合は、GraphQL APIのコメント数（totalCount）から集計し、
+コメントの本文は取得しない（レビューのみ本文の有無を確認するために取得する）。
+PR_COMMENTS_FILTER で投稿者（commenter:）を指定した場合は、コメント数から判定できないためコメントを取得して集計する。
 """
 
 import os
 import sys
 import json
-from github import Github
+from comment_filter import get_comment_filter
+from comment_sinks import CommentStats
+from comment_store import CommentStore, sync_store
+from github_client import GitHubClient
+from graphql_fetcher import iter_graphql_counts
+from http_cache import default_cache
+from metrics import default_metrics, report_run
+from pr_comment_fetcher import COMMENT_TYPE_ORDER, stream_all_pr_comments
+from rate_limiter import default_scheduler
 
-def count_pr_comments(github_token, repo_name):
+def count_pr_comments(github_token, repo_name, store_path=None):
     """
     リポジトリの全PRのコメント数を集計する
     
     Args:
         github_token (str): GitHub APIトークン
         repo_name (str): リポジトリ名 (owner/repo形式)
+        store_path (str): ローカルストアのパス（指定時は前回同期以降の差分のみ取得）
     
     Returns:
         dict: 集計結果
     """
-    g = Github(github_token)
-    repo = g.get_repo(repo_name)
+    client = GitHubClient(github_token, repo_name)
+    comment_filter = get_comment_filter()
     
-    # 集計用の変数
-    total_prs = 0
-    total_comments = 0
-    review_comments = 0
-    reviews = 0
-    issue_comments = 0
-    prs_with_comments = 0
-    prs_without_comments = 0
+    if store_path:
+        with CommentStore(store_path, repo_name) as store:
+            if not sync_store(client, store).complete:
+                default_metrics.complete = False
+            return store.count_summary(comment_filter)
     
-    # 全PRを取得
-    pull_requests = repo.get_pulls(state='all')
+    if comment_filter.commenters:
+        # 投稿者ごとのコメント数は totalCount から求められないため、コメントを取得して数える
+        pr_records, comment_rows = stream_all_pr_comments(client)
+        stats = CommentStats()
+        for row in comment_rows:
+            stats.add(row)
+        return stats.counts(len(pr_records))
     
-    for pr in pull_requests:
+    return count_from_totals(client, comment_filter)
+
+def count_from_totals(client, comment_filter=None):
+    """
+    PRごとのコメント数（GraphQLの totalCount）から集計する
+
+    リクエスト数はPR 100件ごとに1回程度で、コメントの本文は取得しない。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        comment_filter (CommentFilter): 絞り込み条件（投稿者の条件は適用しない）
+
+    Returns:
+        dict: 集計結果（ストア・コメント行から集計した場合と同じ形式）
+    """
+    total_prs = 0
+    prs_with_comments = 0
+    type_counts = {comment_type: 0 for comment_type in COMMENT_TYPE_ORDER}
+    counts = iter_graphql_counts(client, comment_filter)
+    for _, pr_counts in default_metrics.timed(counts, 'graphql_counts'):
         total_prs += 1
-        pr_comment_count = 0
-        
-        print(f"PR #{pr.number}: {pr.title}")
-        
-        # PRのレビューコメントを取得
-        pr_review_comments = list(pr.get_review_comments())
-        review_comments += len(pr_review_comments)
-        pr_comment_count += len(pr_review_comments)
-        
-        # PRのレビューを取得
-        pr_reviews = list(pr.get_reviews())
-        for review in pr_reviews:
-            if review.body:  # レビューコメントがある場合のみ
-                reviews += 1
-                pr_comment_count += 1
-        
-        # PRのissueコメントを取得
-        pr_issue_comments = list(pr.get_issue_comments())
-        issue_comments += len(pr_issue_comments)
-        pr_comment_count += len(pr_issue_comments)
-        
-        # PRの総コメント数を更新
-        total_comments += pr_comment_count
-        
-        # コメントの有無を記録
-        if pr_comment_count > 0:
+        for comment_type, count in pr_counts.items():
+            type_counts[comment_type] += count
+        if sum(pr_counts.values()):
             prs_with_comments += 1
-        else:
-            prs_without_comments += 1
-    
-    # 平均コメント数を計算
+
+    total_comments = sum(type_counts.values())
     avg_comments_per_pr = round(total_comments / total_prs, 2) if total_prs > 0 else 0
-    
     return {
         'total_prs': total_prs,
         'total_comments': total_comments,
-        'review_comments': review_comments,
-        'reviews': reviews,
-        'issue_comments': issue_comments,
+        'review_comments': type_counts['review_comment'],
+        'reviews': type_counts['review'],
+        'issue_comments': type_counts['issue_comment'],
         'avg_comments_per_pr': avg_comments_per_pr,
         'prs_with_comments': prs_with_comments,
-        'prs_without_comments': prs_without_comments
+        'prs_without_comments': total_prs - prs_with_comments
     }
 
 def save_counts_to_json(counts_data, output_file):
@@ -113,12 +121,24 @@ def main():
         print("エラー: GITHUB_REPOSITORY環境変数が設定されていません。")
         sys.exit(1)
     
+    # ローカルストアのパス（任意）
+    store_path = os.environ.get('PR_COMMENTS_STORE')
+    
+    # PR・コメントの絞り込み条件（PR_COMMENTS_FILTER、省略時は全件）
+    try:
+        comment_filter = get_comment_filter()
+    except ValueError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+    
     print(f"リポジトリ: {repo_name}")
+    if comment_filter:
+        print(f"絞り込み条件: {comment_filter.describe()}")
     print("PRコメント数の集計を開始します...")
     
     try:
         # コメント数を集計
-        counts_data = count_pr_comments(github_token, repo_name)
+        counts_data = count_pr_comments(github_token, repo_name, store_path)
         
         # JSONファイルに保存
         output_file = 'comment_counts.json'
@@ -146,6 +166,9 @@ def main():
         except Exception as json_error:
             print(f"JSONファイルの保存にも失敗しました: {json_error}")
             sys.exit(1)
+    finally:
+        # APIリクエスト数・レート制限・キャッシュのヒット数・フェーズごとの時間を表示し、メトリクスを出力
+        report_run(default_scheduler, default_cache)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
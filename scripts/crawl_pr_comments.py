@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+PRコメントを1回だけクロールし、集計結果・一覧・CSVをまとめて出力するスクリプト
+
+PR_COMMENTS_REPOSITORIES（リポジトリの一覧）または PR_COMMENTS_ORG（組織名）を指定すると、
+複数のリポジトリを並行してクロールし、repo 列を加えた1つの成果物に出力する。
+"""
+
+import os
+import sys
+from comment_filter import get_comment_filter
+from comment_sinks import DEFAULT_OUTPUTS, MULTI_REPO_COLUMNS, get_compression, validate_sink_names, write_to_sinks
+from comment_store import CommentStore, sync_store
+from event_delta import apply_event_delta, can_apply_event_delta, get_event_pull_request, get_sync_mode
+from github_client import GitHubClient
+from http_cache import default_cache
+from metrics import default_metrics, report_run
+from multi_repo_crawler import get_repository_names, iter_repository_rows, save_repo_summaries
+from pr_comment_fetcher import COMMENT_COLUMNS, stream_all_pr_comments
+from rate_limiter import default_scheduler
+
+def crawl_pr_comments(github_token, repo_name, sink_names, store_path=None):
+    """
+    リポジトリの全PRとコメントを1回のクロールで取得し、各形式で出力する
+
+    コメントは取得しながら各シンクに書き込むため、全件をメモリに保持しない。
+
+    Args:
+        github_token (str): GitHub APIトークン
+        repo_name (str): リポジトリ名 (owner/repo形式)
+        sink_names (list): 出力形式のリスト（comment_sinks.SINKS のキー）
+        store_path (str): ローカルストアのパス（指定時は前回同期以降の差分のみ取得）
+    """
+    client = GitHubClient(github_token, repo_name)
+
+    if store_path:
+        with CommentStore(store_path, repo_name) as store:
+            # PR_COMMENTS_SYNC_MODE=event では、イベントのPRだけを取得し直す
+            pull_request = get_event_pull_request() if get_sync_mode() == 'event' else None
+            if pull_request and can_apply_event_delta(store):
+                apply_event_delta(client, store, pull_request, sink_names)
+                return
+            if pull_request:
+                print("ストアが未同期または同期の途中のため、通常の同期を行います")
+            if not sync_store(client, store).complete:
+                # 途中まで同期したストアから出力するため、成果物も途中までの内容になる
+                default_metrics.complete = False
+            # ストアは全PRを同期し、絞り込み条件は出力する行に適用する
+            comment_filter = get_comment_filter()
+            write_to_sinks(sink_names, store.get_pull_request_records(comment_filter),
+                           store.iter_comment_rows(comment_filter=comment_filter))
+        return
+
+    pr_records, comment_rows = stream_all_pr_comments(client)
+    write_to_sinks(sink_names, pr_records, comment_rows)
+
+def set_step_output(name, value):
+    """GitHub Actions のステップの出力を設定する（GITHUB_OUTPUT がない場合は何もしない）"""
+    output_file = os.environ.get('GITHUB_OUTPUT')
+    if output_file:
+        with open(output_file, 'a', encoding='utf-8') as f:
+            f.write(f"{name}={value}\n")
+
+def crawl_repositories(client, repo_names, sink_names, store_path=None):
+    """
+    複数のリポジトリを並行してクロールし、1つの成果物とリポジトリごとの集計結果を出力する
+
+    Args:
+        client (GitHubClient): APIクライアント（全リポジトリで同時リクエスト数・レート制限を共有する）
+        repo_names (list): リポジトリ名 (owner/repo形式) のリスト
+        sink_names (list): 出力形式のリスト（comment_sinks.SINKS のキー）
+        store_path (str): ローカルストアのパス（指定時は前回同期以降の差分のみ取得）
+    """
+    pr_records = []
+    summaries = {}
+    comment_rows = iter_repository_rows(client, repo_names, pr_records, summaries, store_path)
+    write_to_sinks(sink_names, pr_records, comment_rows, MULTI_REPO_COLUMNS)
+    save_repo_summaries(summaries)
+
+def main():
+    """メイン関数"""
+    # GitHubトークンを取得
+    github_token = os.environ.get('GITHUB_TOKEN')
+    if not github_token:
+        print("エラー: GITHUB_TOKEN環境変数が設定されていません。")
+        sys.exit(1)
+
+    # 複数リポジトリのクロール（PR_COMMENTS_REPOSITORIES / PR_COMMENTS_ORG）かどうか
+    multi_repo = bool(os.environ.get('PR_COMMENTS_REPOSITORIES') or os.environ.get('PR_COMMENTS_ORG'))
+
+    # リポジトリ名を取得
+    repo_name = os.environ.get('GITHUB_REPOSITORY')
+    if not repo_name and not multi_repo:
+        print("エラー: GITHUB_REPOSITORY環境変数が設定されていません。")
+        sys.exit(1)
+
+    # ローカルストアのパス（任意）
+    store_path = os.environ.get('PR_COMMENTS_STORE')
+
+    # 出力する形式（カンマ区切り、省略時は DEFAULT_OUTPUTS）
+    output_names = os.environ.get('PR_COMMENTS_OUTPUTS') or ','.join(DEFAULT_OUTPUTS)
+    sink_names = [name.strip() for name in output_names.split(',') if name.strip()]
+    try:
+        validate_sink_names(sink_names)
+        # 成果物の圧縮形式（PR_COMMENTS_COMPRESS、省略時は圧縮しない）
+        get_compression()
+        sync_mode = get_sync_mode()
+        # PR・コメントの絞り込み条件（PR_COMMENTS_FILTER、省略時は全件）
+        comment_filter = get_comment_filter()
+    except ValueError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+
+    if not multi_repo:
+        print(f"リポジトリ: {repo_name}")
+    if comment_filter:
+        print(f"絞り込み条件: {comment_filter.describe()}")
+    if sync_mode == 'event' and (multi_repo or not store_path):
+        print("イベント駆動の差分更新は単一リポジトリでローカルストアを使う場合のみ有効です（通常の同期を行います）")
+    print("PRコメントのクロールを開始します...")
+
+    columns = MULTI_REPO_COLUMNS if multi_repo else COMMENT_COLUMNS
+    try:
+        if multi_repo:
+            # 複数のリポジトリを並行して取得し、1つの成果物に出力
+            client = GitHubClient(github_token, repo_name)
+            repo_names = get_repository_names(client)
+            print(f"リポジトリ数: {len(repo_names)}件")
+            crawl_repositories(client, repo_names, sink_names, store_path)
+        else:
+            # 1回のクロールで全PRとコメントを取得し、各形式で出力
+            crawl_pr_comments(github_token, repo_name, sink_names, store_path)
+
+        if default_metrics.complete:
+            print("クロールと出力が完了しました。")
+        else:
+            print("同期が途中のため、成果物は途中までの内容です（次回の実行で続きから再開します）。")
+        # ワークフローでは最後まで同期した場合のみ成果物をアップロードする
+        set_step_output('crawl_completed', 'true' if default_metrics.complete else 'false')
+
+    except Exception as e:
+        print(f"エラーが発生しました: {e}")
+        set_step_output('crawl_completed', 'false')
+        # エラーが発生しても空の成果物を出力
+        # （分割出力は前回のパーティションをすべて削除してしまうため、空にせず前回の内容を残す）
+        empty_sinks = [name for name in sink_names if name != 'partitions']
+        try:
+            if empty_sinks:
+                write_to_sinks(empty_sinks, [], [], columns)
+                print("空の成果物を出力しました。")
+        except Exception as output_error:
+            print(f"成果物の出力にも失敗しました: {output_error}")
+            sys.exit(1)
+    finally:
+        # APIリクエスト数・レート制限・キャッシュのヒット数・フェーズごとの時間を表示し、メトリクスを出力
+        report_run(default_scheduler, default_cache)
+
+if __name__ == "__main__":
+    main()
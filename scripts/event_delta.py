@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+pull_request イベントで変更されたPRだけをストアに取り込む差分更新
+
+PR_COMMENTS_SYNC_MODE=event の場合、GITHUB_EVENT_PATH のイベントからPRを読み込み、
+そのPRのレビュー・コメントだけをPR単位のエンドポイントから取得してストアの内容を入れ替えるため、
+1回のイベントで必要なAPIリクエストはリポジトリのPR数によらず一定になる。
+comment_counts.json はストアの集計インデックスから作成し直す（作業ディレクトリの前回の集計結果は使わない）。
+"""
+
+import json
+import os
+
+from comment_filter import get_comment_filter
+from comment_sinks import COMPRESSIONS, get_compression, save_counts, write_to_sinks
+from metrics import default_metrics
+from pr_comment_fetcher import COMMENT_TYPE_ORDER, fetch_pull_request_comment_records, pull_request_record
+
+# 同期の方法（PR_COMMENTS_SYNC_MODE 環境変数で選択）
+SYNC_MODES = ['full', 'event']
+
+# PRを含むイベント（GITHUB_EVENT_NAME）
+PULL_REQUEST_EVENTS = ['pull_request', 'pull_request_target']
+
+# コメント数の集計結果の出力ファイル
+COUNTS_FILE = 'comment_counts.json'
+
+
+def get_sync_mode():
+    """
+    PR_COMMENTS_SYNC_MODE 環境変数から同期の方法を決める
+
+    Returns:
+        str: 'full' または 'event'
+    """
+    mode = (os.environ.get('PR_COMMENTS_SYNC_MODE') or 'full').strip().lower()
+    if mode not in SYNC_MODES:
+        raise ValueError(f"PR_COMMENTS_SYNC_MODE は {' / '.join(SYNC_MODES)} のいずれかを指定してください: {mode}")
+    return mode
+
+
+def get_event_pull_request():
+    """
+    GITHUB_EVENT_PATH のイベントからPRを読み込む
+
+    Returns:
+        dict: イベントの pull_request（PRのイベントでない場合はNone）
+    """
+    if os.environ.get('GITHUB_EVENT_NAME') not in PULL_REQUEST_EVENTS:
+        return None
+    event_path = os.environ.get('GITHUB_EVENT_PATH')
+    if not event_path or not os.path.exists(event_path):
+        return None
+    with open(event_path, encoding='utf-8') as f:
+        return json.load(f).get('pull_request')
+
+
+def can_apply_event_delta(store):
+    """
+    ストアに差分を適用できるかどうか
+
+    一度も同期していないストアと、同期が中断したままのストアには差分を適用せず、通常の同期を行う。
+    """
+    return store.get_last_synced_at() is not None and store.get_checkpoint() is None
+
+
+def apply_event_delta(client, store, pull_request, sink_names):
+    """
+    イベントのPRだけを取得し直してストアに反映し、成果物を更新する
+
+    ストアのハイウォーターマークは進めない（他のPRの更新は次回の通常の同期で取得する）。
+    成果物はAPIを呼び出さずにストアから出力し直す（comment_counts.json はコメントを走査せずに集計インデックスから作成する）。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        store (CommentStore): 更新するストア
+        pull_request (dict): イベントの pull_request
+        sink_names (list): 出力形式のリスト（comment_sinks.SINKS のキー）
+    """
+    pr_record = pull_request_record(pull_request)
+    pr_number = pr_record.pr_number
+    print(f"イベントのPR #{pr_number} のみ更新します: {pr_record.pr_title}")
+
+    compression = get_compression()
+    comment_filter = get_comment_filter()
+    old_counts = store.count_pull_request_comments(pr_number)
+
+    with default_metrics.phase('event_fetch'):
+        records = fetch_pull_request_comment_records(client, pr_number)
+    with default_metrics.phase('store_write', len(records)):
+        store.save_pull_requests([pr_record])
+        # PRのコメントはすべて取得し直したため、削除されたコメントも反映される
+        store.save_comments(records, replace_pr_numbers=[pr_number], replace_types=COMMENT_TYPE_ORDER)
+    new_counts = store.count_pull_request_comments(pr_number)
+    print(f"PR #{pr_number}: コメント {sum(old_counts.values())}件 → {sum(new_counts.values())}件")
+
+    if 'counts' in sink_names:
+        save_counts(store.count_summary(comment_filter), COUNTS_FILE + COMPRESSIONS.get(compression, ''), compression)
+
+    other_sinks = [name for name in sink_names if name != 'counts']
+    if other_sinks:
+        write_to_sinks(other_sinks, store.get_pull_request_records(comment_filter),
+                       store.iter_comment_rows(comment_filter=comment_filter), compression=compression or 'none')
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+GitHub REST APIの軽量クライアント
+
+一覧系エンドポイントの生のレスポンス（dict）をページングしながら返す。
+PR_COMMENTS_HTTP_CACHE を指定するとGETのレスポンスを保存し、条件付きリクエストで再検証する。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from http_cache import default_cache
+from metrics import default_metrics, endpoint_name
+from rate_limiter import CORE_RESOURCE, default_scheduler
+
+# GitHub Actionsでは GITHUB_API_URL が設定される（GHESにも対応）
+DEFAULT_API_URL = 'https://api.github.com'
+
+PER_PAGE = 100
+
+# 検索APIで1つのクエリから取得できる件数の上限
+SEARCH_RESULT_LIMIT = 1000
+
+# 同時に送信するリクエスト数の既定値（セカンダリレート制限を避けるため控えめにする）
+DEFAULT_CONCURRENCY = 4
+
+# 1リクエストのタイムアウト秒数
+REQUEST_TIMEOUT = 60
+
+_NEXT_LINK_PATTERN = re.compile(r'<([^>]+)>;\s*rel="next"')
+_LAST_PAGE_PATTERN = re.compile(r'<([^>]+)>;\s*rel="last"')
+
+
+def windowed_map(executor, func, items, window):
+    """
+    executor.map と同様に結果を入力順に返すが、先行して実行するのは window 件までにする
+
+    すべてを一度に投入すると、消費が追いつかない間に結果がメモリに溜まるため。
+
+    Yields:
+        func(item) の結果（入力順）
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class GitHubClient:
+    """リポジトリ単位のGitHub REST APIクライアント"""
+
+    def __init__(self, token, repo_name, api_url=None, concurrency=None, scheduler=None, cache=None,
+                 metrics=None):
+        """
+        Args:
+            token (str): GitHub APIトークン
+            repo_name (str): リポジトリ名 (owner/repo形式)
+            api_url (str): APIのベースURL（省略時は GITHUB_API_URL 環境変数）
+            concurrency (int): 同時リクエスト数の上限（省略時は PR_COMMENTS_CONCURRENCY 環境変数）
+            scheduler (RequestScheduler): レート制限のスケジューラー（省略時はプロセス共通）
+            cache (ResponseCache): レスポンスキャッシュ（省略時はプロセス共通）
+            metrics (Metrics): リクエストを記録する計測（省略時はプロセス共通）
+        """
+        self.token = token
+        self.repo_name = repo_name
+        self.api_url = (api_url or os.environ.get('GITHUB_API_URL') or DEFAULT_API_URL).rstrip('/')
+        # GHESでは GraphQL のURLが /api/v3 配下ではないため、Actionsが設定する値を優先する
+        self.graphql_url = f"{self.api_url}/graphql"
+        if not api_url and os.environ.get('GITHUB_GRAPHQL_URL'):
+            self.graphql_url = os.environ['GITHUB_GRAPHQL_URL']
+        self.concurrency = max(1, int(
+            concurrency or os.environ.get('PR_COMMENTS_CONCURRENCY') or DEFAULT_CONCURRENCY
+        ))
+        # スレッド間で共有し、実際に送信中のリクエスト数を制限する
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self.scheduler = scheduler or default_scheduler
+        self.cache = cache or default_cache
+        self.metrics = metrics or default_metrics
+
+    def for_repo(self, repo_name):
+        """
+        同じトークン・同時リクエスト数の上限・スケジューラーを共有する別リポジトリのクライアントを作成する
+
+        複数のリポジトリを並行して取得する場合に、全体の同時リクエスト数を concurrency 以下に抑えるため。
+
+        Args:
+            repo_name (str): リポジトリ名 (owner/repo形式)
+
+        Returns:
+            GitHubClient: クライアント
+        """
+        client = GitHubClient(self.token, repo_name, self.api_url, self.concurrency,
+                              self.scheduler, self.cache, self.metrics)
+        client.graphql_url = self.graphql_url
+        client._slots = self._slots
+        return client
+
+    def request(self, url, params=None, data=None):
+        """
+        リクエストを送信する（data指定時はJSONをPOSTする）
+
+        Args:
+            url (str): パス（/repos/...）または絶対URL
+            params (dict): クエリパラメータ
+            data (dict): POSTするJSON
+
+        Returns:
+            tuple: (レスポンスのJSON, レスポンスヘッダー)
+        """
+        if url.startswith('/'):
+            url = self.api_url + url
+        # 検索APIとGraphQL APIはREST APIとは別にレート制限を数える
+        if url == self.graphql_url:
+            resource = 'graphql'
+        elif url.startswith(f"{self.api_url}/search/"):
+            resource = 'search'
+        else:
+            resource = CORE_RESOURCE
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+
+        req = urllib.request.Request(url, headers={
+            'Accept': 'application/vnd.github+json',
+            'Authorization': f"Bearer {self.token}",
+            'X-GitHub-Api-Version': '2022-11-28',
+            'User-Agent': 'pr-comments-tools'
+        })
+        if data is not None:
+            req.data = json.dumps(data).encode('utf-8')
+            req.add_header('Content-Type', 'application/json')
+        else:
+            # 保存済みのレスポンスがあれば条件付きリクエストにする
+            for name, value in self.cache.validators(url).items():
+                req.add_header(name, value)
+        endpoint = endpoint_name(url)
+        attempt = 0
+        while True:
+            self.scheduler.before_request(resource)
+            try:
+                with self._slots:
+                    # 同時リクエスト数の上限による待ち時間は含めない
+                    started = time.perf_counter()
+                    with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
+                        self.scheduler.update(response.headers, resource)
+                        body = response.read()
+                self.metrics.record_request(endpoint, response.status, len(body), time.perf_counter() - started)
+                if data is None:
+                    self.cache.put(url, response.headers, body)
+                return json.loads(body), response.headers
+            except urllib.error.HTTPError as e:
+                message = e.read()
+                self.metrics.record_request(endpoint, e.code, len(message), time.perf_counter() - started)
+                if e.code == 304:
+                    # 変更なし（レート制限を消費しない）ので保存済みの本文を使う
+                    self.scheduler.update(e.headers, resource)
+                    cached = self.cache.get(url)
+                    if cached is not None:
+                        body, link = cached
+                        del e.headers['Link']
+                        if link:
+                            e.headers['Link'] = link
+                        return json.loads(body), e.headers
+                    # 再検証中に削除された場合は条件なしで取得し直す
+                    req.remove_header('If-none-match')
+                    req.remove_header('If-modified-since')
+                    continue
+                message = message.decode('utf-8', errors='replace')
+                delay = self.scheduler.retry_delay(e.code, e.headers, attempt, message, resource)
+                if delay is None:
+                    raise
+                print(f"HTTP {e.code} のため{round(delay)}秒後に再試行します: {url}")
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                self.metrics.record_request(endpoint, 'error', 0, time.perf_counter() - started)
+                delay = self.scheduler.retry_delay(None, {}, attempt)
+                if delay is None:
+                    raise
+                print(f"通信エラー（{e}）のため{round(delay)}秒後に再試行します: {url}")
+            attempt += 1
+
+    def paginate(self, path, params=None, parallel=False, start_page=1, on_page=None):
+        """
+        一覧系エンドポイントをLinkヘッダーに従って全ページ取得する
+
+        Args:
+            path (str): リポジトリからの相対パス（例: /pulls）
+            params (dict): クエリパラメータ
+            parallel (bool): 2ページ目以降を並行して取得する（途中で打ち切らない場合のみ）
+            start_page (int): 取得を始めるページ番号（中断したクロールの再開用）
+            on_page (callable): ページの要素をすべて返し終えるたびにページ番号を渡して呼び出す
+
+        Yields:
+            dict: 一覧の各要素（ページ順）
+        """
+        return self.paginate_url(f"/repos/{self.repo_name}{path}", params, parallel, start_page, on_page)
+
+    def paginate_url(self, url, params=None, parallel=False, start_page=1, on_page=None):
+        """
+        リポジトリ以外のエンドポイントも含め、URL（/orgs/... など）を指定して全ページ取得する
+
+        引数と戻り値は paginate と同じ。
+        """
+        params = dict(params or {}, per_page=PER_PAGE)
+        if start_page > 1:
+            params['page'] = start_page
+
+        page = start_page
+        items, headers = self.request(url, params)
+        yield from items
+        if on_page:
+            on_page(page)
+
+        link = headers.get('Link', '')
+        last_match = _LAST_PAGE_PATTERN.search(link)
+        if parallel and last_match and self.concurrency > 1:
+            # 最終ページ番号が分かるので、残りのページをまとめて並行取得する
+            last_url = urllib.parse.urlparse(last_match.group(1))
+            last_query = dict(urllib.parse.parse_qsl(last_url.query))
+            page_urls = [
+                last_url._replace(query=urllib.parse.urlencode(dict(last_query, page=page))).geturl()
+                for page in range(start_page + 1, int(last_query['page']) + 1)
+            ]
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                pages = windowed_map(executor, self.request, page_urls, self.concurrency)
+                for page, (page_items, _) in enumerate(pages, start_page + 1):
+                    yield from page_items
+                    if on_page:
+                        on_page(page)
+            return
+
+        while True:
+            # 次ページのURLにはクエリパラメータが含まれている
+            match = _NEXT_LINK_PATTERN.search(link)
+            if not match:
+                break
+            page += 1
+            items, headers = self.request(match.group(1))
+            yield from items
+            if on_page:
+                on_page(page)
+            link = headers.get('Link', '')
+
+    def graphql(self, query, variables):
+        """
+        GraphQLクエリを実行する
+
+        Args:
+            query (str): GraphQLクエリ
+            variables (dict): クエリ変数
+
+        Returns:
+            dict: レスポンスの data
+        """
+        result, _ = self.request(self.graphql_url, data={'query': query, 'variables': variables})
+        if result.get('errors'):
+            messages = ', '.join(error.get('message', '') for error in result['errors'])
+            raise RuntimeError(f"GraphQLエラー: {messages}")
+        return result['data']
+
+    def get_org_repositories(self, org):
+        """組織のリポジトリ一覧を取得する（/orgs/{org}/repos）"""
+        return self.paginate_url(f"/orgs/{org}/repos", {'type': 'all', 'sort': 'full_name'}, parallel=True)
+
+    def get_pull_requests(self, state='all', sort='created', direction='desc'):
+        """リポジトリのPR一覧を取得する"""
+        return self.paginate('/pulls', {'state': state, 'sort': sort, 'direction': direction})
+
+    def search_pull_requests(self, query):
+        """
+        PRを検索する（/search/issues、作成日時の降順）
+
+        最初のページを取得して件数を確認してから、残りのページを順に取得する。
+        検索APIは SEARCH_RESULT_LIMIT 件を超える結果を返さないため、呼び出し側で件数を確認する。
+
+        Args:
+            query (str): 検索のクエリ（repo: と is:pr を含む）
+
+        Returns:
+            tuple: (一致した件数, 検索結果の要素のイテレーター)
+        """
+        result, headers = self.request('/search/issues', {
+            'q': query, 'sort': 'created', 'order': 'desc', 'per_page': PER_PAGE
+        })
+
+        def items():
+            yield from result['items']
+            link = headers.get('Link', '')
+            while True:
+                match = _NEXT_LINK_PATTERN.search(link)
+                if not match:
+                    return
+                page, page_headers = self.request(match.group(1))
+                yield from page['items']
+                link = page_headers.get('Link', '')
+
+        return result['total_count'], items()
+
+    def count_items(self, path, params=None):
+        """
+        一覧系エンドポイントの件数を1回のリクエストで求める
+
+        1ページ1件で取得し、Linkヘッダーの最終ページ番号を件数とする。
+
+        Args:
+            path (str): リポジトリからの相対パス（例: /pulls/comments）
+            params (dict): クエリパラメータ
+
+        Returns:
+            int: 件数
+        """
+        items, headers = self.request(f"/repos/{self.repo_name}{path}", dict(params or {}, per_page=1))
+        last_match = _LAST_PAGE_PATTERN.search(headers.get('Link', ''))
+        if not last_match:
+            return len(items)
+        last_query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(last_match.group(1)).query))
+        return int(last_query['page'])
+
+    def get_review_comments(self, since=None, start_page=1, on_page=None):
+        """リポジトリ全体のレビューコメントを取得する（/pulls/comments）"""
+        params = {'sort': 'created', 'direction': 'asc'}
+        if since:
+            params['since'] = since
+        return self.paginate('/pulls/comments', params, parallel=True, start_page=start_page, on_page=on_page)
+
+    def get_issue_comments(self, since=None, start_page=1, on_page=None):
+        """リポジトリ全体のIssue・PRコメントを取得する（/issues/comments）"""
+        params = {'sort': 'created', 'direction': 'asc'}
+        if since:
+            params['since'] = since
+        return self.paginate('/issues/comments', params, parallel=True, start_page=start_page, on_page=on_page)
+
+    def get_reviews(self, pr_number):
+        """PRのレビューを取得する"""
+        return self.paginate(f"/pulls/{pr_number}/reviews")
+
+    def get_pull_request_review_comments(self, pr_number):
+        """PRのレビューコメントを取得する（/pulls/{number}/comments）"""
+        return self.paginate(f"/pulls/{pr_number}/comments", {'sort': 'created', 'direction': 'asc'})
+
+    def get_pull_request_issue_comments(self, pr_number):
+        """PRへのIssueコメントを取得する（/issues/{number}/comments）"""
+        return self.paginate(f"/issues/{pr_number}/comments")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+GraphQL APIによるPRコメントの取得
+
+PRとそのレビュー・レビュースレッドのコメント・Issueコメントを1つのクエリで
+PR_BATCH_SIZE 件ずつまとめて取得する。1回のクエリに収まらなかったコメントは
+カーソルで続きを取得する。結果はREST版と同じPRレコード・コメントレコードで返す。
+絞り込み条件（comment_filter.py）のうち状態は states: で、日時・PR番号は並び順と打ち切りでAPIに渡し、
+それ以外は続きのクエリを送る前にPRレコードに適用する。
+"""
+
+from comment_filter import CommentFilter
+from pr_comment_fetcher import PullRequestRecord, to_isoformat
+
+# 1回のクエリで取得するPR数
+PR_BATCH_SIZE = 50
+
+# PRごとに最初のクエリで取得するレビュー・スレッド・コメント数
+NESTED_PAGE_SIZE = 50
+
+# スレッドごとに最初のクエリで取得するレビューコメント数
+THREAD_COMMENT_PAGE_SIZE = 20
+
+# 続きを取得する際の1ページの件数
+CONTINUATION_PAGE_SIZE = 100
+
+REVIEW_FIELDS = 'databaseId body submittedAt author { login }'
+
+REVIEW_COMMENT_FIELDS = 'databaseId body createdAt updatedAt author { login } line startLine'
+
+ISSUE_COMMENT_FIELDS = 'databaseId body createdAt updatedAt author { login }'
+
+THREAD_FIELDS = f"""
+    id path diffSide startDiffSide
+    comments(first: {THREAD_COMMENT_PAGE_SIZE}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ {REVIEW_COMMENT_FIELDS} }}
+    }}
+"""
+
+PULL_REQUESTS_QUERY = f"""
+query($owner: String!, $name: String!, $cursor: String, $orderField: IssueOrderField!,
+      $direction: OrderDirection!, $states: [PullRequestState!]) {{
+  repository(owner: $owner, name: $name) {{
+    pullRequests(first: {PR_BATCH_SIZE}, after: $cursor, states: $states,
+                 orderBy: {{field: $orderField, direction: $direction}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{
+        id number title state createdAt mergedAt updatedAt
+        author {{ login }}
+        reviews(first: {NESTED_PAGE_SIZE}) {{
+          pageInfo {{ hasNextPage endCursor }}
+          nodes {{ {REVIEW_FIELDS} }}
+        }}
+        reviewThreads(first: {NESTED_PAGE_SIZE}) {{
+          pageInfo {{ hasNextPage endCursor }}
+          nodes {{ {THREAD_FIELDS} }}
+        }}
+        comments(first: {NESTED_PAGE_SIZE}) {{
+          pageInfo {{ hasNextPage endCursor }}
+          nodes {{ {ISSUE_COMMENT_FIELDS} }}
+        }}
+      }}
+    }}
+  }}
+}}
+"""
+
+# コメント数のみを取得する場合に1回のクエリで取得するPR数（コメントの本文を取得しないため多くできる）
+COUNT_BATCH_SIZE = 100
+
+# コメント数のみを取得する場合のレビューの項目（本文の有無の判定と、レビューに含まれるレビューコメント数）
+COUNT_REVIEW_FIELDS = 'body comments { totalCount }'
+
+# PRごとのIssueコメント数は totalCount から求め、本文を確認する必要があるレビューのみノードを取得する
+# （PRの項目は絞り込み条件の判定に使う）
+COUNT_QUERY = f"""
+query($owner: String!, $name: String!, $cursor: String, $orderField: IssueOrderField!,
+      $direction: OrderDirection!, $states: [PullRequestState!]) {{
+  repository(owner: $owner, name: $name) {{
+    pullRequests(first: {COUNT_BATCH_SIZE}, after: $cursor, states: $states,
+                 orderBy: {{field: $orderField, direction: $direction}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{
+        id number title state createdAt mergedAt updatedAt
+        author {{ login }}
+        comments {{ totalCount }}
+        reviews(first: {NESTED_PAGE_SIZE}) {{
+          pageInfo {{ hasNextPage endCursor }}
+          nodes {{ {COUNT_REVIEW_FIELDS} }}
+        }}
+      }}
+    }}
+  }}
+}}
+"""
+
+# ノード（PRまたはスレッド）の接続の続きを取得するクエリ
+CONTINUATION_QUERY = """
+query($id: ID!, $cursor: String) {{
+  node(id: $id) {{
+    ... on {type_name} {{
+      {connection}(first: {page_size}, after: $cursor) {{
+        pageInfo {{ hasNextPage endCursor }}
+        nodes {{ {fields} }}
+      }}
+    }}
+  }}
+}}
+"""
+
+# 接続ごとの型名・フィールド名・取得する項目
+CONNECTIONS = {
+    'reviews': ('PullRequest', 'reviews', REVIEW_FIELDS),
+    'reviewThreads': ('PullRequest', 'reviewThreads', THREAD_FIELDS),
+    'comments': ('PullRequest', 'comments', ISSUE_COMMENT_FIELDS),
+    'threadComments': ('PullRequestReviewThread', 'comments', REVIEW_COMMENT_FIELDS),
+    'reviewCounts': ('PullRequest', 'reviews', COUNT_REVIEW_FIELDS),
+}
+
+
+def _login(author):
+    """作成者情報からログイン名を取り出す（削除済みユーザーはNone）"""
+    return author['login'] if author else ''
+
+
+def _fetch_remaining_nodes(client, node_id, connection_name, connection):
+    """
+    接続の最初のページに続くノードをすべて取得する
+
+    Args:
+        client (GitHubClient): APIクライアント
+        node_id (str): 接続を持つノードのID
+        connection_name (str): CONNECTIONS のキー
+        connection (dict): 最初のページ（pageInfo と nodes）
+
+    Returns:
+        list: 全ノード
+    """
+    nodes = list(connection['nodes'])
+    page_info = connection['pageInfo']
+    if not page_info['hasNextPage']:
+        return nodes
+
+    type_name, field_name, fields = CONNECTIONS[connection_name]
+    query = CONTINUATION_QUERY.format(
+        type_name=type_name, connection=field_name,
+        page_size=CONTINUATION_PAGE_SIZE, fields=fields
+    )
+    cursor = page_info['endCursor']
+    while cursor:
+        data = client.graphql(query, {'id': node_id, 'cursor': cursor})
+        page = data['node'][field_name]
+        nodes.extend(page['nodes'])
+        cursor = page['pageInfo']['endCursor'] if page['pageInfo']['hasNextPage'] else None
+    return nodes
+
+
+def pull_request_record(pr):
+    """
+    GraphQLのPRノードからPRレコードを作成する
+
+    Args:
+        pr (dict): PullRequestノード
+
+    Returns:
+        PullRequestRecord: PRレコード（REST版と同じ形式）
+    """
+    return PullRequestRecord(
+        pr_number=pr['number'],
+        pr_title=pr['title'],
+        # RESTではマージ済みもclosedになる
+        pr_state='open' if pr['state'] == 'OPEN' else 'closed',
+        pr_created_at=to_isoformat(pr['createdAt']),
+        pr_merged_at=to_isoformat(pr['mergedAt']),
+        pr_author=_login(pr['author']),
+        pr_updated_at=to_isoformat(pr['updatedAt'])
+    )
+
+
+def comment_records(client, pr):
+    """
+    GraphQLのPRノードからコメントレコードを作成する（続きのページも取得する）
+
+    Args:
+        client (GitHubClient): APIクライアント
+        pr (dict): PullRequestノード
+
+    Returns:
+        list: コメントレコードのリスト（REST版と同じ形式）
+    """
+    pr_number = pr['number']
+    records = []
+
+    # レビュースレッドのコメント（RESTのレビューコメント）
+    for thread in _fetch_remaining_nodes(client, pr['id'], 'reviewThreads', pr['reviewThreads']):
+        for comment in _fetch_remaining_nodes(client, thread['id'], 'threadComments', thread['comments']):
+            records.append({
+                'pr_number': pr_number,
+                'comment_type': 'review_comment',
+                'comment_id': comment['databaseId'],
+                'comment_body': comment['body'],
+                'comment_created_at': to_isoformat(comment['createdAt']),
+                'comment_updated_at': to_isoformat(comment['updatedAt']),
+                'comment_user': _login(comment['author']),
+                'comment_path': thread['path'],
+                'comment_line': comment['line'],
+                'comment_side': thread['diffSide'],
+                'comment_start_line': comment['startLine'],
+                'comment_start_side': thread['startDiffSide']
+            })
+
+    # PRのレビュー
+    for review in _fetch_remaining_nodes(client, pr['id'], 'reviews', pr['reviews']):
+        if review['body']:  # レビューコメントがある場合のみ
+            records.append({
+                'pr_number': pr_number,
+                'comment_type': 'review',
+                'comment_id': review['databaseId'],
+                'comment_body': review['body'],
+                'comment_created_at': to_isoformat(review['submittedAt']),
+                'comment_updated_at': to_isoformat(review['submittedAt']),
+                'comment_user': _login(review['author']),
+                'comment_path': '',
+                'comment_line': '',
+                'comment_side': '',
+                'comment_start_line': '',
+                'comment_start_side': ''
+            })
+
+    # PRのIssueコメント
+    for comment in _fetch_remaining_nodes(client, pr['id'], 'comments', pr['comments']):
+        records.append({
+            'pr_number': pr_number,
+            'comment_type': 'issue_comment',
+            'comment_id': comment['databaseId'],
+            'comment_body': comment['body'],
+            'comment_created_at': to_isoformat(comment['createdAt']),
+            'comment_updated_at': to_isoformat(comment['updatedAt']),
+            'comment_user': _login(comment['author']),
+            'comment_path': '',
+            'comment_line': '',
+            'comment_side': '',
+            'comment_start_line': '',
+            'comment_start_side': ''
+        })
+
+    return records
+
+
+def _query_variables(client, comment_filter, updated_since=None):
+    """PR一覧のクエリ変数（並び順と状態）と、打ち切りの判定に使う並び順を返す"""
+    owner, name = client.repo_name.split('/')
+    order = comment_filter.pull_request_order(updated_since)
+    sort, direction = order
+    variables = {
+        'owner': owner, 'name': name, 'cursor': None,
+        'orderField': 'UPDATED_AT' if sort == 'updated' else 'CREATED_AT',
+        'direction': direction.upper(),
+        'states': comment_filter.graphql_states(),
+    }
+    return variables, order
+
+
+def iter_graphql_records(client, pr_records, updated_since=None, progress=None, comment_filter=None):
+    """
+    GraphQL APIでPRとコメントを取得し、コメントレコードを順に返す
+
+    取得したPRのレコードは、そのPRのコメントレコードを返す前に pr_records に追加する。
+    絞り込み条件に一致しないPRは、コメントの続きを取得せずに読み飛ばす。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        pr_records (list): 取得したPRレコードを追加するリスト
+        updated_since (str): 指定時は更新日時の降順で取得し、この日時より古いPRで打ち切る
+        progress (CrawlProgress): 進捗（指定時は記録されたカーソルの続きから取得し、
+            PR_BATCH_SIZE 件のPRを返し終えるたびにカーソルを進める）
+        comment_filter (CommentFilter): 絞り込み条件（コメントの条件は適用しない）
+
+    Yields:
+        dict: コメントレコード（PRごと）
+    """
+    comment_filter = comment_filter or CommentFilter()
+    variables, order = _query_variables(client, comment_filter, updated_since)
+
+    cursor = progress.cursor if progress else None
+    while True:
+        data = client.graphql(PULL_REQUESTS_QUERY, dict(variables, cursor=cursor))
+        connection = data['repository']['pullRequests']
+
+        for pr in connection['nodes']:
+            pr_record = pull_request_record(pr)
+            if comment_filter.is_past_end(pr_record, order, updated_since):
+                return
+            if not comment_filter.matches_pull_request(pr_record):
+                continue
+
+            print(f"PR #{pr_record.pr_number}: {pr_record.pr_title}")
+            pr_records.append(pr_record)
+            yield from comment_records(client, pr)
+
+        if not connection['pageInfo']['hasNextPage']:
+            return
+        cursor = connection['pageInfo']['endCursor']
+        if progress:
+            progress.cursor = cursor
+
+
+def iter_graphql_counts(client, comment_filter=None):
+    """
+    GraphQL APIでPRごとのコメント数をタイプごとに取得する（コメントの本文は取得しない）
+
+    Issueコメント数は totalCount から求める。レビューは本文があるもののみ数えるため本文を取得し、
+    レビューコメント数は各レビューに含まれるコメントの totalCount の合計とする。
+    リクエスト数は COUNT_BATCH_SIZE 件のPRごとに1回（レビューが NESTED_PAGE_SIZE 件を超えるPRは追加で取得する）。
+    絞り込み条件のPRの条件とコメントタイプを適用する（投稿者はコメント数からは判定できないため適用しない）。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        comment_filter (CommentFilter): 絞り込み条件
+
+    Yields:
+        tuple: (PR番号, コメントタイプごとのコメント数)
+    """
+    comment_filter = comment_filter or CommentFilter()
+    variables, order = _query_variables(client, comment_filter)
+    cursor = None
+    while True:
+        data = client.graphql(COUNT_QUERY, dict(variables, cursor=cursor))
+        connection = data['repository']['pullRequests']
+
+        for pr in connection['nodes']:
+            pr_record = pull_request_record(pr)
+            if comment_filter.is_past_end(pr_record, order):
+                return
+            if not comment_filter.matches_pull_request(pr_record):
+                continue
+            reviews = _fetch_remaining_nodes(client, pr['id'], 'reviewCounts', pr['reviews'])
+            counts = {
+                'review_comment': sum(review['comments']['totalCount'] for review in reviews),
+                'review': sum(1 for review in reviews if review['body']),
+                'issue_comment': pr['comments']['totalCount'],
+            }
+            yield pr['number'], {
+                comment_type: count for comment_type, count in counts.items()
+                if comment_filter.includes_type(comment_type)
+            }
+
+        if not connection['pageInfo']['hasNextPage']:
+            return
+        cursor = connection['pageInfo']['endCursor']
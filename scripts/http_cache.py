@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+GitHub APIのレスポンスをETag / Last-Modified で再検証するディスクキャッシュ
+
+GETのレスポンスを URL ごとに SQLite に保存し、次回は If-None-Match /
+If-Modified-Since を付けて送信する。304 Not Modified はレート制限を消費しないため、
+変更のないページは保存済みの本文を使う。
+合計サイズが上限を超えたら、最後に使われた日時が古いものから削除する（LRU）。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# キャッシュの合計サイズの既定の上限（MB）
+DEFAULT_MAX_MB = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    link TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class ResponseCache:
+    """URLをキーにした条件付きリクエスト用のレスポンスキャッシュ"""
+
+    def __init__(self, db_path=None, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        """
+        Args:
+            db_path (str): SQLiteファイルのパス（Noneの場合はキャッシュしない）
+            max_bytes (int): 保存する本文の合計サイズの上限
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total_size = 0
+
+        # 実行結果の報告用
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        PR_COMMENTS_HTTP_CACHE / PR_COMMENTS_HTTP_CACHE_MAX_MB 環境変数からキャッシュを作成する
+
+        Returns:
+            ResponseCache: キャッシュ（パスの指定がない場合は無効）
+        """
+        max_mb = float(os.environ.get('PR_COMMENTS_HTTP_CACHE_MAX_MB') or DEFAULT_MAX_MB)
+        return cls(os.environ.get('PR_COMMENTS_HTTP_CACHE') or None, int(max_mb * 1024 * 1024))
+
+    @property
+    def enabled(self):
+        return self.db_path is not None
+
+    def _connect(self):
+        """初回使用時にデータベースを開く（ロック内で呼び出す）"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # 複数スレッドから使うため、アクセスはロックで直列化する
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+            self._total_size = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+        return self._conn
+
+    def validators(self, url):
+        """
+        保存済みのレスポンスの再検証用ヘッダーを返す
+
+        Args:
+            url (str): リクエストのURL
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since（保存がない場合は空）
+        """
+        if not self.enabled:
+            return {}
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return {}
+        etag, last_modified = row
+        if etag:
+            return {'If-None-Match': etag}
+        return {'If-Modified-Since': last_modified}
+
+    def get(self, url):
+        """
+        304 Not Modified を受けたURLの保存済みレスポンスを返す
+
+        Args:
+            url (str): リクエストのURL
+
+        Returns:
+            tuple: (本文のバイト列, Linkヘッダー)（保存がない場合はNone）
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT body, link FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+            self.hits += 1
+        return bytes(row[0]), row[1] or ''
+
+    def put(self, url, headers, body):
+        """
+        200のレスポンスを保存する（ETag / Last-Modified がない場合は保存しない）
+
+        Args:
+            url (str): リクエストのURL
+            headers: レスポンスヘッダー
+            body (bytes): レスポンスの本文
+        """
+        if not self.enabled:
+            return
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            self.misses += 1
+            if not (etag or last_modified) or len(body) > self.max_bytes:
+                return
+            conn = self._connect()
+            old = conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, link, body, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, headers.get('Link', ''), body, len(body), time.time())
+            )
+            self._total_size += len(body) - (old[0] if old else 0)
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """合計サイズが上限以下になるまで最後に使われた日時が古いものから削除する"""
+        while self._total_size > self.max_bytes:
+            rows = conn.execute(
+                "SELECT url, size FROM responses ORDER BY last_used LIMIT 100"
+            ).fetchall()
+            for url, size in rows:
+                if self._total_size <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total_size -= size
+                self.evictions += 1
+
+    def close(self):
+        """データベースを閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def report(self):
+        """キャッシュのヒット数・ミス数を表示する（無効の場合は何もしない）"""
+        if not self.enabled:
+            return
+        total = self.hits + self.misses
+        hit_rate = round(self.hits / total * 100, 1) if total else 0
+        print("\n=== HTTPキャッシュ ===")
+        print(f"ヒット（304）: {self.hits}件 / ミス: {self.misses}件（ヒット率: {hit_rate}%）")
+        print(f"キャッシュサイズ: {round(self._total_size / 1024 / 1024, 1)}MB"
+              f"（上限: {round(self.max_bytes / 1024 / 1024, 1)}MB、削除: {self.evictions}件）")
+
+
+# 同じプロセス内のクライアントで共有するキャッシュ（PR_COMMENTS_HTTP_CACHE 未指定時は無効）
+default_cache = ResponseCache.from_env()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+クロールの計測（フェーズごとの時間とエンドポイントごとのAPI呼び出し）
+
+HTTPリクエストはエンドポイントごとに回数・受信バイト数・時間・ステータスを記録し、
+取得・保存・出力の各フェーズは実際にそのフェーズの処理にかかった時間を記録する。
+実行の最後に集計を表示し、メトリクスをJSON（と任意でPrometheusのテキスト形式）で出力する。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from datetime import datetime
+
+# PR_COMMENTS_METRICS で指定する形式と出力ファイル
+METRICS_FILES = {
+    'json': 'pr_comments_metrics.json',
+    'prometheus': 'pr_comments_metrics.prom',
+}
+
+# PR_COMMENTS_METRICS を省略した場合に出力する形式
+DEFAULT_METRICS_FORMATS = ['json']
+
+_REPO_PATH_PATTERN = re.compile(r'^(?:/api/v3)?/repos/[^/]+/[^/]+')
+_NUMBER_SEGMENT_PATTERN = re.compile(r'/\d+(?=/|$)')
+
+
+def endpoint_name(url):
+    """
+    URLから集計用のエンドポイント名を求める
+
+    Args:
+        url (str): リクエストのURL
+
+    Returns:
+        str: エンドポイント名（例: pulls, pulls/comments, pulls/{number}/reviews, graphql）
+    """
+    path = urllib.parse.urlparse(url).path
+    if path.endswith('/graphql'):
+        return 'graphql'
+    path = _REPO_PATH_PATTERN.sub('', path)
+    path = _NUMBER_SEGMENT_PATTERN.sub('/{number}', path)
+    return path.strip('/') or '/'
+
+
+class Metrics:
+    """フェーズごとの時間とエンドポイントごとのAPI呼び出しを記録する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.endpoints = {}
+        self.phases = {}
+        # 同期を PR_COMMENTS_MAX_RUNTIME で中断し、成果物が途中までの内容の場合は False
+        self.complete = True
+
+    def record_request(self, endpoint, status, size, seconds):
+        """
+        HTTPリクエストを記録する
+
+        Args:
+            endpoint (str): エンドポイント名（endpoint_name の戻り値）
+            status: HTTPステータスコード（通信エラーの場合は 'error'）
+            size (int): 受信したレスポンス本文のバイト数
+            seconds (float): 送信から受信までの秒数
+        """
+        with self._lock:
+            entry = self.endpoints.setdefault(endpoint, {'requests': 0, 'bytes': 0, 'seconds': 0.0, 'statuses': {}})
+            entry['requests'] += 1
+            entry['bytes'] += size
+            entry['seconds'] += seconds
+            entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + 1
+
+    def add_phase_time(self, phase, seconds, items=0):
+        """フェーズの時間と処理件数を加算する"""
+        with self._lock:
+            entry = self.phases.setdefault(phase, {'seconds': 0.0, 'items': 0})
+            entry['seconds'] += seconds
+            entry['items'] += items
+
+    @contextmanager
+    def phase(self, phase, items=0):
+        """with ブロックの時間をフェーズの時間として記録する"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase_time(phase, time.perf_counter() - start, items)
+
+    def timed(self, iterable, phase):
+        """
+        イテラブルの要素を取り出すのにかかった時間をフェーズの時間として記録する
+
+        要素を受け取った側の処理時間は含めないため、取得と出力が交互に進んでも
+        それぞれのフェーズの時間を分けて計測できる。
+
+        Yields:
+            iterable の要素
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_phase_time(phase, time.perf_counter() - start)
+                return
+            self.add_phase_time(phase, time.perf_counter() - start, 1)
+            yield item
+
+    def to_dict(self, scheduler=None, cache=None):
+        """
+        メトリクスを辞書にする
+
+        Args:
+            scheduler (RequestScheduler): レート制限のスケジューラー（指定時は待機時間などを含める）
+            cache (ResponseCache): レスポンスキャッシュ（指定時はヒット数などを含める）
+
+        Returns:
+            dict: メトリクス
+        """
+        with self._lock:
+            metrics = {
+                'started_at': self.started_at.isoformat(),
+                'wall_seconds': round(time.perf_counter() - self._started, 3),
+                'complete': self.complete,
+                'phases': {
+                    name: {'seconds': round(entry['seconds'], 3), 'items': entry['items']}
+                    for name, entry in self.phases.items()
+                },
+                'endpoints': {
+                    name: dict(entry, seconds=round(entry['seconds'], 3), statuses=dict(entry['statuses']))
+                    for name, entry in sorted(self.endpoints.items())
+                },
+                'http': {
+                    'requests': sum(entry['requests'] for entry in self.endpoints.values()),
+                    'bytes': sum(entry['bytes'] for entry in self.endpoints.values()),
+                },
+            }
+        if scheduler is not None:
+            metrics['rate_limit'] = {
+                'retries': scheduler.retries,
+                'wait_seconds': round(scheduler.sleep_seconds, 3),
+                'remaining': scheduler.remaining,
+                'limit': scheduler.limit,
+                'resources': scheduler.rate_limit_summary(),
+            }
+        if cache is not None and cache.enabled:
+            metrics['http_cache'] = {
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'evictions': cache.evictions,
+            }
+        return metrics
+
+    def to_prometheus(self, scheduler=None, cache=None):
+        """
+        メトリクスをPrometheusのテキスト形式にする（node_exporter の textfile collector 向け）
+
+        Returns:
+            str: テキスト形式のメトリクス
+        """
+        metrics = self.to_dict(scheduler, cache)
+        lines = []
+
+        def add(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        add('pr_comments_wall_seconds', 'gauge', 'Wall time of the run.',
+            [({}, metrics['wall_seconds'])])
+        add('pr_comments_complete', 'gauge', 'Whether the outputs cover a finished sync (0 if interrupted).',
+            [({}, int(metrics['complete']))])
+        add('pr_comments_phase_seconds', 'gauge', 'Time spent in each phase.',
+            [({'phase': name}, entry['seconds']) for name, entry in metrics['phases'].items()])
+        add('pr_comments_phase_items', 'gauge', 'Items produced by each phase.',
+            [({'phase': name}, entry['items']) for name, entry in metrics['phases'].items()])
+        add('pr_comments_http_requests_total', 'counter', 'HTTP requests by endpoint and status.',
+            [({'endpoint': name, 'status': status}, count)
+             for name, entry in metrics['endpoints'].items() for status, count in entry['statuses'].items()])
+        add('pr_comments_http_response_bytes_total', 'counter', 'Response bytes received by endpoint.',
+            [({'endpoint': name}, entry['bytes']) for name, entry in metrics['endpoints'].items()])
+        add('pr_comments_http_request_seconds_total', 'counter', 'Time spent in HTTP requests by endpoint.',
+            [({'endpoint': name}, entry['seconds']) for name, entry in metrics['endpoints'].items()])
+        if 'rate_limit' in metrics:
+            rate_limit = metrics['rate_limit']
+            add('pr_comments_rate_limit_retries_total', 'counter', 'Retried requests.',
+                [({}, rate_limit['retries'])])
+            add('pr_comments_rate_limit_wait_seconds_total', 'counter', 'Time spent waiting for rate limits.',
+                [({}, rate_limit['wait_seconds'])])
+            if rate_limit['resources']:
+                add('pr_comments_rate_limit_remaining', 'gauge', 'Remaining requests in the rate limit window.',
+                    [({'resource': resource}, state['remaining'])
+                     for resource, state in rate_limit['resources'].items()])
+        if 'http_cache' in metrics:
+            add('pr_comments_http_cache_total', 'counter', 'HTTP cache lookups by result.',
+                [({'result': result}, metrics['http_cache'][result]) for result in ('hits', 'misses')])
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        """フェーズごとの時間とエンドポイントごとのリクエスト数を表示する"""
+        metrics = self.to_dict()
+        print("\n=== 計測 ===")
+        print(f"実行時間: {metrics['wall_seconds']}秒")
+        if metrics['phases']:
+            print("フェーズ別:")
+            for name, entry in sorted(metrics['phases'].items(), key=lambda x: x[1]['seconds'], reverse=True):
+                print(f"  - {name}: {entry['seconds']}秒（{entry['items']}件）")
+        if metrics['endpoints']:
+            print("エンドポイント別:")
+            for name, entry in sorted(metrics['endpoints'].items(), key=lambda x: x[1]['seconds'], reverse=True):
+                print(f"  - {name}: {entry['requests']}件、{round(entry['bytes'] / 1024, 1)}KB、{entry['seconds']}秒")
+
+
+def get_metrics_formats():
+    """
+    PR_COMMENTS_METRICS 環境変数から出力するメトリクスの形式を決める
+
+    Returns:
+        list: METRICS_FILES のキーのリスト（none の場合は空）
+    """
+    value = os.environ.get('PR_COMMENTS_METRICS')
+    if value is None:
+        return DEFAULT_METRICS_FORMATS
+    formats = [name.strip() for name in value.split(',') if name.strip() and name.strip() != 'none']
+    unknown = [name for name in formats if name not in METRICS_FILES]
+    if unknown:
+        raise ValueError(f"不明なメトリクスの形式です: {', '.join(unknown)}（指定可能: {', '.join(METRICS_FILES)}）")
+    return formats
+
+
+def write_metrics(metrics, scheduler=None, cache=None, formats=None):
+    """
+    メトリクスをファイルに出力する
+
+    Args:
+        metrics (Metrics): 計測結果
+        scheduler (RequestScheduler): レート制限のスケジューラー
+        cache (ResponseCache): レスポンスキャッシュ
+        formats (list): 出力する形式（省略時は PR_COMMENTS_METRICS 環境変数）
+    """
+    formats = get_metrics_formats() if formats is None else formats
+    for name in formats:
+        output_file = METRICS_FILES[name]
+        with open(output_file, 'w', encoding='utf-8') as f:
+            if name == 'json':
+                json.dump(metrics.to_dict(scheduler, cache), f, ensure_ascii=False, indent=2)
+            else:
+                f.write(metrics.to_prometheus(scheduler, cache))
+        print(f"メトリクスが保存されました: {output_file}")
+
+
+def report_run(scheduler, cache):
+    """
+    実行の最後にAPIリクエスト・キャッシュ・計測結果を表示し、メトリクスを出力する
+
+    Args:
+        scheduler (RequestScheduler): レート制限のスケジューラー
+        cache (ResponseCache): レスポンスキャッシュ
+    """
+    scheduler.report()
+    cache.report()
+    default_metrics.report()
+    try:
+        write_metrics(default_metrics, scheduler, cache)
+    except (OSError, ValueError) as e:
+        print(f"メトリクスの出力に失敗しました: {e}")
+
+
+# 同じプロセス内で共有する計測
+default_metrics = Metrics()
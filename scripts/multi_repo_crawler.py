@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+複数リポジトリ（組織全体）のPRコメントを並行してクロールする
+
+リポジトリごとにワーカースレッドで取得し、コメント行をキューで受け取って1つの成果物に書き込む。
+成果物にはリポジトリの指定順にまとめて書き込むため、並行数や取得の進み方によらず同じ内容になる。
+各ワーカーのクライアントはレート制限のスケジューラーと同時リクエスト数の上限を共有するため、
+並行して取得するリポジトリ数によらず、APIの使用量は1つのトークンの予算内に収まる。
+"""
+
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from comment_filter import get_comment_filter
+from comment_sinks import CommentStats
+from comment_store import CommentStore, sync_store
+from metrics import default_metrics
+from pr_comment_fetcher import stream_all_pr_comments
+
+# 同時に取得するリポジトリ数の既定値（PR_COMMENTS_REPO_CONCURRENCY で変更）
+DEFAULT_REPO_CONCURRENCY = 4
+
+# ワーカーが先行して取得できるコメント行の数（書き込みが追いつかない場合はワーカーが待つ）
+ROW_QUEUE_SIZE = 10000
+
+# キューの空きを待つ間に、書き込み側の中断を確認する間隔（秒）
+_QUEUE_POLL_INTERVAL = 1
+
+# リポジトリごとの集計結果の出力ファイル
+REPO_SUMMARY_FILE = 'repo_summaries.json'
+
+
+def get_repository_names(client):
+    """
+    PR_COMMENTS_REPOSITORIES / PR_COMMENTS_ORG 環境変数からクロールするリポジトリを決める
+
+    Args:
+        client (GitHubClient): APIクライアント（組織のリポジトリ一覧の取得に使う）
+
+    Returns:
+        list: リポジトリ名 (owner/repo形式) のリスト（どちらも指定がない場合はNone）
+    """
+    repositories = os.environ.get('PR_COMMENTS_REPOSITORIES')
+    if repositories:
+        # カンマ・空白・改行区切り（重複は除く）
+        return list(dict.fromkeys(name for name in re.split(r'[\s,]+', repositories) if name))
+
+    org = os.environ.get('PR_COMMENTS_ORG')
+    if org:
+        print(f"組織 {org} のリポジトリ一覧を取得しています...")
+        return [repo['full_name'] for repo in client.get_org_repositories(org)]
+
+    return None
+
+
+def get_repo_concurrency():
+    """同時に取得するリポジトリ数（PR_COMMENTS_REPO_CONCURRENCY 環境変数）"""
+    return max(1, int(os.environ.get('PR_COMMENTS_REPO_CONCURRENCY') or DEFAULT_REPO_CONCURRENCY))
+
+
+class _RepositoryDone:
+    """ワーカーがリポジトリの取得を終えたことを書き込み側に伝える"""
+
+    def __init__(self, repo_name, pr_records, error=None):
+        self.repo_name = repo_name
+        self.pr_records = pr_records
+        self.error = error
+
+
+class _Cancelled(Exception):
+    """書き込み側が中断したためワーカーを止める"""
+
+
+def _put(row_queue, item, cancelled):
+    """キューの空きを待って追加する（書き込み側が中断した場合は _Cancelled を送出する）"""
+    while True:
+        try:
+            row_queue.put(item, timeout=_QUEUE_POLL_INTERVAL)
+            return
+        except queue.Full:
+            if cancelled.is_set():
+                raise _Cancelled()
+
+
+def _crawl_repository(client, repo_name, store_path, row_queue, cancelled):
+    """
+    1つのリポジトリのコメント行を取得してキューに追加する（ワーカースレッドで実行する）
+
+    Args:
+        client (GitHubClient): 共有するAPIクライアント
+        repo_name (str): リポジトリ名 (owner/repo形式)
+        store_path (str): ローカルストアのパス（指定時は前回同期以降の差分のみ取得）
+        row_queue (queue.Queue): コメント行と完了通知を渡すキュー
+        cancelled (threading.Event): 書き込み側が中断したかどうか
+    """
+    if cancelled.is_set():
+        return
+    pr_records = []
+    try:
+        repo_client = client.for_repo(repo_name)
+        if store_path:
+            # SQLiteの接続はスレッドごとに開く
+            with CommentStore(store_path, repo_name) as store:
+                if not sync_store(repo_client, store).complete:
+                    default_metrics.complete = False
+                comment_filter = get_comment_filter()
+                pr_records = store.get_pull_request_records(comment_filter)
+                for row in store.iter_comment_rows(comment_filter=comment_filter):
+                    _put(row_queue, dict(row, repo=repo_name), cancelled)
+        else:
+            pr_records, comment_rows = stream_all_pr_comments(repo_client)
+            for row in comment_rows:
+                _put(row_queue, dict(row, repo=repo_name), cancelled)
+    except _Cancelled:
+        return
+    except Exception as e:
+        _put(row_queue, _RepositoryDone(repo_name, pr_records, e), cancelled)
+        return
+    _put(row_queue, _RepositoryDone(repo_name, pr_records), cancelled)
+
+
+def iter_repository_rows(client, repo_names, pr_records, summaries, store_path=None, concurrency=None):
+    """
+    複数のリポジトリを並行して取得し、repo 列を加えたコメント行をリポジトリの指定順に返す
+
+    行は repo_names の順にリポジトリごとにまとめて返す（リポジトリ内は単独で取得した場合と同じ順）。
+    出力中のリポジトリの行はそのまま返し、先に取得が進んだ他のリポジトリの行は
+    出力の順番が来るまで一時ファイルに書き出しておく（ワーカーは書き込みを待たずに取得を続ける）。
+    取得に失敗したリポジトリは summaries に error を記録し、他のリポジトリの取得を続ける。
+
+    Args:
+        client (GitHubClient): APIクライアント（各リポジトリのクライアントが同時リクエスト数を共有する）
+        repo_names (list): リポジトリ名のリスト（出力する順）
+        pr_records (list): 出力を終えたリポジトリのPRレコードを追加するリスト
+        summaries (dict): リポジトリ名ごとの集計結果を格納する辞書
+        store_path (str): ローカルストアのパス（指定時は前回同期以降の差分のみ取得）
+        concurrency (int): 同時に取得するリポジトリ数（省略時は PR_COMMENTS_REPO_CONCURRENCY 環境変数）
+
+    Yields:
+        dict: コメント行（MULTI_REPO_COLUMNS の列を含む）
+    """
+    concurrency = concurrency or get_repo_concurrency()
+    row_queue = queue.Queue(ROW_QUEUE_SIZE)
+    cancelled = threading.Event()
+    # 出力の順番が来ていないリポジトリの行の一時ファイルと、取得を終えたリポジトリの完了通知
+    buffers = {}
+    finished = {}
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        for repo_name in repo_names:
+            executor.submit(_crawl_repository, client, repo_name, store_path, row_queue, cancelled)
+
+        for position, repo_name in enumerate(repo_names):
+            stats = CommentStats()
+            buffer = buffers.pop(repo_name, None)
+            if buffer is not None:
+                buffer.seek(0)
+                for line in buffer:
+                    row = json.loads(line)
+                    stats.add(row)
+                    yield row
+                buffer.close()
+
+            while repo_name not in finished:
+                item = row_queue.get()
+                if isinstance(item, _RepositoryDone):
+                    finished[item.repo_name] = item
+                elif item['repo'] == repo_name:
+                    stats.add(item)
+                    yield item
+                else:
+                    if item['repo'] not in buffers:
+                        buffers[item['repo']] = tempfile.TemporaryFile('w+', encoding='utf-8')
+                    buffers[item['repo']].write(json.dumps(item, ensure_ascii=False) + '\n')
+
+            done = finished.pop(repo_name)
+            remaining = len(repo_names) - position - 1
+            pr_records.extend(done.pr_records)
+            summary = {'repo': repo_name}
+            summary.update(stats.counts(len(done.pr_records)))
+            if done.error is not None:
+                summary['error'] = str(done.error)
+                print(f"[{repo_name}] 取得に失敗しました: {done.error}")
+            else:
+                print(f"[{repo_name}] 取得が完了しました"
+                      f"（PR {summary['total_prs']}件、コメント {summary['total_comments']}件）"
+                      f"（残り {remaining}リポジトリ）")
+            summaries[repo_name] = summary
+    finally:
+        # 書き込み側が中断した場合は、待機中のワーカーと未着手のリポジトリを止める
+        cancelled.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        for buffer in buffers.values():
+            buffer.close()
+
+
+def save_repo_summaries(summaries, output_file=REPO_SUMMARY_FILE):
+    """
+    リポジトリごとの集計結果をJSONファイルに保存する
+
+    Args:
+        summaries (dict): リポジトリ名ごとの集計結果
+        output_file (str): 出力ファイル名
+    """
+    repo_summaries = [summaries[repo_name] for repo_name in sorted(summaries)]
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(repo_summaries, f, ensure_ascii=False, indent=2)
+
+    print(f"\nリポジトリごとの集計結果が保存されました: {output_file}")
+    failed = [summary for summary in repo_summaries if 'error' in summary]
+    print(f"リポジトリ数: {len(repo_summaries)}件（失敗: {len(failed)}件）")
+    print("コメント数の多いリポジトリ（上位10件）:")
+    for summary in sorted(repo_summaries, key=lambda x: x['total_comments'], reverse=True)[:10]:
+        print(f"  - {summary['repo']}: {summary['total_comments']}件（PR {summary['total_prs']}件）")
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+PRコメントの取得エンジン
+
+レビューコメントとIssueコメントはリポジトリ全体の一覧エンドポイント
+（/pulls/comments, /issues/comments）からまとめて取得し、PR番号でローカルに結合する。
+PR単位で取得するのはレビュー（/pulls/{number}/reviews）のみで、複数のPRを並行して取得する。
+コメントは取得しながら一定件数ずつ並べ替えて一時ファイルに書き出し、マージして返す（全件をメモリに保持しない）。
+すべての値は一覧のレスポンスに含まれているため、PRやコメントごとに追加のリクエストは送信しない。
+PR_COMMENTS_BACKEND=graphql の場合はGraphQL API（graphql_fetcher.py）で取得する。
+
+PR_COMMENTS_FILTER（comment_filter.py）で絞り込む場合は、条件をPR一覧・検索・コメント一覧の
+パラメータに渡し、絞り込んだPRが少なければコメントもPR単位のエンドポイントから取得する。
+"""
+
+import heapq
+import json
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from comment_filter import CommentFilter, get_comment_filter
+from github_client import PER_PAGE, SEARCH_RESULT_LIMIT, windowed_map
+from metrics import default_metrics
+
+# エクスポートする列（CSVの列構成と同じ順序）
+COMMENT_COLUMNS = [
+    'pr_number', 'pr_title', 'pr_state', 'pr_created_at', 'pr_merged_at',
+    'pr_author', 'comment_type', 'comment_id', 'comment_body', 'comment_created_at',
+    'comment_updated_at', 'comment_user', 'comment_path', 'comment_line',
+    'comment_side', 'comment_start_line', 'comment_start_side'
+]
+
+# PRの情報（一覧のレスポンスから1回だけ取り出し、そのPRのすべてのコメント行で共有する）
+PullRequestRecord = namedtuple('PullRequestRecord', [
+    'pr_number', 'pr_title', 'pr_state', 'pr_created_at', 'pr_merged_at',
+    'pr_author', 'pr_updated_at'
+])
+
+# PRごとのコメントの並び順（レビューコメント → レビュー → Issueコメント）
+COMMENT_TYPE_ORDER = ['review_comment', 'review', 'issue_comment']
+
+# 取得方法（PR_COMMENTS_BACKEND 環境変数で選択）
+BACKENDS = ['rest', 'graphql']
+
+# コメントレコードの並べ替えでメモリに保持する件数（この件数ごとに並べ替えて一時ファイルに書き出す）
+SORT_BUFFER_SIZE = 10000
+
+
+class CrawlProgress:
+    """
+    クロールの進捗（中断したクロールを再開するためのチェックポイント）
+
+    取得側はコメントレコードを返し終えた単位（ページ・PR）ごとに進捗を進める。
+    そのため、反復で受け取ったレコードを保存した時点の進捗を記録すれば、
+    再開時にその単位より前を取得し直す必要はない。
+    """
+
+    def __init__(self, phase=COMMENT_TYPE_ORDER[0], page=0, cursor=None, reviewed_pr_numbers=()):
+        """
+        Args:
+            phase (str): 取得中のコメントタイプ（RESTのみ、COMMENT_TYPE_ORDER の順に進む）
+            page (int): 一括取得のフェーズで返し終えたページ番号
+            cursor (str): GraphQLで返し終えたPRのカーソル
+            reviewed_pr_numbers (iterable): レビューを返し終えたPR番号
+        """
+        self.phase = phase
+        self.page = page
+        self.cursor = cursor
+        self.reviewed_pr_numbers = set(reviewed_pr_numbers)
+
+    def start_phase(self, phase):
+        """次のコメントタイプの取得に進む"""
+        self.phase = phase
+        self.page = 0
+
+    def is_done(self, phase):
+        """コメントタイプの取得が終わっているかどうか"""
+        return COMMENT_TYPE_ORDER.index(self.phase) > COMMENT_TYPE_ORDER.index(phase)
+
+    def set_page(self, page):
+        self.page = page
+
+    def position(self):
+        """進捗を比較するための値（取得が進んだかどうかの判定用）"""
+        return (COMMENT_TYPE_ORDER.index(self.phase), self.page, self.cursor, len(self.reviewed_pr_numbers))
+
+
+def to_isoformat(value):
+    """
+    APIの日時文字列（2024-01-01T00:00:00Z）をISO形式（+00:00）に揃える
+
+    Args:
+        value (str): APIの日時文字列
+
+    Returns:
+        str: ISO形式の日時文字列（値がない場合は空文字）
+    """
+    if not value:
+        return ''
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+
+
+def _login(user):
+    """ユーザー情報からログイン名を取り出す"""
+    return user['login'] if user else ''
+
+
+def _number_from_url(url):
+    """APIのURL末尾からPR番号を取り出す（.../pulls/123, .../issues/123）"""
+    return int(url.rstrip('/').rsplit('/', 1)[1])
+
+
+def pull_request_record(pr):
+    """
+    PR一覧のレスポンスからPRレコードを作成する
+
+    Args:
+        pr (dict): /pulls のレスポンスの要素
+
+    Returns:
+        PullRequestRecord: PRレコード
+    """
+    return PullRequestRecord(
+        pr_number=pr['number'],
+        pr_title=pr['title'],
+        pr_state=pr['state'],
+        pr_created_at=to_isoformat(pr['created_at']),
+        pr_merged_at=to_isoformat(pr.get('merged_at')),
+        pr_author=_login(pr.get('user')),
+        pr_updated_at=to_isoformat(pr['updated_at'])
+    )
+
+
+def review_comment_record(comment):
+    """レビューコメントのレスポンスからコメントレコードを作成する"""
+    return {
+        'pr_number': _number_from_url(comment['pull_request_url']),
+        'comment_type': 'review_comment',
+        'comment_id': comment['id'],
+        'comment_body': comment['body'],
+        'comment_created_at': to_isoformat(comment['created_at']),
+        'comment_updated_at': to_isoformat(comment['updated_at']),
+        'comment_user': _login(comment.get('user')),
+        'comment_path': comment.get('path'),
+        'comment_line': comment.get('line'),
+        'comment_side': comment.get('side'),
+        'comment_start_line': comment.get('start_line'),
+        'comment_start_side': comment.get('start_side')
+    }
+
+
+def review_record(pr_number, review):
+    """レビューのレスポンスからコメントレコードを作成する"""
+    return {
+        'pr_number': pr_number,
+        'comment_type': 'review',
+        'comment_id': review['id'],
+        'comment_body': review['body'],
+        'comment_created_at': to_isoformat(review.get('submitted_at')),
+        'comment_updated_at': to_isoformat(review.get('submitted_at')),
+        'comment_user': _login(review.get('user')),
+        'comment_path': '',
+        'comment_line': '',
+        'comment_side': '',
+        'comment_start_line': '',
+        'comment_start_side': ''
+    }
+
+
+def issue_comment_record(comment):
+    """Issueコメントのレスポンスからコメントレコードを作成する"""
+    return {
+        'pr_number': _number_from_url(comment['issue_url']),
+        'comment_type': 'issue_comment',
+        'comment_id': comment['id'],
+        'comment_body': comment['body'],
+        'comment_created_at': to_isoformat(comment['created_at']),
+        'comment_updated_at': to_isoformat(comment['updated_at']),
+        'comment_user': _login(comment.get('user')),
+        'comment_path': '',
+        'comment_line': '',
+        'comment_side': '',
+        'comment_start_line': '',
+        'comment_start_side': ''
+    }
+
+
+def _is_pull_request_comment(comment):
+    """/issues/comments の要素がPRへのコメントかどうか"""
+    return '/pull/' in comment.get('html_url', '')
+
+
+def _fetch_review_records(client, pr_number):
+    """PRのレビューのうち本文があるものをコメントレコードにする"""
+    return [
+        review_record(pr_number, review)
+        for review in client.get_reviews(pr_number)
+        if review['body']  # レビューコメントがある場合のみ
+    ]
+
+
+def fetch_pull_request_comment_records(client, pr_number):
+    """
+    1つのPRのコメントレコードをPR単位のエンドポイントからすべて取得する
+
+    イベントで更新されたPRだけを取得し直す場合に使う（取得方法の設定によらずREST APIで取得する）。
+    3つのエンドポイントは並行して取得する。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        pr_number (int): PR番号
+
+    Returns:
+        list: コメントレコードのリスト（レビューコメント → レビュー → Issueコメントの順）
+    """
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        review_comments = executor.submit(
+            lambda: [review_comment_record(comment) for comment in client.get_pull_request_review_comments(pr_number)]
+        )
+        reviews = executor.submit(_fetch_review_records, client, pr_number)
+        issue_comments = executor.submit(
+            lambda: [issue_comment_record(comment) for comment in client.get_pull_request_issue_comments(pr_number)]
+        )
+        return review_comments.result() + reviews.result() + issue_comments.result()
+
+
+def _fetch_pull_request_records(client, pr_number, comment_types):
+    """PR単位のエンドポイントから、指定したタイプのコメントレコードを取得する"""
+    records = []
+    if 'review_comment' in comment_types:
+        records.extend(review_comment_record(comment) for comment in client.get_pull_request_review_comments(pr_number))
+    if 'review' in comment_types:
+        records.extend(_fetch_review_records(client, pr_number))
+    if 'issue_comment' in comment_types:
+        records.extend(issue_comment_record(comment) for comment in client.get_pull_request_issue_comments(pr_number))
+    return records
+
+
+def iter_pull_request_comment_records(client, pr_numbers, comment_types=COMMENT_TYPE_ORDER):
+    """
+    指定したPRのコメントレコードをPR単位のエンドポイントから取得しながら順に返す
+
+    絞り込んだPRが少なく、リポジトリ全体のコメント一覧を取得するよりリクエストが少ない場合に使う。
+    PRは client.concurrency 件まで並行して取得するが、結果の順序は実行ごとに変わらない。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        pr_numbers (list): PR番号
+        comment_types (list): 取得するコメントタイプ
+
+    Yields:
+        dict: コメントレコード（PRごと）
+    """
+    with ThreadPoolExecutor(max_workers=client.concurrency) as executor:
+        results = windowed_map(executor, lambda pr_number: _fetch_pull_request_records(client, pr_number, comment_types),
+                               pr_numbers, client.concurrency)
+        for records in default_metrics.timed(results, 'pull_request_comments'):
+            yield from records
+
+
+def _resume_page(progress, phase):
+    """
+    一括取得のフェーズを再開するページ番号
+
+    返し終えたページから取得し直す（途中で削除されたコメントでページがずれても取りこぼさないため）。
+    """
+    return max(1, progress.page) if progress.phase == phase else 1
+
+
+def iter_comment_records(client, review_pr_numbers, since=None, progress=None, comment_types=COMMENT_TYPE_ORDER):
+    """
+    コメントレコードを取得しながら順に返す
+
+    レビューコメントとIssueコメントはリポジトリ全体から一括取得し、
+    レビューは指定されたPRについてのみPR単位で取得する。
+    レビューは client.concurrency 件まで並行して取得するが、結果の順序は実行ごとに変わらない。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        review_pr_numbers (list): レビューを取得するPR番号
+        since (str): 指定時はこの日時以降に更新されたコメントのみ取得する
+        progress (CrawlProgress): 進捗（指定時はその続きから取得し、取得に合わせて進める）
+        comment_types (list): 取得するコメントタイプ（含まれないタイプはリクエストを送信しない）
+
+    Yields:
+        dict: コメントレコード（レビューコメント → レビュー → Issueコメントの順）
+    """
+    progress = progress or CrawlProgress()
+
+    # リポジトリ全体のレビューコメントを取得
+    if not progress.is_done('review_comment'):
+        if 'review_comment' in comment_types:
+            comments = client.get_review_comments(
+                since=since, start_page=_resume_page(progress, 'review_comment'), on_page=progress.set_page
+            )
+            for comment in default_metrics.timed(comments, 'review_comments'):
+                yield review_comment_record(comment)
+        progress.start_phase('review')
+
+    # PRのレビューを取得（一括取得のエンドポイントがないためPR単位）
+    if not progress.is_done('review'):
+        pr_numbers = [
+            pr_number for pr_number in review_pr_numbers
+            if pr_number not in progress.reviewed_pr_numbers
+        ] if 'review' in comment_types else []
+        with ThreadPoolExecutor(max_workers=client.concurrency) as executor:
+            reviews = windowed_map(executor, lambda pr_number: _fetch_review_records(client, pr_number),
+                                   pr_numbers, client.concurrency)
+            for pr_number, pr_reviews in zip(pr_numbers, default_metrics.timed(reviews, 'reviews')):
+                yield from pr_reviews
+                progress.reviewed_pr_numbers.add(pr_number)
+        progress.start_phase('issue_comment')
+
+    if 'issue_comment' not in comment_types:
+        return
+
+    # リポジトリ全体のIssueコメントからPRへのコメントのみ取得
+    comments = client.get_issue_comments(
+        since=since, start_page=_resume_page(progress, 'issue_comment'), on_page=progress.set_page
+    )
+    for comment in default_metrics.timed(comments, 'issue_comments'):
+        if _is_pull_request_comment(comment):
+            yield issue_comment_record(comment)
+
+
+def get_backend():
+    """
+    PR_COMMENTS_BACKEND 環境変数から取得方法を決める
+
+    Returns:
+        str: 'rest' または 'graphql'
+    """
+    backend = os.environ.get('PR_COMMENTS_BACKEND', 'rest').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"PR_COMMENTS_BACKEND は {' / '.join(BACKENDS)} のいずれかを指定してください: {backend}")
+    return backend
+
+
+def _list_pull_request_records(client, comment_filter, updated_since=None):
+    """
+    PR一覧（/pulls）から条件に一致するPRレコードを取得する
+
+    状態は state= で絞り込み、打ち切りに使える日時（更新日時または作成日時）の順に取得して、
+    条件の範囲を過ぎたらそれ以降のページを取得しない。
+    """
+    order = comment_filter.pull_request_order(updated_since)
+    sort, direction = order
+    pull_requests = client.get_pull_requests(state=comment_filter.api_state(), sort=sort, direction=direction)
+
+    pr_records = []
+    for pr in default_metrics.timed(pull_requests, 'pull_requests'):
+        pr_record = pull_request_record(pr)
+        if comment_filter.is_past_end(pr_record, order, updated_since):
+            break
+        if comment_filter.matches_pull_request(pr_record):
+            pr_records.append(pr_record)
+
+    if direction == 'asc':
+        # 出力はほかの場合と同じくPRの新しい順にする
+        pr_records.reverse()
+    for pr_record in pr_records:
+        print(f"PR #{pr_record.pr_number}: {pr_record.pr_title}")
+    return pr_records
+
+
+def _search_pull_request_records(client, comment_filter):
+    """
+    検索API（/search/issues）で条件に一致するPRレコードを取得する
+
+    Returns:
+        list: PRレコードのリスト（PR番号の降順、検索結果が上限を超える場合はNone）
+    """
+    pr_by_number = {}
+    for query in comment_filter.search_queries(client.repo_name):
+        total_count, items = client.search_pull_requests(query)
+        if total_count > SEARCH_RESULT_LIMIT:
+            print(f"検索結果が{SEARCH_RESULT_LIMIT}件を超えるため、PR一覧から絞り込みます: {query}")
+            return None
+        for item in default_metrics.timed(items, 'search'):
+            # 検索結果ではマージ日時が pull_request の中にある
+            pr_record = pull_request_record(dict(item, merged_at=item['pull_request'].get('merged_at')))
+            if comment_filter.matches_pull_request(pr_record):
+                pr_by_number[pr_record.pr_number] = pr_record
+
+    pr_records = sorted(pr_by_number.values(), key=lambda pr_record: pr_record.pr_number, reverse=True)
+    for pr_record in pr_records:
+        print(f"PR #{pr_record.pr_number}: {pr_record.pr_title}")
+    return pr_records
+
+
+def _prefers_pull_request_endpoints(client, pr_count, comment_types, since):
+    """
+    絞り込んだPRのコメントを、リポジトリ全体のコメント一覧よりPR単位で取得するほうが少ないリクエストで済むかどうか
+
+    コメント一覧の件数は1件ずつのページの最終ページ番号から求める（タイプごとに1回のリクエスト）。
+    """
+    listing_types = [comment_type for comment_type in ('review_comment', 'issue_comment') if comment_type in comment_types]
+    if not listing_types or not pr_count:
+        return True
+    paths = {'review_comment': '/pulls/comments', 'issue_comment': '/issues/comments'}
+    params = {'since': since} if since else None
+    listing_requests = sum(-(-client.count_items(paths[comment_type], params) // PER_PAGE)
+                           for comment_type in listing_types)
+    pull_request_requests = pr_count * len(listing_types)
+    print(f"コメントの取得: リポジトリ全体の一覧 {listing_requests}ページ / PR単位 {pull_request_requests}件")
+    return pull_request_requests < listing_requests
+
+
+def _fetch_rest_records(client, updated_since=None, progress=None, comment_filter=None):
+    """REST APIでPRレコードを取得し、コメントレコードのイテレーターとともに返す"""
+    comment_filter = comment_filter or CommentFilter()
+
+    pr_records = None
+    if comment_filter.uses_search():
+        # 作成者・投稿者はPR一覧で絞り込めないため、検索APIで一致するPRだけを取得する
+        pr_records = _search_pull_request_records(client, comment_filter)
+    if pr_records is None:
+        pr_records = _list_pull_request_records(client, comment_filter, updated_since)
+
+    pr_numbers = [pr_record.pr_number for pr_record in pr_records]
+    comment_types = [comment_type for comment_type in COMMENT_TYPE_ORDER if comment_filter.includes_type(comment_type)]
+    since = updated_since or comment_filter.comments_since()
+    if comment_filter.has_pull_request_conditions() and progress is None \
+            and _prefers_pull_request_endpoints(client, len(pr_numbers), comment_types, since):
+        comment_records = iter_pull_request_comment_records(client, pr_numbers, comment_types)
+    else:
+        comment_records = iter_comment_records(
+            client, pr_numbers, since=since, progress=progress, comment_types=comment_types
+        )
+    return pr_records, comment_records
+
+
+def fetch_records(client, updated_since=None, progress=None, comment_filter=None):
+    """
+    PRレコードとコメントレコードを取得する
+
+    コメントレコードはイテレーターで返し、反復に合わせて取得する。
+    GraphQLではPRとコメントを同時に取得するため、PRレコードのリストは
+    コメントレコードを最後まで反復した時点で揃う。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        updated_since (str): 指定時はこの日時以降に更新されたPR・コメントのみ取得する
+        progress (CrawlProgress): 進捗（指定時はその続きから取得し、取得に合わせて進める）
+        comment_filter (CommentFilter): 絞り込み条件（PRの条件はPRごとのリクエストの前に適用し、
+            コメントの条件はタイプ単位で取得を省くのみで、コメントレコードには適用しない）
+
+    Returns:
+        tuple: (PRレコードのリスト, コメントレコードのイテレーター,
+                取得したPRについて全件取得したコメントタイプのリスト)
+    """
+    if get_backend() == 'graphql':
+        from graphql_fetcher import iter_graphql_records  # graphql_fetcher がこのモジュールを参照するため
+        pr_records = []
+        comment_records = default_metrics.timed(
+            iter_graphql_records(client, pr_records, updated_since, progress, comment_filter), 'graphql'
+        )
+        # GraphQLではPRごとに全コメントを取得する
+        return pr_records, comment_records, COMMENT_TYPE_ORDER
+
+    pr_records, comment_records = _fetch_rest_records(client, updated_since, progress, comment_filter)
+    # RESTではレビューのみPRごとに全件取得し、それ以外は since= で差分のみ取得する
+    complete_types = ['review'] if updated_since else COMMENT_TYPE_ORDER
+    return pr_records, comment_records, complete_types
+
+
+def iter_comment_rows(pr_records, comment_records, columns=COMMENT_COLUMNS):
+    """
+    コメントレコードにPRの情報を結合したコメント行を順に返す
+
+    Args:
+        pr_records (list): PRレコード（PullRequestRecord）のリスト（反復中に追加されてもよい）
+        comment_records: コメントレコードのイテラブル
+        columns (list): 出力する列
+
+    Yields:
+        dict: コメント行
+    """
+    # 列ごとに、PRレコードの位置（PRの列）かコメントレコードのキー（それ以外）から値を取る
+    pr_indexes = {field: index for index, field in enumerate(PullRequestRecord._fields) if field != 'pr_number'}
+    sources = [(column, pr_indexes.get(column)) for column in columns]
+
+    pr_by_number = {}
+    indexed = 0
+    for record in comment_records:
+        pr_record = pr_by_number.get(record['pr_number'])
+        if pr_record is None:
+            # 反復中に追加されたPRを索引に加える
+            for new_record in pr_records[indexed:]:
+                pr_by_number[new_record.pr_number] = new_record
+            indexed = len(pr_records)
+            pr_record = pr_by_number.get(record['pr_number'])
+            if pr_record is None:
+                # PR一覧の取得後に作成されたPRへのコメントは次回に含める
+                continue
+
+        yield {column: record[column] if index is None else pr_record[index] for column, index in sources}
+
+
+def _comment_order(record):
+    """コメントレコードの並び順のキー（PR番号の降順、PR内ではコメントタイプ・コメントIDの順）"""
+    return -record['pr_number'], COMMENT_TYPE_ORDER.index(record['comment_type']), record['comment_id']
+
+
+def _spill_sorted(records):
+    """コメントレコードを並べ替えて一時ファイルに書き出し、先頭に戻したファイルを返す"""
+    records.sort(key=_comment_order)
+    run = tempfile.TemporaryFile('w+', encoding='utf-8')
+    for record in records:
+        run.write(json.dumps(record, ensure_ascii=False) + '\n')
+    run.seek(0)
+    return run
+
+
+def sort_comment_records(comment_records, buffer_size=SORT_BUFFER_SIZE):
+    """
+    コメントレコードをPR番号の降順、PR内ではコメントタイプ・コメントIDの順に並べ替えて返す
+
+    buffer_size 件ごとに並べ替えて一時ファイルに書き出し、最後にすべての一時ファイルをマージする。
+    全件が buffer_size 件に収まる場合は一時ファイルを使わない。
+
+    Args:
+        comment_records: コメントレコードのイテラブル
+        buffer_size (int): メモリに保持するコメントレコードの件数
+
+    Yields:
+        dict: コメントレコード
+    """
+    runs = []
+    try:
+        buffer = []
+        for record in comment_records:
+            buffer.append(record)
+            if len(buffer) >= buffer_size:
+                runs.append(_spill_sorted(buffer))
+                buffer = []
+        buffer.sort(key=_comment_order)
+        if not runs:
+            yield from buffer
+            return
+        yield from heapq.merge(
+            *[(json.loads(line) for line in run) for run in runs], buffer, key=_comment_order
+        )
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _filter_comment_records(pr_records, comment_records, comment_filter):
+    """
+    コメントの条件に一致するコメントレコードのみ返す
+
+    投稿者を指定した場合は、返し終えた時点でPRレコードのリストもその人のコメントを返したPRに絞り込む
+    （検索で見つかったPRでも、出力するコメントがなければ総PR数に含めない）。
+    """
+    commented_pr_numbers = set()
+    for record in comment_records:
+        if comment_filter.matches_comment(record):
+            commented_pr_numbers.add(record['pr_number'])
+            yield record
+    if comment_filter.commenters:
+        pr_records[:] = [pr_record for pr_record in pr_records if pr_record.pr_number in commented_pr_numbers]
+
+
+def stream_all_pr_comments(client, columns=COMMENT_COLUMNS):
+    """
+    リポジトリの全PRのコメント行を取得しながら順に返す
+
+    行はPR番号の降順、PR内ではコメントタイプ・コメントIDの順に返す（ストアから出力する場合と同じ順序）。
+    並べ替えは sort_comment_records で一時ファイルを使って行い、全件をメモリに保持しないため、
+    コメント数によらずメモリ使用量は一定になる（最初の行はすべてのコメントを取得した後に返す）。
+    PR_COMMENTS_FILTER を指定した場合は、条件に一致するPR・コメントのみ返す。
+
+    Args:
+        client (GitHubClient): APIクライアント
+        columns (list): 出力する列
+
+    Returns:
+        tuple: (PRレコードのリスト, コメント行のイテレーター)
+    """
+    comment_filter = get_comment_filter()
+    pr_records, comment_records, _ = fetch_records(client, comment_filter=comment_filter)
+    if comment_filter.commenters or comment_filter.comment_types:
+        comment_records = _filter_comment_records(pr_records, comment_records, comment_filter)
+    return pr_records, iter_comment_rows(pr_records, sort_comment_records(comment_records), columns)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+ローカルストアの集計インデックスからコメント数を集計するスクリプト
+
+APIを呼び出さず、同期済みのストア（PR_COMMENTS_STORE）だけを使う。
+最新の状態で集計するには、先に crawl_pr_comments.py などでストアを同期する。
+
+使い方:
+    python scripts/query_pr_comments.py user --days 30        # 直近30日のコメント数が多いユーザー
+    python scripts/query_pr_comments.py path --type review_comment   # レビューコメントが多いファイル
+    python scripts/query_pr_comments.py week --since 2024-01-01 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+from comment_store import INDEX_GROUPS, CommentStore
+from pr_comment_fetcher import COMMENT_TYPE_ORDER
+
+# 集計の単位ごとの見出し
+GROUP_TITLES = {
+    'user': 'ユーザー',
+    'pr': 'PR番号',
+    'path': 'ファイルパス',
+    'type': 'コメントタイプ',
+    'day': '日',
+    'week': '週（月曜日）',
+    'month': '月',
+}
+
+# 期間以外の集計で --limit を省略した場合に表示する件数
+DEFAULT_LIMIT = 20
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='ローカルストアの集計インデックスからコメント数を集計する')
+    parser.add_argument('group_by', choices=INDEX_GROUPS, help='集計の単位')
+    parser.add_argument('--days', type=int, help='直近の日数（--since より優先）')
+    parser.add_argument('--since', help='この日付（YYYY-MM-DD）以降に作成されたコメントのみ')
+    parser.add_argument('--until', help='この日付（YYYY-MM-DD）より前に作成されたコメントのみ')
+    parser.add_argument('--type', choices=COMMENT_TYPE_ORDER, help='このタイプのコメントのみ')
+    parser.add_argument('--limit', type=int, help=f'表示する件数（期間以外の既定値: {DEFAULT_LIMIT}）')
+    parser.add_argument('--json', action='store_true', help='JSONで出力する')
+    args = parser.parse_args()
+
+    store_path = os.environ.get('PR_COMMENTS_STORE')
+    if not store_path or not os.path.exists(store_path):
+        print("エラー: PR_COMMENTS_STORE環境変数に同期済みのストアを指定してください。")
+        sys.exit(1)
+
+    repo_name = os.environ.get('GITHUB_REPOSITORY')
+    if not repo_name:
+        print("エラー: GITHUB_REPOSITORY環境変数が設定されていません。")
+        sys.exit(1)
+
+    since = args.since
+    if args.days is not None:
+        since = (date.today() - timedelta(days=args.days)).isoformat()
+    limit = args.limit
+    if limit is None and args.group_by not in ('day', 'week', 'month'):
+        limit = DEFAULT_LIMIT
+
+    with CommentStore(store_path, repo_name) as store:
+        rows = store.query_index(args.group_by, since=since, until=args.until,
+                                 comment_type=args.type, limit=limit)
+
+    if args.json:
+        print(json.dumps([{args.group_by: key, 'comments': count} for key, count in rows],
+                         ensure_ascii=False, indent=2))
+        return
+
+    print(f"リポジトリ: {repo_name}")
+    conditions = [f"{since} 以降" if since else None, f"{args.until} より前" if args.until else None, args.type]
+    conditions = [condition for condition in conditions if condition]
+    if conditions:
+        print(f"条件: {'、'.join(conditions)}")
+    print(f"{GROUP_TITLES[args.group_by]}別のコメント数:")
+    for key, count in rows:
+        print(f"  - {key}: {count}件")
+    if not rows:
+        print("  （該当するコメントはありません）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+GitHub APIのレート制限に合わせてリクエストを制御するスケジューラー
+
+レスポンスの X-RateLimit-* ヘッダーから残りのリクエスト数をリソース（core・search・graphql など、
+X-RateLimit-Resource）ごとに追跡し、残りが少なくなったらリセットまでの時間に合わせて間隔を空ける。
+レート制限（403/429）を受けた場合は失敗させずに待機してから再開する。
+"""
+
+import threading
+import time
+from datetime import datetime
+
+# 残りがこの割合を下回ったら、リセットまでの時間に合わせてリクエスト間隔を空ける
+PACING_THRESHOLD = 0.1
+
+# Retry-After がないセカンダリレート制限の初回待機秒数（GitHubの推奨は1分以上）
+SECONDARY_LIMIT_BACKOFF = 60
+
+# 一時的なサーバーエラーの初回待機秒数
+SERVER_ERROR_BACKOFF = 2
+
+# 再試行の上限回数
+MAX_RETRIES = 5
+
+# REST APIのレート制限のリソース（X-RateLimit-Resource がないレスポンスもこのリソースとして扱う）
+CORE_RESOURCE = 'core'
+
+
+class RateLimitState:
+    """1つのリソースのレート制限の状態"""
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.next_request_at = 0.0
+        self.paused_until = 0.0
+
+
+class RequestScheduler:
+    """レート制限を考慮してリクエストの送信タイミングを決めるスケジューラー"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # リソース名 → RateLimitState（検索APIは1分あたり30件など、リソースごとに上限とリセット時刻が異なる）
+        self.resources = {}
+        # セカンダリレート制限・サーバーエラーでは全リソースのリクエストを止める
+        self._paused_until = 0.0
+
+        # 実行結果の報告用
+        self.requests = 0
+        self.retries = 0
+        self.sleep_seconds = 0.0
+
+    def _state(self, resource):
+        """リソースのレート制限の状態（呼び出し側でロックを取得する）"""
+        return self.resources.setdefault(resource, RateLimitState())
+
+    @property
+    def limit(self):
+        """core のレート制限の上限"""
+        state = self.resources.get(CORE_RESOURCE)
+        return state.limit if state else None
+
+    @property
+    def remaining(self):
+        """core の残りのリクエスト数"""
+        state = self.resources.get(CORE_RESOURCE)
+        return state.remaining if state else None
+
+    def _sleep(self, seconds):
+        """待機して待機時間を記録する"""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self.sleep_seconds += seconds
+        time.sleep(seconds)
+
+    def before_request(self, resource=CORE_RESOURCE):
+        """
+        リクエストの送信前に呼び出し、必要なだけ待機する
+
+        Args:
+            resource (str): リクエストが消費するレート制限のリソース
+        """
+        with self._lock:
+            state = self._state(resource)
+            now = time.time()
+            wait_until = max(now, self._paused_until, state.paused_until)
+
+            # 残りを使い切った場合はリセットまで待つ
+            if state.remaining == 0 and state.reset_at and state.reset_at > wait_until:
+                wait_until = state.reset_at
+
+            # 残りが少ない場合はリセットまでの時間に均等に割り振る
+            interval = 0.0
+            if state.limit and state.remaining and state.reset_at \
+                    and state.remaining < state.limit * PACING_THRESHOLD:
+                interval = max(0.0, state.reset_at - now) / state.remaining
+
+            wait_until = max(wait_until, state.next_request_at)
+            state.next_request_at = wait_until + interval
+            self.requests += 1
+
+        self._sleep(wait_until - time.time())
+
+    def update(self, headers, resource=CORE_RESOURCE):
+        """
+        レスポンスヘッダーからレート制限の状態を更新する
+
+        Args:
+            headers: レスポンスヘッダー
+            resource (str): リクエストが消費するレート制限のリソース（X-RateLimit-Resource があればそちらを使う）
+        """
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        with self._lock:
+            state = self._state(headers.get('X-RateLimit-Resource') or resource)
+            state.remaining = int(remaining)
+            state.limit = int(headers.get('X-RateLimit-Limit', state.limit or 0)) or None
+            reset = headers.get('X-RateLimit-Reset')
+            if reset:
+                state.reset_at = int(reset)
+
+    def retry_delay(self, status, headers, attempt, message='', resource=CORE_RESOURCE):
+        """
+        エラーレスポンスを再試行するまでの待機秒数を決める
+
+        待機中は他のスレッドからのリクエストも止め、次の before_request で待機する
+        （プライマリレート制限の場合は同じリソースのリクエストのみ止める）。
+
+        Args:
+            status (int): HTTPステータスコード（通信エラーの場合はNone）
+            headers: レスポンスヘッダー
+            attempt (int): これまでの再試行回数
+            message (str): エラーレスポンスの本文
+            resource (str): リクエストが消費したレート制限のリソース
+
+        Returns:
+            float: 待機秒数（再試行しない場合はNone）
+        """
+        if attempt >= MAX_RETRIES:
+            return None
+
+        self.update(headers, resource)
+        resource = headers.get('X-RateLimit-Resource') or resource
+
+        if status in (403, 429):
+            retry_after = headers.get('Retry-After')
+            with self._lock:
+                state = self._state(resource)
+            if retry_after is not None:
+                # セカンダリレート制限
+                delay = float(retry_after)
+            elif headers.get('X-RateLimit-Remaining') == '0' and state.reset_at:
+                # プライマリレート制限（このリソースのリクエストのみリセット時刻まで止める）
+                delay = max(1.0, state.reset_at - time.time() + 1)
+                with self._lock:
+                    state.paused_until = max(state.paused_until, time.time() + delay)
+                    self.retries += 1
+                return delay
+            elif status == 429 or 'rate limit' in message.lower():
+                # Retry-After のないセカンダリレート制限
+                delay = SECONDARY_LIMIT_BACKOFF * (2 ** attempt)
+            else:
+                # 権限不足などレート制限以外の403
+                return None
+        elif status in (None, 500, 502, 503, 504):
+            # 通信エラー・一時的なサーバーエラー
+            delay = SERVER_ERROR_BACKOFF * (2 ** attempt)
+        else:
+            return None
+
+        # 他のスレッドも同じ時刻まで送信を止める
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + delay)
+            self.retries += 1
+        return delay
+
+    def report(self):
+        """リクエスト数・待機時間・残りのレート制限を表示する"""
+        print("\n=== APIリクエスト ===")
+        print(f"リクエスト数: {self.requests}件（再試行: {self.retries}件）")
+        print(f"待機時間: {round(self.sleep_seconds, 1)}秒")
+        for resource, state in self.rate_limit_summary().items():
+            reset = datetime.fromtimestamp(state['reset_at']).isoformat() if state['reset_at'] else '-'
+            print(f"残りのレート制限（{resource}）: {state['remaining']}/{state['limit']}（リセット: {reset}）")
+
+    def rate_limit_summary(self):
+        """
+        リソースごとのレート制限の状態
+
+        Returns:
+            dict: リソース名 → {'remaining', 'limit', 'reset_at'}（core を先頭に、応答を受け取ったリソースのみ）
+        """
+        with self._lock:
+            return {
+                resource: {'remaining': state.remaining, 'limit': state.limit, 'reset_at': state.reset_at}
+                for resource, state in sorted(self.resources.items(), key=lambda x: (x[0] != CORE_RESOURCE, x[0]))
+                if state.remaining is not None
+            }
+
+
+# 同じプロセス内のクライアントで共有するスケジューラー
+default_scheduler = RequestScheduler()